@@ -0,0 +1,141 @@
+from src.primitive_db.exceptions import ValidationError
+
+# Элементы списка выборки SELECT - кортежи:
+#   ("column", col)           столбец (при группировке - ключ группы)
+#   ("agg", func, col)        агрегат; col=None означает count(*)
+AGGREGATE_FUNCS = {"count", "sum", "min", "max", "avg"}
+# Функции, которым нужен числовой столбец
+NUMERIC_FUNCS = {"sum", "avg"}
+
+
+def label(item: tuple) -> str:
+    """Имя столбца результата: "name", "count(*)", "sum(age)"."""
+    if item[0] == "column":
+        return item[1]
+    return f"{item[1]}({item[2] if item[2] is not None else '*'})"
+
+
+def is_aggregate(items: list[tuple] | None, group_by: list[str]) -> bool:
+    """Нужна ли агрегация (а не обычная выборка столбцов)."""
+    return bool(group_by) or any(item[0] == "agg" for item in items or ())
+
+
+def validate(items: list[tuple], group_by: list[str], col_types: dict) -> None:
+    """Проверяет список выборки и GROUP BY по схеме таблицы."""
+    for col in group_by:
+        if col not in col_types:
+            raise ValidationError(f"Столбец {col} не существует.")
+
+    for item in items:
+        if item[0] == "column":
+            col = item[1]
+            if col not in col_types:
+                raise ValidationError(f"Столбец {col} не существует.")
+            if col not in group_by:
+                raise ValidationError(
+                    f"Столбец {col} должен быть в GROUP BY или внутри агрегата."
+                )
+            continue
+
+        _, func, col = item
+        if func not in AGGREGATE_FUNCS:
+            raise ValidationError(
+                f"Неизвестная функция {func}. "
+                f"Допустимые: {', '.join(sorted(AGGREGATE_FUNCS))}"
+            )
+        if col is None:
+            if func != "count":
+                raise ValidationError(f"{func}(*) не поддерживается.")
+            continue
+        if col not in col_types:
+            raise ValidationError(f"Столбец {col} не существует.")
+        if func in NUMERIC_FUNCS and col_types[col] != "int":
+            raise ValidationError(
+                f"{func}() применим только к столбцам типа int, а {col} - "
+                f"{col_types[col]}."
+            )
+
+
+def _initial(func: str):
+    if func == "count":
+        return 0
+    if func == "avg":
+        return [0, 0]
+    return None
+
+
+def _result(func: str, state):
+    if func == "avg":
+        total, count = state
+        return total / count if count else None
+    return state
+
+
+def aggregate(rows, items: list[tuple], group_by: list[str]):
+    """
+    Хеш-агрегация за один проход по потоку записей: в памяти держится только
+    по одному состоянию на группу. Группы выдаются в порядке первого
+    появления. Без GROUP BY результат - одна строка (и для пустой выборки).
+    """
+    aggs = [(item[1], item[2]) for item in items if item[0] == "agg"]
+    groups = {}
+
+    for row in rows:
+        key = tuple(row[col] for col in group_by)
+        state = groups.get(key)
+        if state is None:
+            state = groups[key] = [_initial(func) for func, _ in aggs]
+
+        for pos, (func, col) in enumerate(aggs):
+            if col is None:
+                state[pos] += 1
+                continue
+            value = row[col]
+            if value is None:
+                continue
+            if func == "count":
+                state[pos] += 1
+            elif func == "sum":
+                state[pos] = value if state[pos] is None else state[pos] + value
+            elif func == "avg":
+                state[pos][0] += value
+                state[pos][1] += 1
+            elif func == "min":
+                if state[pos] is None or value < state[pos]:
+                    state[pos] = value
+            elif state[pos] is None or value > state[pos]:
+                state[pos] = value
+
+    if not groups and not group_by:
+        groups[()] = [_initial(func) for func, _ in aggs]
+
+    for key, state in groups.items():
+        values = dict(zip(group_by, key))
+        results = iter(_result(func, s) for (func, _), s in zip(aggs, state))
+        yield {
+            label(item): values[item[1]] if item[0] == "column" else next(results)
+            for item in items
+        }
+
+
+def from_stats(stats: dict | None, items: list[tuple]) -> dict | None:
+    """
+    Отвечает на агрегат без чтения таблицы, если хватает статистики из
+    метаданных: count(*), min/max по int-столбцам. Иначе - None.
+    """
+    if stats is None:
+        return None
+    result = {}
+    for item in items:
+        if item[0] != "agg":
+            return None
+        _, func, col = item
+        if func == "count" and col is None:
+            result[label(item)] = stats["rows"]
+        elif func in ("min", "max") and col in stats[func]:
+            result[label(item)] = stats[func][col]
+        elif func in ("min", "max") and stats["rows"] == 0:
+            result[label(item)] = None
+        else:
+            return None
+    return result
@@ -0,0 +1,305 @@
+import functools
+import inspect
+from contextlib import closing, contextmanager
+
+from src.primitive_db import core, parser
+from src.primitive_db.constants import DB_FILE, FLUSH_INTERVAL, TABLE_LAYOUT
+from src.primitive_db.exceptions import TableNotFoundError, ValidationError
+from src.primitive_db.session import Session
+
+# Функции core без декораторов (handle_db_errors, confirm_action, measure):
+# они выбрасывают исключения, ничего не печатают и не спрашивают
+_create_table = inspect.unwrap(core.create_table)
+_drop_table = inspect.unwrap(core.drop_table)
+_create_index = inspect.unwrap(core.create_index)
+_drop_index = inspect.unwrap(core.drop_index)
+_insert = inspect.unwrap(core.insert)
+_insert_many = inspect.unwrap(core.insert_many)
+_iter_select = inspect.unwrap(core.iter_select)
+_update = inspect.unwrap(core.update)
+_delete = inspect.unwrap(core.delete)
+
+
+def _where(where):
+    """Условие может быть строкой ("age > 5 and ..."), словарем или None."""
+    if isinstance(where, str):
+        return parser.parse_where_expression(where)
+    return where
+
+
+def _access(write: bool = False):
+    """
+    Метод выполняется внутри Session.access: видит согласованный снимок
+    базы, а пишущий метод держит блокировку записи (см. Session).
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self._session.access(write=write):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _held_rows(session: Session, make_rows):
+    """
+    Генератор копий записей make_rows(), который держит Session.access до
+    своего конца или закрытия (close, сборка мусора): пока по нему идут,
+    другие процессы не меняют базу, и ленивое чтение видит тот же снимок.
+    Первый шаг (None) делает вызывающий, чтобы ошибки условия выбрасывались
+    сразу, а не при первой записи.
+    """
+    with session.access():
+        rows = make_rows()
+        yield None
+        for row in rows:
+            yield dict(row)
+
+
+class Database:
+    """
+    Программный интерфейс базы данных без консольного ввода-вывода.
+    Ошибки выбрасываются типизированными исключениями из exceptions.py,
+    загрузка и сохранение данных происходят внутри (через Session).
+
+        with Database() as db:
+            users = db.create_table("users", {"name": "str", "age": "int"})
+            users.insert_many([{"name": "Ann", "age": 30}])
+            users.select(where="age > 18")
+
+            with db.transaction():
+                users.update({"age": "31"}, where="name = 'Ann'")
+                users.delete(where="age < 18")
+    """
+
+    def __init__(self, db_file: str = DB_FILE,
+                 flush_interval: float = FLUSH_INTERVAL,
+                 layout: str = TABLE_LAYOUT):
+        self.session = Session(db_file, flush_interval, layout)
+
+    @property
+    def _session(self) -> Session:
+        return self.session
+
+    def __enter__(self) -> "Database":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @_access()
+    def tables(self) -> list[str]:
+        return list(self.session.metadata.keys())
+
+    @_access()
+    def table(self, name: str) -> "Table":
+        if name not in self.session.metadata:
+            raise TableNotFoundError(f'Таблица "{name}" не существует.')
+        return Table(self, name)
+
+    @_access(write=True)
+    def create_table(self, name: str, columns: dict | list,
+                     partition: str | None = None) -> "Table":
+        """
+        columns: {"имя": "тип"} или список строк "имя:тип".
+        partition: секционирование, как в консоли: "hash(city) into 8",
+        "range(ID) size 100000".
+        """
+        if isinstance(columns, dict):
+            columns = [f"{col}:{col_type}" for col, col_type in columns.items()]
+        scheme = None
+        if partition is not None:
+            _, scheme = parser.parse_partition(["partition", "by",
+                                                *partition.split()])
+        _create_table(self.session.metadata, name, columns, scheme)
+        self.session.mark_metadata_dirty()
+        self._changed()
+        return Table(self, name)
+
+    @_access(write=True)
+    def drop_table(self, name: str) -> None:
+        _drop_table(self.session.metadata, name)
+        self.session.mark_metadata_dirty()
+        self.session.drop_table(name)
+        self._changed()
+
+    @_access(write=True)
+    def create_index(self, table_name: str, column: str,
+                     kind: str = "hash") -> None:
+        _create_index(self.session.metadata, table_name, column, kind)
+        self.session.mark_metadata_dirty()
+        self.session.reset_indexes(table_name)
+        self._changed()
+
+    @_access(write=True)
+    def drop_index(self, table_name: str, column: str) -> None:
+        _drop_index(self.session.metadata, table_name, column)
+        self.session.mark_metadata_dirty()
+        self.session.reset_indexes(table_name)
+        self._changed()
+
+    def begin(self) -> None:
+        self.session.begin()
+
+    def commit(self) -> None:
+        self.session.commit()
+
+    def rollback(self) -> None:
+        self.session.rollback()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Транзакция в блоке with: изменения сохраняются вместе при выходе
+        из блока или отменяются, если в нем возникло исключение.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _changed(self) -> None:
+        self.session.maybe_flush()
+
+
+class Table:
+    """Доступ к одной таблице базы. Возвращаемые записи - копии словарей."""
+
+    def __init__(self, db: Database, name: str):
+        self.db = db
+        self.name = name
+
+    @property
+    def _session(self) -> Session:
+        return self.db.session
+
+    @property
+    def columns(self) -> list[dict]:
+        return self._session.metadata[self.name]["columns"]
+
+    def _values(self, row) -> list:
+        """
+        Значения записи в порядке схемы (без ID): из словаря или списка.
+        Значения нужны для всех столбцов: пропущенный или неизвестный
+        столбец, как и список другой длины, - ошибка, а не пустое значение.
+        """
+        names = [col["name"] for col in self.columns[1:]]
+        if isinstance(row, dict):
+            unknown = [str(col) for col in row if col not in names]
+            if unknown:
+                raise ValidationError(
+                    f"Столбцы не существуют: {', '.join(unknown)}. "
+                    f"Столбцы: {names}"
+                )
+            missing = [col for col in names if col not in row]
+            if missing:
+                raise ValidationError(
+                    f"Не заданы значения столбцов: {', '.join(missing)}"
+                )
+            return [row[col] for col in names]
+
+        values = list(row)
+        if len(values) != len(names):
+            raise ValidationError(
+                f"Ожидалось {len(names)} значений, получено {len(values)}. "
+                f"Столбцы: {names}"
+            )
+        return values
+
+    @_access()
+    def __len__(self) -> int:
+        return len(self._session.table(self.name))
+
+    @_access()
+    def count(self, where=None) -> int:
+        if where is None:
+            # Число записей хранится в статистике таблицы - без чтения данных
+            stats = self._session.metadata[self.name].get("stats")
+            return stats["rows"] if stats is not None else len(self)
+        return sum(1 for _ in self.iter(where))
+
+    def get(self, row_id: int) -> dict | None:
+        found = self.select(where={"ID": row_id})
+        return found[0] if found else None
+
+    @_access(write=True)
+    def insert(self, row: dict | list | None = None, **values) -> dict:
+        """Вставляет запись: insert({"name": "Ann"}) или insert(name="Ann")."""
+        new_row = _insert(self._session.metadata, self.name,
+                          self._session.table(self.name),
+                          self._values(row if row is not None else values),
+                          self._session.indexes(self.name))
+        self._session.mark_metadata_dirty()
+        self._session.mark_rows_changed(self.name, [new_row])
+        self.db._changed()
+        return dict(new_row)
+
+    @_access(write=True)
+    def insert_many(self, rows) -> list[dict]:
+        """Вставляет пачку записей одной операцией (все или ни одной)."""
+        new_rows = _insert_many(self._session.metadata, self.name,
+                                self._session.table(self.name),
+                                [self._values(row) for row in rows],
+                                self._session.indexes(self.name))
+        self._session.mark_metadata_dirty()
+        self._session.mark_rows_changed(self.name, new_rows)
+        self.db._changed()
+        return [dict(row) for row in new_rows]
+
+    def iter(self, where=None):
+        """
+        Итератор по подходящим записям (без сборки списка). До конца
+        перебора (или close()) он держит согласованный снимок базы, и
+        другие процессы на это время не могут зафиксировать изменения.
+        """
+        where = _where(where)
+
+        def make_rows():
+            return _iter_select(self._session.table(self.name), where,
+                                self._session.indexes(self.name), self.columns,
+                                self._session.metadata[self.name].get("stats"))
+
+        rows = _held_rows(self._session, make_rows)
+        next(rows)
+        return rows
+
+    @_access()
+    def select(self, where=None, limit: int | None = None,
+               offset: int = 0) -> list[dict]:
+        result = []
+        with closing(self.iter(where)) as rows:
+            for pos, row in enumerate(rows):
+                if pos < offset:
+                    continue
+                if limit is not None and len(result) >= limit:
+                    break
+                result.append(row)
+        return result
+
+    @_access(write=True)
+    def update(self, values: dict, where) -> list[dict]:
+        """Изменяет подходящие записи. Возвращает измененные записи."""
+        updated = _update(self._session.metadata, self.name,
+                          self._session.table(self.name), values, _where(where),
+                          self._session.indexes(self.name))
+        self._session.mark_metadata_dirty()
+        self._session.mark_rows_changed(self.name, updated)
+        self.db._changed()
+        return [dict(row) for row in updated]
+
+    @_access(write=True)
+    def delete(self, where) -> list[dict]:
+        """Удаляет подходящие записи. Возвращает удаленные записи."""
+        deleted = _delete(self._session.metadata, self.name,
+                          self._session.table(self.name), _where(where),
+                          self._session.indexes(self.name))
+        self._session.mark_metadata_dirty()
+        self._session.mark_rows_deleted(self.name, deleted)
+        self.db._changed()
+        return [dict(row) for row in deleted]
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Набор бенчмарков горячих путей CRUD.
+
+Генерирует синтетические таблицы заданного размера и схемы, замеряет
+insert, select (с WHERE и без), update, delete, а также загрузку и
+сохранение таблицы бэкендом хранения. Результат - JSON с пропускной
+способностью, перцентилями задержки и пиковой памятью каждого замера.
+"""
+import argparse
+import inspect
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.primitive_db import core, indexes, parser, storage
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.constants import STORAGE_BACKEND, SUPPORTED_TYPES
+
+# Функции core без декораторов: замер фаз (measure) добавлял бы свои
+# накладные расходы, а confirm_action спрашивал бы подтверждение удаления
+_create_table = inspect.unwrap(core.create_table)
+_insert = inspect.unwrap(core.insert)
+_insert_many = inspect.unwrap(core.insert_many)
+_select = inspect.unwrap(core.select)
+_update = inspect.unwrap(core.update)
+_delete = inspect.unwrap(core.delete)
+
+BENCH_TABLE = "bench"
+DEFAULT_SCHEMA = "name:str,age:int,active:bool"
+DEFAULT_SIZES = "1000,100000"
+
+
+def parse_schema(spec: str) -> list[str]:
+    """Разбирает схему вида "name:str,age:int" в аргументы create_table."""
+    columns = [part.strip() for part in spec.split(",") if part.strip()]
+    for column in columns:
+        name, _, col_type = column.partition(":")
+        if not name or col_type not in SUPPORTED_TYPES:
+            raise argparse.ArgumentTypeError(
+                f"Некорректный столбец схемы: {column}. "
+                f"Формат - имя:тип, типы: {', '.join(sorted(SUPPORTED_TYPES))}"
+            )
+    return columns
+
+
+def parse_sizes(spec: str) -> list[int]:
+    try:
+        sizes = [int(part) for part in spec.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Некорректный список размеров: {spec}")
+    if not sizes or min(sizes) <= 0:
+        raise argparse.ArgumentTypeError("Размеры таблиц должны быть больше 0.")
+    return sizes
+
+
+def _value_factory(col_type: str, rng: random.Random):
+    """Генератор синтетических значений столбца заданного типа."""
+    if col_type == "int":
+        return lambda: rng.randrange(1_000_000)
+    if col_type == "bool":
+        return lambda: rng.random() < 0.5
+    # Строки повторяются, как в реальных данных (имена, города, статусы)
+    return lambda: f"value{rng.randrange(1000)}"
+
+
+def generate_rows(metadata: dict, count: int, rng: random.Random) -> list[list]:
+    """Генерирует значения count записей (без ID) по схеме таблицы."""
+    factories = [_value_factory(col["type"], rng)
+                 for col in metadata[BENCH_TABLE]["columns"][1:]]
+    return [[make() for make in factories] for _ in range(count)]
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    pos = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[pos]
+
+
+def summarize(durations: list[float], rows_per_call: int = 1) -> dict:
+    """Сводка замера: пропускная способность и перцентили задержки (мс)."""
+    ordered = sorted(durations)
+    total = sum(ordered)
+    return {
+        "calls": len(ordered),
+        "rows_per_call": rows_per_call,
+        "total_s": round(total, 6),
+        "rows_per_s": round(rows_per_call * len(ordered) / total, 1) if total else None,
+        "latency_ms": {
+            "mean": round(statistics.fmean(ordered) * 1000, 4),
+            "p50": round(_percentile(ordered, 0.50) * 1000, 4),
+            "p95": round(_percentile(ordered, 0.95) * 1000, 4),
+            "p99": round(_percentile(ordered, 0.99) * 1000, 4),
+            "max": round(ordered[-1] * 1000, 4),
+        },
+    }
+
+
+def timed(func, calls: int) -> list[float]:
+    """Вызывает func(i) calls раз и возвращает длительность каждого вызова."""
+    durations = []
+    for i in range(calls):
+        start = time.perf_counter()
+        func(i)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def peak_memory(func) -> int:
+    """
+    Пиковый объем памяти (байт), выделенной во время одного вызова func.
+    Считается отдельным прогоном: tracemalloc заметно замедляет код и
+    исказил бы замеры времени.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class TableBench:
+    """Бенчмарк одной синтетической таблицы заданного размера."""
+
+    def __init__(self, columns: list[str], size: int, layout: str,
+                 backend: str, samples: int, repeat: int, seed: int):
+        self.size = size
+        self.layout = layout
+        self.backend = storage.get_backend(backend)
+        self.samples = min(samples, size)
+        self.repeat = repeat
+        self.rng = random.Random(seed)
+        self.metadata = {}
+        _create_table(self.metadata, BENCH_TABLE, columns)
+        self.schema = self.metadata[BENCH_TABLE]["columns"]
+        self.results = {}
+
+    def _empty_table(self):
+        if self.layout == "columns":
+            return ColumnarTable.from_rows(self.schema, []), {}
+        return [], indexes.build_indexes(self.metadata, BENCH_TABLE, [])
+
+    def _column(self, col_type: str) -> str | None:
+        for col in self.schema[1:]:
+            if col["type"] == col_type:
+                return col["name"]
+        return None
+
+    def _record(self, name: str, durations: list[float], rows_per_call: int = 1,
+                memory=None) -> None:
+        self.results[name] = summarize(durations, rows_per_call)
+        if memory is not None:
+            self.results[name]["peak_memory_bytes"] = peak_memory(memory)
+
+    def run(self) -> dict:
+        values = generate_rows(self.metadata, self.size, self.rng)
+        self.bench_insert(values)
+        self.bench_select()
+        self.bench_update()
+        self.bench_delete()
+        self.bench_storage()
+        return {"rows": self.size, "benchmarks": self.results}
+
+    def bench_insert(self, values: list[list]) -> None:
+        def bulk_insert():
+            self.metadata[BENCH_TABLE]["sequence"] = 0
+            table, table_indexes = self._empty_table()
+            _insert_many(self.metadata, BENCH_TABLE, table, values, table_indexes)
+            return table, table_indexes
+
+        start = time.perf_counter()
+        self.data, self.indexes = bulk_insert()
+        self._record("insert_many", [time.perf_counter() - start],
+                     self.size, memory=bulk_insert)
+
+        # Одиночные вставки идут в заполненную таблицу
+        extra = generate_rows(self.metadata, self.samples, self.rng)
+        self._record("insert", timed(
+            lambda i: _insert(self.metadata, BENCH_TABLE, self.data,
+                              extra[i], self.indexes),
+            self.samples,
+        ))
+
+    def _select(self, where):
+        return list(_select(self.data, where, self.indexes, self.schema))
+
+    def bench_select(self) -> None:
+        count = len(self.data)
+        self._record("select_all", timed(lambda i: self._select(None), self.repeat),
+                     count, memory=lambda: self._select(None))
+
+        # Поиск по ID идет через первичный индекс (или бинарный поиск колонок)
+        ids = [self.rng.randint(1, self.size) for _ in range(self.samples)]
+        self._record("select_where_id", timed(
+            lambda i: self._select(parser.parse_where_expression(f"ID = {ids[i]}")),
+            self.samples,
+        ))
+
+        str_col = self._column("str")
+        if str_col:
+            where = parser.parse_where_expression(f'{str_col} = "value7"')
+            self._record("select_where_str_eq",
+                         timed(lambda i: self._select(where), self.repeat), count)
+
+        int_col = self._column("int")
+        if int_col:
+            where = parser.parse_where_expression(
+                f"{int_col} >= 250000 and {int_col} < 750000"
+            )
+            self._record("select_where_int_range",
+                         timed(lambda i: self._select(where), self.repeat), count)
+
+    def bench_update(self) -> None:
+        column = self.schema[-1]
+        new_value = {"int": "1", "bool": "true", "str": "updated"}[column["type"]]
+        ids = [self.rng.randint(1, self.size) for _ in range(self.samples)]
+        self._record("update_by_id", timed(
+            lambda i: _update(self.metadata, BENCH_TABLE, self.data,
+                              {column["name"]: new_value},
+                              parser.parse_where_expression(f"ID = {ids[i]}"),
+                              self.indexes),
+            self.samples,
+        ))
+
+    def bench_delete(self) -> None:
+        ids = self.rng.sample(range(1, self.size + 1), self.samples)
+        self._record("delete_by_id", timed(
+            lambda i: _delete(self.metadata, BENCH_TABLE, self.data,
+                              parser.parse_where_expression(f"ID = {ids[i]}"),
+                              self.indexes),
+            self.samples,
+        ))
+
+    def bench_storage(self) -> None:
+        count = len(self.data)
+
+        def save(_=None):
+            self.backend.rewrite(BENCH_TABLE, self.data, self.schema)
+
+        def load(_=None):
+            if self.layout == "columns":
+                if hasattr(self.backend, "load_columnar"):
+                    return self.backend.load_columnar(BENCH_TABLE, self.schema)
+                return ColumnarTable.from_rows(self.schema,
+                                               self.backend.load(BENCH_TABLE))
+            return self.backend.load(BENCH_TABLE)
+
+        self._record("save_table_data", timed(save, self.repeat), count)
+        self.results["save_table_data"]["file_bytes"] = os.path.getsize(
+            self.backend.get_path(BENCH_TABLE)
+        )
+        self._record("load_table_data", timed(load, self.repeat), count,
+                     memory=load)
+        self.backend.drop(BENCH_TABLE)
+
+
+def run_benchmarks(args: argparse.Namespace) -> dict:
+    report = {
+        "params": {
+            "sizes": args.sizes,
+            "schema": args.schema,
+            "layout": args.layout,
+            "backend": args.backend,
+            "samples": args.samples,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "python": sys.version.split()[0],
+        },
+        "results": [],
+    }
+    # Файлы таблиц пишутся в относительный каталог данных - работаем во
+    # временном каталоге, чтобы не задеть настоящую базу
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="primitive_db_bench_") as workdir:
+        os.chdir(workdir)
+        try:
+            for size in args.sizes:
+                print(f"Бенчмарк таблицы из {size} записей...", file=sys.stderr)
+                bench = TableBench(args.schema, size, args.layout, args.backend,
+                                   args.samples, args.repeat, args.seed)
+                report["results"].append(bench.run())
+        finally:
+            os.chdir(cwd)
+    return report
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(
+        prog="bench",
+        description="Бенчмарки операций CRUD на синтетических таблицах. "
+                    "Результат выводится в формате JSON.",
+    )
+    arg_parser.add_argument(
+        "--sizes", type=parse_sizes, default=parse_sizes(DEFAULT_SIZES),
+        help=f"размеры таблиц через запятую (по умолчанию {DEFAULT_SIZES}; "
+             "например 1000,100000,1000000)",
+    )
+    arg_parser.add_argument(
+        "--schema", type=parse_schema, default=parse_schema(DEFAULT_SCHEMA),
+        help=f"столбцы таблицы (по умолчанию {DEFAULT_SCHEMA})",
+    )
+    arg_parser.add_argument(
+        "--layout", choices=("rows", "columns"), default="rows",
+        help="представление таблицы в памяти",
+    )
+    arg_parser.add_argument(
+        "--backend", choices=sorted(storage.BACKENDS), default=STORAGE_BACKEND,
+        help="бэкенд хранения для замеров загрузки и сохранения",
+    )
+    arg_parser.add_argument(
+        "--samples", type=int, default=200,
+        help="число одиночных операций для перцентилей задержки",
+    )
+    arg_parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="число повторов операций над всей таблицей",
+    )
+    arg_parser.add_argument("--seed", type=int, default=42,
+                            help="зерно генератора данных")
+    arg_parser.add_argument(
+        "-o", "--output", metavar="FILE",
+        help="записать JSON в файл вместо stdout",
+    )
+    return arg_parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    report = run_benchmarks(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Двоичный формат файла таблицы (data/<table>.bin).
+
+    заголовок   b"PDBT", версия формата (u8), порядок байт (u8), резерв (u16),
+                число столбцов (u32), число записей (u64)
+    схема       для каждого столбца: тип (u8), длина имени (u16), имя (UTF-8)
+    столбцы     по порядку схемы, каждый с границы 8 байт:
+                int  - записи по 8 байт (array "q")
+                bool - записи по 1 байту
+                str  - словарь уникальных строк: их число (u64), смещения
+                       (число + 1) по 8 байт и куча байтов UTF-8; затем коды
+                       записей по 8 байт (номер строки в словаре)
+
+Записи хранятся по возрастанию ID, столбцы и их типы - из схемы таблицы
+в метаданных. Файл читается целиком при загрузке таблицы (чтения по
+требованию нет): через mmap каждый столбец копируется из отображенных
+страниц одним срезом, без разбора текста, а строки словаря декодируются
+по одному разу.
+"""
+import mmap
+import struct
+import sys
+from array import array
+from operator import itemgetter
+
+from src.primitive_db.exceptions import CorruptedDataError
+
+MAGIC = b"PDBT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBBHIQ")
+COLUMN = struct.Struct("<BH")
+COUNT = struct.Struct("<Q")
+
+TYPE_CODES = {"int": 0, "bool": 1, "str": 2}
+CODE_TYPES = {code: col_type for col_type, code in TYPE_CODES.items()}
+BYTE_ORDERS = {"little": 0, "big": 1}
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % 8)
+
+
+def _value_type(value) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    return "str"
+
+
+def infer_schema(rows) -> list[dict]:
+    """
+    Схема по первой записи: порядок столбцов - порядок ключей, тип - тип
+    значения. Только для таблиц, схема которых неизвестна (перенос старых
+    файлов без метаданных), - пустая таблица получает один столбец ID.
+    """
+    first = next(iter(rows), None)
+    if first is None:
+        return [{"name": "ID", "type": "int"}]
+    return [{"name": name, "type": _value_type(value)}
+            for name, value in first.items()]
+
+
+def _pack_column(col_type: str, values: list) -> list[bytes]:
+    if col_type == "int":
+        return [array("q", values).tobytes()]
+    if col_type == "bool":
+        return [bytes(1 if value else 0 for value in values)]
+
+    code_of = {}
+    codes = array("q", (code_of.setdefault(value, len(code_of)) for value in values))
+    heap = [value.encode("utf-8") for value in code_of]
+    offsets = array("q", [0])
+    for item in heap:
+        offsets.append(offsets[-1] + len(item))
+    heap_bytes = b"".join(heap)
+    return [COUNT.pack(len(heap)), offsets.tobytes(), heap_bytes,
+            _padding(len(heap_bytes)), codes.tobytes()]
+
+
+def pack(rows, schema: list[dict]) -> list[bytes]:
+    """
+    Кодирует записи в двоичный формат (список кусков файла). Столбцы и их
+    типы берутся из схемы таблицы, так что файл пустой таблицы тоже хранит
+    ее полную схему.
+    """
+    rows = sorted(rows, key=itemgetter("ID"))
+    names = [col["name"] for col in schema]
+    types = [col["type"] for col in schema]
+
+    schema = b"".join(
+        COLUMN.pack(TYPE_CODES[col_type], len(encoded)) + encoded
+        for col_type, encoded in zip(types, (name.encode("utf-8") for name in names))
+    )
+    chunks = [
+        HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDERS[sys.byteorder], 0,
+                    len(names), len(rows)),
+        schema,
+        _padding(HEADER.size + len(schema)),
+    ]
+    for name, col_type in zip(names, types):
+        try:
+            values = [row[name] for row in rows]
+            if col_type == "str" and not all(isinstance(v, str) for v in values):
+                raise TypeError(name)
+            column = _pack_column(col_type, values)
+        except (KeyError, TypeError, OverflowError):
+            raise ValueError(
+                f"Столбец {name}: значения записей не соответствуют типу {col_type}."
+            )
+        size = sum(len(chunk) for chunk in column)
+        chunks.extend(column)
+        chunks.append(_padding(size))
+    return chunks
+
+
+class _Reader:
+    """Последовательное чтение отображенного в память файла."""
+
+    def __init__(self, buffer, swap: bool = False):
+        self.buffer = buffer
+        self.pos = 0
+        self.swap = swap
+
+    def take(self, size: int):
+        if self.pos + size > len(self.buffer):
+            raise ValueError("файл обрезан")
+        chunk = self.buffer[self.pos:self.pos + size]
+        self.pos += size
+        return chunk
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        return fmt.unpack(self.take(fmt.size))
+
+    def align(self) -> None:
+        self.pos += -self.pos % 8
+
+    def ints(self, count: int) -> array:
+        values = array("q")
+        values.frombytes(self.take(8 * count))
+        if self.swap:
+            values.byteswap()
+        return values
+
+
+def _read_column(reader: _Reader, col_type: str, count: int):
+    reader.align()
+    if col_type == "int":
+        return reader.ints(count)
+    if col_type == "bool":
+        return bytearray(reader.take(count))
+
+    (size,) = reader.unpack(COUNT)
+    offsets = reader.ints(size + 1)
+    heap = reader.take(offsets[-1])
+    dictionary = [heap[start:end].decode("utf-8")
+                  for start, end in zip(offsets, offsets[1:])]
+    reader.align()
+    return reader.ints(count), dictionary
+
+
+def _read_header(buffer) -> tuple:
+    magic, version, order, _, column_count, count = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("неизвестный формат файла")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"неподдерживаемая версия формата {version}")
+
+    reader = _Reader(buffer, swap=order != BYTE_ORDERS[sys.byteorder])
+    reader.pos = HEADER.size
+    names, types = [], {}
+    for _ in range(column_count):
+        type_code, name_size = reader.unpack(COLUMN)
+        name = reader.take(name_size).decode("utf-8")
+        names.append(name)
+        types[name] = CODE_TYPES[type_code]
+    return reader, names, types, count
+
+
+def _read(buffer) -> tuple:
+    reader, names, types, count = _read_header(buffer)
+    columns = {name: _read_column(reader, types[name], count) for name in names}
+    return names, types, columns, count
+
+
+def _map_file(path: str, read):
+    with open(path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return read(buffer)
+        except (ValueError, KeyError, struct.error, UnicodeDecodeError) as e:
+            # mmap пустого файла - тоже ValueError
+            raise CorruptedDataError(f'Файл данных "{path}" поврежден: {e}')
+
+
+def read_columns(path: str) -> tuple:
+    """
+    Читает файл таблицы целиком. Возвращает (имена столбцов, {имя: тип},
+    {имя: данные столбца}, число записей). Данные столбца: int - array("q"),
+    bool - bytearray, str - (коды array("q"), словарь строк).
+    Отсутствующий файл - FileNotFoundError.
+    """
+    return _map_file(path, _read)
+
+
+def read_schema(path: str) -> list[dict]:
+    """Схема из заголовка файла, без чтения столбцов."""
+    _, names, types, _ = _map_file(path, _read_header)
+    return [{"name": name, "type": types[name]} for name in names]
+
+
+def column_values(col_type: str, data) -> list:
+    """Значения столбца в виде списка Python из данных read_columns."""
+    if col_type == "int":
+        return data.tolist()
+    if col_type == "bool":
+        return list(map(bool, data))
+    codes, dictionary = data
+    return list(map(dictionary.__getitem__, codes))
+
+
+def to_rows(names: list[str], types: dict, columns: dict) -> list[dict]:
+    """Собирает записи-словари из столбцов (результат read_columns)."""
+    values = [column_values(types[name], columns[name]) for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
@@ -0,0 +1,115 @@
+import threading
+from collections import OrderedDict
+
+from src.primitive_db.constants import CACHE_MAX_ENTRIES, CACHE_MAX_ROWS
+
+
+class QueryCache:
+    """
+    Кэш результатов SELECT с вытеснением давно не использованных записей (LRU).
+    Ключ - (имя_таблицы, условие). Размер ограничен числом запросов и
+    суммарным числом закэшированных строк. При любой записи в таблицу все
+    ее результаты сбрасываются через invalidate(). Методы можно вызывать
+    из нескольких потоков.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES,
+                 max_rows: int = CACHE_MAX_ROWS):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.RLock()
+
+    def __call__(self, key: tuple, value_func):
+        """Возвращает результат из кэша или вычисляет и запоминает его."""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        # Если нет - выполняем "тяжелую" функцию
+        result = value_func()
+        # Ошибки (None) и слишком большие результаты не кэшируем
+        if result is not None and len(result) <= self.max_rows:
+            self._put(key, result)
+        return result
+
+    def get(self, key: tuple) -> list | None:
+        """Возвращает закэшированный результат или None (с учетом статистики)."""
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def collect(self, key: tuple, rows):
+        """
+        Пропускает поток записей насквозь и, если он был прочитан до конца и
+        уместился в max_rows, кэширует его. Буфер не растет больше max_rows.
+        """
+        buffer = []
+        for row in rows:
+            if buffer is not None:
+                buffer.append(row)
+                if len(buffer) > self.max_rows:
+                    buffer = None
+            yield row
+        if buffer is not None:
+            self._put(key, buffer)
+
+    def _put(self, key: tuple, result: list) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._by_table.setdefault(key[0], set()).add(key)
+            self._rows += len(result)
+
+            while (len(self._entries) > self.max_entries
+                   or self._rows > self.max_rows):
+                # Первым в OrderedDict лежит самый давно использованный результат
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: tuple) -> None:
+        self._rows -= len(self._entries.pop(key))
+        keys = self._by_table[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._by_table[key[0]]
+
+    def invalidate(self, table_name: str) -> None:
+        """Сбрасывает все закэшированные результаты по таблице."""
+        with self._lock:
+            keys = self._by_table.pop(table_name, set())
+            for key in keys:
+                result = self._entries.pop(key)
+                self._rows -= len(result)
+            if keys:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._rows = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "rows": self._rows,
+                "max_entries": self.max_entries,
+                "max_rows": self.max_rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
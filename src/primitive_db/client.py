@@ -0,0 +1,111 @@
+"""
+Клиент сервера базы данных (project serve) с пулом соединений.
+
+    pool = ConnectionPool(port=7437)
+    print(pool.execute("select from users where age > 18 limit 10"))
+    pool.close()
+
+Пул потокобезопасен: каждый поток берет свободное соединение (или
+открывает новое, пока их меньше size) и возвращает его после ответа.
+"""
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+
+from src.primitive_db.constants import CLIENT_POOL_SIZE, SERVER_HOST, SERVER_PORT
+
+
+class Connection:
+    """Одно соединение с сервером: команда - ответ."""
+
+    def __init__(self, host: str = SERVER_HOST, port: int = SERVER_PORT,
+                 unix_path: str | None = None, timeout: float | None = None):
+        if unix_path:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(unix_path)
+        else:
+            self._sock = socket.create_connection((host, port), timeout)
+        self._file = self._sock.makefile("rb")
+
+    def execute(self, command: str) -> str:
+        """Отправляет команду и возвращает ее вывод."""
+        line = " ".join(command.splitlines()).strip()
+        self._sock.sendall(line.encode("utf-8") + b"\n")
+        header = self._file.readline()
+        status, _, size = header.decode("ascii").partition(" ")
+        if status != "OK" or not size.strip().isdigit():
+            raise ConnectionError("Сервер закрыл соединение или ответил не по "
+                                  "протоколу.")
+        data = self._file.read(int(size))
+        if len(data) != int(size):
+            raise ConnectionError("Сервер закрыл соединение посреди ответа.")
+        return data.decode("utf-8")
+
+    def close(self) -> None:
+        try:
+            self._file.close()
+        finally:
+            self._sock.close()
+
+    def __enter__(self) -> "Connection":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class ConnectionPool:
+    """Пул из не более чем size соединений с сервером."""
+
+    def __init__(self, host: str = SERVER_HOST, port: int = SERVER_PORT,
+                 unix_path: str | None = None, size: int = CLIENT_POOL_SIZE,
+                 timeout: float | None = None):
+        self._connect_args = (host, port, unix_path, timeout)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    @contextmanager
+    def connection(self):
+        """Соединение из пула на время блока with."""
+        if self._closed:
+            raise ConnectionError("Пул соединений закрыт.")
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = Connection(*self._connect_args)
+            try:
+                yield conn
+            except BaseException:
+                # Состояние соединения неизвестно (ответ мог не дочитаться)
+                conn.close()
+                raise
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def execute(self, command: str) -> str:
+        with self.connection() as conn:
+            return conn.execute(command)
+
+    def close(self) -> None:
+        """Закрывает свободные соединения; занятые закроются при возврате."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
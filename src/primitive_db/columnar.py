@@ -0,0 +1,260 @@
+import bisect
+import itertools
+from array import array
+
+
+class IntColumn:
+    """Целые числа в компактном массиве array('q') - 8 байт на значение."""
+
+    def __init__(self):
+        self.values = array("q")
+
+    def append(self, value) -> None:
+        self.values.append(value)
+
+    def get(self, pos: int):
+        return self.values[pos]
+
+    def set(self, pos: int, value) -> None:
+        self.values[pos] = value
+
+    def load(self, values: array) -> None:
+        self.values = values
+
+    def slice(self, start: int, stop: int):
+        return self.values[start:stop]
+
+    def match(self, value):
+        """Побитовая маска совпадений по всему столбцу (цикл идет внутри C)."""
+        return map(value.__eq__, self.values)
+
+
+class BoolColumn:
+    """Булевы значения в bytearray - 1 байт на значение."""
+
+    def __init__(self):
+        self.values = bytearray()
+
+    def append(self, value) -> None:
+        self.values.append(1 if value else 0)
+
+    def get(self, pos: int):
+        return bool(self.values[pos])
+
+    def set(self, pos: int, value) -> None:
+        self.values[pos] = 1 if value else 0
+
+    def load(self, values: bytearray) -> None:
+        self.values = values
+
+    def slice(self, start: int, stop: int) -> list:
+        return list(map(bool, self.values[start:stop]))
+
+    def match(self, value):
+        return map((1 if value else 0).__eq__, self.values)
+
+
+class StrColumn:
+    """
+    Строки со словарным кодированием: каждая уникальная строка хранится
+    один раз, а в столбце лежат ее коды в array('q').
+    """
+
+    def __init__(self):
+        self.codes = array("q")
+        self.dictionary = []
+        self._code_of = {}
+
+    def _encode(self, value: str) -> int:
+        code = self._code_of.get(value)
+        if code is None:
+            code = len(self.dictionary)
+            self._code_of[value] = code
+            self.dictionary.append(value)
+        return code
+
+    def append(self, value) -> None:
+        self.codes.append(self._encode(value))
+
+    def get(self, pos: int):
+        return self.dictionary[self.codes[pos]]
+
+    def set(self, pos: int, value) -> None:
+        self.codes[pos] = self._encode(value)
+
+    def load(self, data: tuple) -> None:
+        """Принимает готовые (коды, словарь) - например, из двоичного файла."""
+        self.codes, self.dictionary = data
+        self._code_of = {value: code for code, value in enumerate(self.dictionary)}
+
+    def slice(self, start: int, stop: int) -> list:
+        return list(map(self.dictionary.__getitem__, self.codes[start:stop]))
+
+    def match(self, value):
+        code = self._code_of.get(value)
+        if code is None:
+            # Такой строки в столбце нет вообще
+            return itertools.repeat(False, len(self.codes))
+        return map(code.__eq__, self.codes)
+
+
+COLUMN_CLASSES = {
+    "int": IntColumn,
+    "bool": BoolColumn,
+    "str": StrColumn,
+}
+
+
+class ColumnarTable:
+    """
+    Колоночное представление таблицы в памяти, построенное по схеме из
+    метаданных: каждый столбец хранится отдельным типизированным массивом.
+    Удаленные записи помечаются в маске живых строк и вычищаются при vacuum.
+    ID выдаются последовательностью по возрастанию, поэтому позиция записи
+    по ID находится двоичным поиском по столбцу ID без отдельного словаря.
+    Снаружи ведет себя как список записей: len(), итерация, append, extend.
+    """
+
+    def __init__(self, schema: list[dict]):
+        self.names = [col["name"] for col in schema]
+        self.types = {col["name"]: col["type"] for col in schema}
+        self._columns = {
+            col["name"]: COLUMN_CLASSES[col["type"]]() for col in schema
+        }
+        self._live = bytearray()
+        self._live_count = 0
+
+    @classmethod
+    def from_rows(cls, schema: list[dict], rows) -> "ColumnarTable":
+        table = cls(schema)
+        table.extend(sorted(rows, key=lambda row: row["ID"]))
+        return table
+
+    @classmethod
+    def from_columns(cls, schema: list[dict], columns: dict,
+                     count: int) -> "ColumnarTable":
+        """
+        Собирает таблицу из готовых данных столбцов (binary_format.read_columns)
+        без создания записей-словарей. Записи должны идти по возрастанию ID.
+        """
+        table = cls(schema)
+        for name, column in table._columns.items():
+            column.load(columns[name])
+        table._live = bytearray(b"\x01") * count
+        table._live_count = count
+        return table
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def _position(self, row_id: int) -> int | None:
+        """Позиция живой записи с данным ID или None."""
+        ids = self._columns["ID"].values
+        pos = bisect.bisect_left(ids, row_id)
+        if pos < len(ids) and ids[pos] == row_id and self._live[pos]:
+            return pos
+        return None
+
+    def __iter__(self):
+        for pos in itertools.compress(range(len(self._live)), self._live):
+            yield self._row(pos)
+
+    def __reversed__(self):
+        for pos in range(len(self._live) - 1, -1, -1):
+            if self._live[pos]:
+                yield self._row(pos)
+
+    def _row(self, pos: int) -> dict:
+        return {name: self._columns[name].get(pos) for name in self.names}
+
+    def row_at(self, pos: int) -> dict:
+        """Запись по позиции в столбцах (с учетом удаленных позиций)."""
+        return self._row(pos)
+
+    def physical_size(self) -> int:
+        """Число позиций в столбцах, включая удаленные записи."""
+        return len(self._live)
+
+    def column_slices(self, names: list[str], start: int, stop: int) -> tuple:
+        """
+        Значения столбцов names на позициях [start, stop) и маска живых
+        записей этих позиций - кусок таблицы для параллельного перебора.
+        """
+        columns = {name: self._columns[name].slice(start, stop) for name in names}
+        return columns, self._live[start:stop]
+
+    def append(self, row: dict) -> None:
+        ids = self._columns["ID"].values
+        if ids and row["ID"] <= ids[-1]:
+            raise ValueError(f"ID {row['ID']} нарушает порядок возрастания.")
+        for name in self.names:
+            self._columns[name].append(row[name])
+        self._live.append(1)
+        self._live_count += 1
+
+    def extend(self, rows) -> None:
+        for row in rows:
+            self.append(row)
+
+    def get(self, row_id: int) -> dict | None:
+        pos = self._position(row_id)
+        return None if pos is None else self._row(pos)
+
+    def find_positions(self, where: dict) -> list[int]:
+        """
+        Находит позиции живых записей, у которых все столбцы равны значениям
+        из where (значения уже приведены к типам столбцов). Первое условие
+        проверяется по всему столбцу сразу, остальные - только на кандидатах.
+        """
+        if any(col not in self._columns for col in where):
+            return []
+
+        conditions = list(where.items())
+        if "ID" in where:
+            pos = self._position(where["ID"])
+            candidates = [] if pos is None else [pos]
+        else:
+            col, value = conditions.pop(0)
+            mask = self._columns[col].match(value)
+            candidates = [
+                pos for pos in itertools.compress(range(len(self._live)), mask)
+                if self._live[pos]
+            ]
+
+        for col, value in conditions:
+            column = self._columns[col]
+            candidates = [pos for pos in candidates if column.get(pos) == value]
+        return candidates
+
+    def select(self, where: dict):
+        """Генератор записей (словарей), подходящих под условие."""
+        for pos in self.find_positions(where):
+            yield self._row(pos)
+
+    def update_rows(self, row_ids, new_values: dict) -> list[dict]:
+        """Записывает новые значения столбцов в записи с указанными ID."""
+        updated = []
+        for row_id in row_ids:
+            pos = self._position(row_id)
+            for col, value in new_values.items():
+                self._columns[col].set(pos, value)
+            updated.append(self._row(pos))
+        return updated
+
+    def remove_ids(self, row_ids) -> None:
+        for row_id in row_ids:
+            pos = self._position(row_id)
+            if pos is not None:
+                self._live[pos] = 0
+                self._live_count -= 1
+        # Когда мертвых позиций становится больше живых - пересобираем столбцы
+        if len(self._live) > 2 * self._live_count:
+            self.vacuum()
+
+    def vacuum(self) -> None:
+        """Пересобирает столбцы без удаленных записей."""
+        fresh = ColumnarTable(
+            [{"name": name, "type": self.types[name]} for name in self.names]
+        )
+        fresh.extend(self)
+        self.__dict__.update(fresh.__dict__)
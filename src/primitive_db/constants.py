@@ -1,2 +1,92 @@
 DB_FILE = "db_meta.json"
-SUPPORTED_TYPES = {"int", "str", "bool"}
\ No newline at end of file
+DATA_DIR = "data"
+SUPPORTED_TYPES = {"int", "str", "bool"}
+
+# Формат хранения данных таблиц: "jsonl" (журнал строк) или "json" (один файл)
+STORAGE_BACKEND = "jsonl"
+# Журнал сжимается, когда мертвых записей больше, чем живых, в указанное число раз
+COMPACTION_RATIO = 2
+COMPACTION_MIN_RECORDS = 1000
+
+# Интервал (в секундах) автоматической записи изменений сессии на диск.
+# 0 - записывать после каждой команды
+FLUSH_INTERVAL = 0
+
+# Ограничения кэша результатов SELECT: число запросов и суммарное число строк
+CACHE_MAX_ENTRIES = 128
+CACHE_MAX_ROWS = 100_000
+
+# Размер пачки при массовой вставке и импорте: записи из пачки
+# валидируются вместе и сохраняются на диск одной операцией
+IMPORT_BATCH_SIZE = 10_000
+
+# Число строк на одной странице табличного вывода SELECT
+PAGE_SIZE = 50
+OUTPUT_FORMATS = {"table", "tsv", "jsonl"}
+
+# Представление таблиц в памяти: "rows" (список словарей) или
+# "columns" (типизированные столбцы, меньше памяти и быстрее сканирование)
+TABLE_LAYOUT = "rows"
+
+# Журнал упреждающей записи (WAL) и политика fsync:
+# "always" - fsync после каждого commit, "batch" - раз в WAL_BATCH_SIZE
+# commit'ов и на контрольной точке, "off" - без fsync (решает ОС)
+WAL_FILE = "db_wal.log"
+FSYNC_MODE = "batch"
+FSYNC_MODES = {"always", "batch", "off"}
+WAL_BATCH_SIZE = 32
+# Размер WAL, после которого делается контрольная точка и журнал очищается
+WAL_CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+# Совместный доступ нескольких процессов к одной базе. Файл версии хранит
+# номер последнего зафиксированного commit; блокировки (fcntl.flock):
+# LOCK_FILE - разделяемая для чтения и исключительная на время записи на
+# диск, WRITE_LOCK_FILE - одна пишущая сессия в каждый момент времени
+VERSION_FILE = "db_version"
+LOCK_FILE = "db.lock"
+WRITE_LOCK_FILE = "db_write.lock"
+
+# Параллельный перебор таблиц по WHERE в пуле процессов. Таблицы меньше
+# PARALLEL_SCAN_ROWS записей перебираются в одном процессе (0 - всегда).
+# PARALLEL_WORKERS - число процессов (0 - по числу доступных ядер),
+# на каждый процесс приходится PARALLEL_CHUNKS_PER_WORKER кусков таблицы
+PARALLEL_SCAN_ROWS = 500_000
+PARALLEL_WORKERS = 0
+PARALLEL_CHUNKS_PER_WORKER = 4
+# Сколько строчных таблиц держат колоночный снимок для параллельного перебора
+PARALLEL_SNAPSHOT_TABLES = 4
+
+# Статистика для планировщика: число различных значений столбцов
+# пересчитывается, когда с прошлого пересчета изменилось больше
+# ANALYZE_MIN_CHANGES + ANALYZE_RATIO * (число записей) записей или
+# таблица выросла больше чем в ANALYZE_GROWTH раз
+ANALYZE_RATIO = 0.2
+ANALYZE_MIN_CHANGES = 500
+ANALYZE_GROWTH = 2
+
+# Стоимости планировщика в условных единицах (1 - проверка одной записи
+# при полном переборе): запись из индекса (произвольный доступ к записям,
+# по замерам в 5-10 раз дороже перебора подряд), проверка значения столбца
+# колоночной таблицы, запуск параллельного перебора и передача записи в
+# процесс пула, запись при построении хеш-таблицы соединения и при
+# сортировке (умножается на log2 числа сортируемых записей)
+PLAN_INDEX_ROW_COST = 8.0
+PLAN_COLUMN_FILTER_COST = 0.1
+PLAN_PARALLEL_STARTUP_COST = 50_000
+PLAN_PARALLEL_ROW_COST = 0.3
+PLAN_HASH_BUILD_COST = 2.0
+PLAN_SORT_ROW_COST = 0.1
+
+# Секционирование range(<столбец>): число значений ключа в одной секции
+# (если в create_table не указан size)
+PARTITION_RANGE_SIZE = 100_000
+
+# Сетевой сервер (project serve): адрес по умолчанию, число потоков для
+# параллельного чтения и задержка групповой фиксации - изменения всех
+# клиентов за это время сохраняются на диск одним commit
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 7437
+SERVER_READ_WORKERS = 4
+SERVER_COMMIT_DELAY = 0.005
+# Число соединений в пуле клиента (client.ConnectionPool)
+CLIENT_POOL_SIZE = 4
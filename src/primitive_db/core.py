@@ -1,180 +1,789 @@
-from src.primitive_db.constants import SUPPORTED_TYPES
-from src.primitive_db.decorators import confirm_action, handle_db_errors, log_time
+from src.primitive_db import (
+    aggregates,
+    ordering,
+    parallel,
+    partitions,
+    planner,
+    predicates,
+    table_stats,
+)
+from src.primitive_db import indexes as idx
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.constants import PARTITION_RANGE_SIZE, SUPPORTED_TYPES
+from src.primitive_db.decorators import confirm_action, handle_db_errors, measure
+from src.primitive_db.exceptions import (
+    RecordNotFoundError,
+    TableExistsError,
+    TableNotFoundError,
+    ValidationError,
+)
 
 
 @handle_db_errors
-def create_table(metadata: dict, table_name: str, args: list) -> dict:
+@measure("execute")
+def create_table(metadata: dict, table_name: str, args: list,
+                 partition: dict | None = None) -> dict:
     """
     Создает новую таблицу в метаданных.
     args: список строк вида ['col1:type', 'col2:type']
+    partition: схема секционирования (parser.parse_partition) или None.
     """
     if table_name in metadata:
-        raise ValueError(f'Таблица "{table_name}" уже существует.')
+        raise TableExistsError(f'Таблица "{table_name}" уже существует.')
+    if "." in table_name:
+        # Точка отделяет таблицу от столбца в соединениях и секцию от
+        # таблицы в именах файлов
+        raise ValidationError("Имя таблицы не может содержать точку.")
 
     columns = [{"name": "ID", "type": "int"}]  # ID добавляем всегда первым
 
     for arg in args:
         if ":" not in arg:
-            raise ValueError(f"Некорректный формат столбца: {arg}. "
+            raise ValidationError(f"Некорректный формат столбца: {arg}. "
                              f"Ожидается 'имя:тип'.")
 
         col_name, col_type = arg.split(":", 1)
 
         if col_type not in SUPPORTED_TYPES:
-            raise ValueError(
+            raise ValidationError(
                 f"Неизвестный тип данных: {col_type}. "
                 f"Допустимые: {', '.join(SUPPORTED_TYPES)}"
             )
 
         columns.append({"name": col_name, "type": col_type})
 
-    metadata[table_name] = columns
+    table_meta = {
+        "columns": columns,
+        "indexes": {},
+        "sequence": 0,
+        "stats": table_stats.compute(columns, [], partition is not None),
+    }
+    if partition is not None:
+        table_meta["partition"] = _partition_scheme(columns, partition)
+    metadata[table_name] = table_meta
     return metadata
 
 
+def _partition_scheme(columns: list[dict], spec: dict) -> dict:
+    """Проверяет схему секционирования и дополняет ее для метаданных."""
+    col_types = {col["name"]: col["type"] for col in columns}
+    method, column = spec["method"], spec["column"]
+    if method not in partitions.PARTITION_METHODS:
+        raise ValidationError(
+            f"Неизвестный способ секционирования: {method}. "
+            f"Допустимые: {', '.join(sorted(partitions.PARTITION_METHODS))}"
+        )
+    if column not in col_types:
+        raise ValidationError(f"Столбец {column} не существует.")
+
+    if method == "hash":
+        if "count" not in spec:
+            raise ValidationError("Укажите число секций: hash(<столбец>) into <n>.")
+        if spec["count"] < 1:
+            raise ValidationError("Число секций должно быть положительным.")
+        return {"method": method, "column": column, "count": spec["count"]}
+
+    if col_types[column] != "int":
+        raise ValidationError("Секционировать по range можно только int-столбец.")
+    if "count" in spec:
+        raise ValidationError(
+            "Для range задается размер секции: range(<столбец>) size <n>."
+        )
+    size = spec.get("size", PARTITION_RANGE_SIZE)
+    if size < 1:
+        raise ValidationError("Размер секции должен быть положительным.")
+    return {"method": method, "column": column, "size": size, "parts": []}
+
+
 @handle_db_errors
 @confirm_action("удаление таблицы")
+@measure("execute")
 def drop_table(metadata: dict, table_name: str) -> dict:
     """Удаляет таблицу из метаданных."""
     if table_name not in metadata:
-        raise ValueError(f'Таблица "{table_name}" не существует.')
+        raise TableNotFoundError(f'Таблица "{table_name}" не существует.')
 
     del metadata[table_name]
     return metadata
 
 
+@handle_db_errors
+@measure("execute")
+def create_index(metadata: dict, table_name: str, column: str,
+                 kind: str = "hash") -> dict:
+    """
+    Регистрирует индекс по столбцу в метаданных.
+    kind: "hash" (поиск по равенству) или "sorted" (равенство и диапазоны).
+    """
+    if table_name not in metadata:
+        raise TableNotFoundError(f'Таблица "{table_name}" не существует.')
+    if kind not in idx.INDEX_KINDS:
+        raise ValidationError(
+            f"Неизвестный тип индекса: {kind}. "
+            f"Допустимые: {', '.join(sorted(idx.INDEX_KINDS))}"
+        )
+
+    col_names = [col["name"] for col in metadata[table_name]["columns"]]
+    if column not in col_names:
+        raise ValidationError(f"Столбец {column} не существует.")
+    if "partition" in metadata[table_name]:
+        # Индекс строится по всей таблице в памяти, а секции читаются
+        # по отдельности - индекс загружал бы все секции при каждом запросе
+        raise ValidationError(
+            "Индексы для секционированных таблиц не поддерживаются: условие "
+            "на ключ секционирования и так ограничивает чтение его секциями."
+        )
+
+    table_indexes = metadata[table_name].setdefault("indexes", {})
+    if column in table_indexes:
+        raise ValidationError(f'Индекс по столбцу "{column}" уже существует.')
+
+    table_indexes[column] = kind
+    return metadata
+
+
+@handle_db_errors
+@measure("execute")
+def drop_index(metadata: dict, table_name: str, column: str) -> dict:
+    """Удаляет описание индекса из метаданных."""
+    if table_name not in metadata:
+        raise TableNotFoundError(f'Таблица "{table_name}" не существует.')
+    if column not in metadata[table_name].get("indexes", {}):
+        raise ValidationError(f'Индекса по столбцу "{column}" нет.')
+
+    del metadata[table_name]["indexes"][column]
+    return metadata
+
+
 def get_table_schema_str(metadata: dict, table_name: str) -> str:
     """Вспомогательная функция для красивого вывода структуры при создании."""
-    columns = metadata[table_name]
+    columns = metadata[table_name]["columns"]
     # Преобразуем список словарей обратно в строку вида "ID:int, name:str"
     return ", ".join([f"{col['name']}:{col['type']}" for col in columns])
 
 
 def _cast_type(value: str, target_type: str):
     """Преобразует строковое значение в нужный тип."""
+    if value is None:
+        raise ValidationError(f"Не задано значение типа {target_type}.")
     try:
         if target_type == "int":
             return int(value)
         elif target_type == "bool":
-            return value.lower() == "true"
+            if isinstance(value, bool):
+                return value
+            return str(value).lower() == "true"
         elif target_type == "str":
             return str(value)
-    except ValueError:
-        raise ValueError(f"Невозможно преобразовать '{value}' в тип {target_type}")
+    except (ValueError, TypeError):
+        raise ValidationError(
+            f"Невозможно преобразовать '{value}' в тип {target_type}"
+        )
     return value
 
 
-@handle_db_errors
-@log_time
-def insert(metadata: dict, table_name: str, table_data: list, values: list) -> dict:
-    if table_name not in metadata:
-        raise ValueError(f"Таблица {table_name} не существует.")
+def _col_types(table_data, schema: list | None) -> dict:
+    """Типы столбцов из схемы таблицы (колоночная таблица знает их сама)."""
+    if schema is not None:
+        return {col["name"]: col["type"] for col in schema}
+    if isinstance(table_data, ColumnarTable):
+        return dict(table_data.types)
+    raise ValidationError("Для условия WHERE нужна схема таблицы.")
 
-    schema = metadata[table_name]
-    # Схема содержит ID первым элементом. Значения пользователя не содержат ID.
-    expected_cols = schema[1:]
 
+def _compile(table_data, where_clause, schema: list | None) -> tuple:
+    """Условие, типы столбцов и скомпилированный предикат (или None)."""
+    node = predicates.normalize(where_clause)
+    if node is None:
+        return None, {}, None
+    col_types = _col_types(table_data, schema)
+    return node, col_types, predicates.compile_predicate(node, col_types,
+                                                         _cast_type)
+
+
+def _partitions(table_data, node: tuple | None, col_types: dict) -> tuple:
+    """
+    Для секционированной таблицы - записи только тех секций, где могут быть
+    записи под условие node (остальные секции не читаются с диска), и
+    пометка для плана. Для обычной таблицы - она сама и None.
+    """
+    if not isinstance(table_data, partitions.PartitionedTable):
+        return table_data, None
+    selected = partitions.prune(table_data.scheme, node, col_types, _cast_type)
+    total = len(table_data.numbers())
+    count = total if selected is None else len(selected)
+    return table_data.view(selected), f"секций: {count} из {total}"
+
+
+def _scan(table_data, where_clause, indexes: dict | None = None,
+          schema: list | None = None, stats: dict | None = None,
+          plan: planner.PlanNode | None = None):
+    """
+    Компилирует условие WHERE в типизированный предикат (один раз, до
+    перебора записей) и возвращает генератор подходящих записей. Способ
+    чтения - полный перебор, параллельный перебор (parallel.py), кандидаты
+    из индекса или фильтр столбцов колоночной таблицы - выбирает по
+    статистике таблицы stats планировщик. У секционированной таблицы
+    читаются только секции, допускаемые условием. plan - узел плана
+    explain, к которому добавляется узел чтения. Ошибки в условии (нет
+    столбца, значение не приводится к типу) выбрасываются сразу, а не при
+    переборе.
+    """
+    node, col_types, predicate = _compile(table_data, where_clause, schema)
+    table_data, pruned = _partitions(table_data, node, col_types)
+    scan = planner.plan_scan(table_data, node, indexes, col_types, stats)
+    planner.note_partitions(scan, pruned)
+    if plan is not None:
+        plan.add(scan)
+    return _read(scan, table_data, node, indexes, col_types, predicate)
+
+
+def _read(scan: planner.PlanNode, table_data, node: tuple | None,
+          indexes: dict | None, col_types: dict, predicate):
+    """Записи, подходящие под условие, способом чтения из узла плана scan."""
+    return scan.run(_read_rows, scan, table_data, node, indexes, col_types,
+                    predicate)
+
+
+def _read_rows(scan, table_data, node, indexes, col_types, predicate):
+    if predicate is None:
+        return iter(table_data)
+    if scan.operation == planner.PARALLEL_SCAN:
+        return parallel.scan(table_data, node, col_types, _cast_type)
+    if scan.operation == planner.COLUMN_FILTER:
+        rows = table_data.select(
+            predicates.equality_conditions(node, col_types, _cast_type)
+        )
+    elif scan.operation in (planner.INDEX_LOOKUP, planner.INDEX_RANGE):
+        rows = predicates.part_candidates(scan.part, indexes[scan.column],
+                                          col_types[scan.column], _cast_type)
+    else:
+        rows = table_data
+    return filter(predicate, rows)
+
+
+def _find_rows(table_data: list, where_clause, indexes: dict | None = None,
+               schema: list | None = None, stats: dict | None = None) -> list:
+    """
+    Возвращает записи, подходящие под условие WHERE.
+    Если по одному из столбцов условия есть индекс, вместо полного перебора
+    могут браться только кандидаты из индекса.
+    """
+    return list(_scan(table_data, where_clause, indexes, schema, stats))
+
+
+def next_id(metadata: dict, table_name: str, table_data: list) -> int:
+    """
+    Возвращает следующий ID таблицы по последовательности из метаданных.
+    Для таблиц, созданных до появления последовательностей, она один раз
+    инициализируется максимальным существующим ID.
+    """
+    table_meta = metadata[table_name]
+    if "sequence" not in table_meta:
+        table_meta["sequence"] = max((row["ID"] for row in table_data), default=0)
+    return table_meta["sequence"] + 1
+
+
+def _build_row(expected_cols: list, values: list, new_id: int) -> dict:
+    """Проверяет количество значений и собирает типизированную запись."""
     if len(values) != len(expected_cols):
-        raise ValueError(
+        raise ValidationError(
             f"Ожидалось {len(expected_cols)} значений, получено {len(values)}. "
             f"Столбцы: {[c['name'] for c in expected_cols]}"
         )
 
-    new_row = {}
-
-    # Генерация ID
-    if not table_data:
-        new_id = 1
-    else:
-        new_id = max(row["ID"] for row in table_data) + 1
-    new_row["ID"] = new_id
-
+    new_row = {"ID": new_id}
     # Валидация и кастинг типов
     for col_def, val in zip(expected_cols, values):
-        col_name = col_def["name"]
-        col_type = col_def["type"]
-        new_row[col_name] = _cast_type(val, col_type)
+        new_row[col_def["name"]] = _cast_type(val, col_def["type"])
+    return new_row
+
+
+@handle_db_errors
+@measure("execute")
+def insert(metadata: dict, table_name: str, table_data: list, values: list,
+           indexes: dict | None = None) -> dict:
+    if table_name not in metadata:
+        raise TableNotFoundError(f"Таблица {table_name} не существует.")
+
+    schema = metadata[table_name]["columns"]
+    # Схема содержит ID первым элементом. Значения пользователя не содержат ID.
+    # ID берется из последовательности таблицы
+    new_row = _build_row(schema[1:], values,
+                         next_id(metadata, table_name, table_data))
 
+    # Сдвигаем последовательность только после успешной валидации
+    metadata[table_name]["sequence"] = new_row["ID"]
     table_data.append(new_row)
+    parallel.invalidate()
+    idx.add_row(indexes, new_row)
+    table_stats.add_rows(metadata[table_name], [new_row])
+    table_stats.maybe_analyze(metadata[table_name], table_data)
     return new_row
 
 
 @handle_db_errors
-@log_time
-def select(table_data: list, where_clause: dict = None) -> list:
+@measure("execute")
+def insert_many(metadata: dict, table_name: str, table_data: list,
+                rows_values: list[list], indexes: dict | None = None) -> list:
+    """
+    Вставляет пачку записей. Сначала валидируются все строки пачки - при
+    ошибке не вставляется ни одна. ID выделяются из последовательности
+    одним диапазоном. Возвращает список новых записей.
+    """
+    if table_name not in metadata:
+        raise TableNotFoundError(f"Таблица {table_name} не существует.")
+
+    expected_cols = metadata[table_name]["columns"][1:]
+    first_id = next_id(metadata, table_name, table_data)
+
+    new_rows = []
+    for offset, values in enumerate(rows_values):
+        try:
+            new_rows.append(_build_row(expected_cols, values, first_id + offset))
+        except ValueError as e:
+            raise ValidationError(f"Строка {offset + 1}: {e}")
+
+    if new_rows:
+        metadata[table_name]["sequence"] = new_rows[-1]["ID"]
+        table_data.extend(new_rows)
+        parallel.invalidate()
+        idx.add_rows(indexes, new_rows)
+        table_stats.add_rows(metadata[table_name], new_rows)
+        table_stats.maybe_analyze(metadata[table_name], table_data)
+    return new_rows
+
+
+@handle_db_errors
+@measure("execute")
+def select(table_data: list, where_clause=None,
+           indexes: dict | None = None, schema: list | None = None,
+           stats: dict | None = None) -> list:
     if not where_clause:
         return table_data
 
-    result = []
-    for row in table_data:
-        match = True
-        for key, val in where_clause.items():
-            # Сравниваем как строки, чтобы не кастить типы обратно для поиска
-            if str(row.get(key)) != str(val):
-                match = False
-                break
-        if match:
-            result.append(row)
-    return result
+    return _find_rows(table_data, where_clause, indexes, schema, stats)
 
 
 @handle_db_errors
-@confirm_action("удаление записей")
-def delete(table_data: list, where_clause: dict) -> list:
-    if not where_clause:
-        raise ValueError("Для удаления необходимо указать условие WHERE.")
+@measure("execute")
+def iter_select(table_data: list, where_clause=None,
+                indexes: dict | None = None, schema: list | None = None,
+                stats: dict | None = None,
+                plan: planner.PlanNode | None = None):
+    """
+    Потоковый вариант select: возвращает итератор подходящих записей.
+    Записи отдаются по мере нахождения, без сборки полного списка.
+    """
+    return _scan(table_data, where_clause, indexes, schema, stats, plan)
+
+
+def _index_order(table_data, indexes: dict | None, order_by: list[tuple]):
+    """
+    Записи таблицы сразу в порядке ORDER BY, если его дает сама таблица
+    или индекс: по ID (записи хранятся по возрастанию ID) или по столбцу
+    с упорядоченным индексом. Иначе - None.
+    """
+    if len(order_by) != 1:
+        return None
+    col, descending = order_by[0]
+    if col == "ID":
+        return reversed(table_data) if descending else iter(table_data)
+    index = (indexes or {}).get(col)
+    if isinstance(index, idx.SortedIndex):
+        return index.ordered(descending)
+    return None
+
+
+def _sorted(rows, order_by: list[tuple], limit: int | None):
+    return iter(ordering.sort_rows(rows, order_by, limit))
+
+
+@handle_db_errors
+@measure("execute")
+def iter_select_ordered(table_data: list, where_clause, indexes: dict | None,
+                        schema: list, order_by: list[tuple],
+                        limit: int | None = None, stats: dict | None = None,
+                        plan: planner.PlanNode | None = None):
+    """
+    select с ORDER BY. limit - сколько первых записей результата нужно
+    (с учетом offset) или None. Планировщик выбирает: идти по записям в
+    порядке индекса с проверкой условия и читать только до limit-й, или
+    отфильтровать таблицу и отобрать первые limit записей кучей (top-K).
+    """
+    ordering.validate(order_by, [col["name"] for col in schema])
+    node, col_types, predicate = _compile(table_data, where_clause, schema)
+    table_data, pruned = _partitions(table_data, node, col_types)
+
+    order = planner.plan_order(table_data, node, indexes, col_types, stats,
+                               order_by, limit)
+    planner.note_partitions(
+        order if order.operation == planner.INDEX_ORDER else order.children[0],
+        pruned,
+    )
+    if plan is not None:
+        plan.add(order)
+    if order.operation == planner.INDEX_ORDER:
+        ordered = _index_order(table_data, indexes, order_by)
+        if predicate is None:
+            return order.run(iter, ordered)
+        return order.run(filter, predicate, ordered)
+
+    rows = _read(order.children[0], table_data, node, indexes, col_types,
+                 predicate)
+    return order.run(_sorted, rows, order_by, limit)
 
-    initial_len = len(table_data)
-    # Оставляем только те, которые НЕ совпадают с условием
-    new_data = []
-    for row in table_data:
-        match = True
-        for key, val in where_clause.items():
-            if str(row.get(key)) != str(val):
-                match = False
-                break
 
-        if not match:
-            new_data.append(row)
+@handle_db_errors
+@measure("execute")
+def order_rows(rows, columns: list[str], order_by: list[tuple],
+               limit: int | None = None, plan: planner.PlanNode | None = None):
+    """
+    Упорядочивает готовый поток записей (результат агрегации или
+    соединения) по столбцам результата columns. Возвращает итератор.
+    """
+    ordering.validate(order_by, columns)
+    sort = planner.sort_node(order_by, limit, planner.detach_last(plan))
+    if plan is not None:
+        plan.add(sort)
+    return sort.run(_sorted, rows, order_by, limit)
+
+
+@handle_db_errors
+@confirm_action("удаление записей")
+@measure("execute")
+def delete(metadata: dict, table_name: str, table_data: list, where_clause,
+           indexes: dict | None = None) -> list:
+    """
+    Удаляет из table_data записи, подходящие под условие.
+    Возвращает список удаленных записей.
+    """
+    if table_name not in metadata:
+        raise TableNotFoundError(f"Таблица {table_name} не существует.")
+    if not where_clause:
+        raise ValidationError(
+            "Для удаления необходимо указать условие WHERE."
+        )
 
-    if len(new_data) == initial_len:
-        raise ValueError("Записи по заданному условию не найдены.")
+    schema = metadata[table_name]["columns"]
+    deleted = _find_rows(table_data, where_clause, indexes, schema,
+                         metadata[table_name].get("stats"))
+    if not deleted:
+        raise RecordNotFoundError("Записи по заданному условию не найдены.")
 
-    return new_data
+    # Оставляем только те, которые НЕ совпадают с условием
+    deleted_ids = {row["ID"] for row in deleted}
+    if isinstance(table_data, ColumnarTable):
+        table_data.remove_ids(deleted_ids)
+    elif isinstance(table_data, partitions.PartitionedTable):
+        table_data.remove_rows(deleted)
+    else:
+        table_data[:] = [row for row in table_data if row["ID"] not in deleted_ids]
+    parallel.invalidate()
+    idx.remove_rows(indexes, deleted)
+    table_stats.remove_rows(metadata[table_name], deleted, table_data)
+    table_stats.maybe_analyze(metadata[table_name], table_data)
+    return deleted
 
 
 @handle_db_errors
+@measure("execute")
 def update(metadata: dict, table_name: str, table_data: list,
-           set_clause: dict, where_clause: dict) -> list:
+           set_clause: dict, where_clause,
+           indexes: dict | None = None) -> list:
+    """
+    Изменяет подходящие под условие записи на месте.
+    Возвращает список обновленных записей.
+    """
     if not where_clause:
-        raise ValueError("Для обновления необходимо указать условие WHERE.")
+        raise ValidationError(
+            "Для обновления необходимо указать условие WHERE."
+        )
     if not set_clause:
-        raise ValueError("Не указаны данные для обновления (SET ...).")
+        raise ValidationError("Не указаны данные для обновления (SET ...).")
 
-    schema = metadata[table_name]
+    schema = metadata[table_name]["columns"]
     col_types = {col["name"]: col["type"] for col in schema}
 
-    updated_count = 0
-    for row in table_data:
-        # Проверяем условие WHERE
-        match = True
-        for k, v in where_clause.items():
-            if str(row.get(k)) != str(v):
-                match = False
-                break
-
-        if match:
-            # Применяем обновления
-            for col, val in set_clause.items():
-                if col not in col_types:
-                    raise ValueError(f"Столбец {col} не существует.")
-                if col == "ID":
-                    raise ValueError("Нельзя изменять ID.")
-
-                row[col] = _cast_type(val, col_types[col])
-            updated_count += 1
-
-    if updated_count == 0:
-        raise ValueError("Записи для обновления не найдены.")
-
-    return table_data
\ No newline at end of file
+    # Проверяем и приводим новые значения один раз до изменения записей
+    new_values = {}
+    for col, val in set_clause.items():
+        if col not in col_types:
+            raise ValidationError(f"Столбец {col} не существует.")
+        if col == "ID":
+            raise ValidationError("Нельзя изменять ID.")
+        if col == metadata[table_name].get("partition", {}).get("column"):
+            # Запись пришлось бы переносить в другую секцию
+            raise ValidationError(
+                f"Нельзя изменять столбец секционирования {col}."
+            )
+        new_values[col] = _cast_type(val, col_types[col])
+
+    updated = _find_rows(table_data, where_clause, indexes, schema,
+                         metadata[table_name].get("stats"))
+    if not updated:
+        raise RecordNotFoundError("Записи для обновления не найдены.")
+
+    # Прежние значения нужны статистике: ушедший min/max придется пересчитать
+    old_values = {col: {row[col] for row in updated} for col in new_values}
+
+    if isinstance(table_data, ColumnarTable):
+        # Записи колоночной таблицы - копии, меняем значения в самих столбцах
+        updated = table_data.update_rows([row["ID"] for row in updated],
+                                         new_values)
+    else:
+        # Индексы по изменяемым столбцам нужно перестроить для этих записей
+        # (пачкой: упорядоченный индекс пересортировывается один раз)
+        touched = {c: i for c, i in (indexes or {}).items() if c in new_values}
+        idx.remove_rows(touched, updated)
+        for row in updated:
+            row.update(new_values)
+        idx.add_rows(touched, updated)
+
+    parallel.invalidate()
+    for col, value in new_values.items():
+        table_stats.update_column(metadata[table_name], col, old_values[col],
+                                  value, table_data, updated)
+    table_stats.count_updated(metadata[table_name], len(updated))
+    table_stats.maybe_analyze(metadata[table_name], table_data)
+    return updated
+
+
+def aggregate_from_stats(metadata: dict, table_name: str, items: list,
+                         group_by: list, where_clause=None) -> dict | None:
+    """
+    Отвечает на запрос count(*), min/max по int-столбцам всей таблицы из
+    статистики в метаданных, не читая таблицу. Если запрос так посчитать
+    нельзя (есть WHERE, GROUP BY или другие агрегаты) - возвращает None.
+    """
+    if where_clause or group_by or table_name not in metadata:
+        return None
+    table_meta = metadata[table_name]
+    col_types = {col["name"]: col["type"] for col in table_meta["columns"]}
+    try:
+        aggregates.validate(items, group_by, col_types)
+    except ValidationError:
+        # Ошибку сообщит полный путь aggregate()
+        return None
+    return aggregates.from_stats(table_meta.get("stats"), items)
+
+
+@handle_db_errors
+@measure("execute")
+def aggregate(metadata: dict, table_name: str, table_data: list, items: list,
+              group_by: list, where_clause=None, indexes: dict | None = None,
+              plan: planner.PlanNode | None = None) -> list:
+    """
+    Считает агрегаты (count, sum, min, max, avg) по записям, подходящим под
+    условие, с группировкой по столбцам group_by. Записи перебираются
+    потоково за один проход, в памяти - только состояния групп.
+    Возвращает список строк результата.
+    """
+    if table_name not in metadata:
+        raise TableNotFoundError(f"Таблица {table_name} не существует.")
+
+    schema = metadata[table_name]["columns"]
+    aggregates.validate(items, group_by,
+                        {col["name"]: col["type"] for col in schema})
+    stats = metadata[table_name].get("stats")
+    node = planner.PlanNode(planner.HASH_AGGREGATE, ", ".join(group_by))
+    if plan is not None:
+        plan.add(node)
+    rows = _scan(table_data, where_clause, indexes, schema, stats, node)
+    planner.estimate_aggregate(node, group_by, stats)
+    return list(node.run(aggregates.aggregate, rows, items, group_by))
+
+
+@handle_db_errors
+@measure("execute")
+def aggregate_rows(rows, schema: list[dict], items: list, group_by: list,
+                   plan: planner.PlanNode | None = None) -> list:
+    """
+    Агрегация произвольного потока записей со схемой schema (например,
+    результата соединения). Возвращает список строк результата.
+    """
+    aggregates.validate(items, group_by,
+                        {col["name"]: col["type"] for col in schema})
+    node = planner.PlanNode(planner.HASH_AGGREGATE, ", ".join(group_by))
+    source = planner.detach_last(plan)
+    if source is not None:
+        node.children.append(source)
+    planner.estimate_aggregate(node, group_by, None)
+    if plan is not None:
+        plan.add(node)
+    return list(node.run(aggregates.aggregate, rows, items, group_by))
+
+
+def join_columns(metadata: dict, join: dict) -> list[dict]:
+    """Схема результата соединения: столбцы обеих таблиц как "таблица.столбец"."""
+    return [
+        {"name": f"{table}.{col['name']}", "type": col["type"]}
+        for table in (join["left"], join["right"])
+        for col in metadata[table]["columns"]
+    ]
+
+
+def join_qualifier(schema: list[dict]):
+    """
+    Функция, приводящая столбец условия к виду "таблица.столбец".
+    Столбец без таблицы допустим, если он есть только в одной из таблиц.
+    """
+    names = {col["name"] for col in schema}
+    owners = {}
+    for name in names:
+        owners.setdefault(name.split(".", 1)[1], []).append(name)
+
+    def qualify(col: str) -> str:
+        if col in names:
+            return col
+        candidates = owners.get(col, [])
+        if len(candidates) > 1:
+            raise ValidationError(
+                f"Столбец {col} есть в обеих таблицах, укажите таблицу: "
+                f"{' или '.join(sorted(candidates))}."
+            )
+        if not candidates:
+            raise ValidationError(f"Столбец {col} не существует.")
+        return candidates[0]
+
+    return qualify
+
+
+def _combine(left: str, left_row: dict, right: str, right_row: dict) -> dict:
+    joined = {f"{left}.{col}": value for col, value in left_row.items()}
+    joined.update((f"{right}.{col}", value) for col, value in right_row.items())
+    return joined
+
+
+def _hash_join(build_rows, build_col: str, probe_rows, probe_col: str,
+               combine, residual):
+    """Строит хеш-таблицу по build_rows и потоково проверяет probe_rows."""
+    table = {}
+    for row in build_rows:
+        key = row[build_col]
+        if key is not None:
+            table.setdefault(key, []).append(row)
+
+    for probe in probe_rows:
+        for build in table.get(probe[probe_col], ()):
+            joined = combine(build, probe)
+            if residual is None or residual(joined):
+                yield joined
+
+
+def _index_join(outer_rows, outer_col: str, index, inner_filter,
+                combine, residual):
+    """Соединение через готовый индекс: хеш-таблицу строить не нужно."""
+    for outer in outer_rows:
+        key = outer[outer_col]
+        if key is None:
+            continue
+        for inner in index.lookup(key):
+            if inner_filter is not None and not inner_filter(inner):
+                continue
+            joined = combine(outer, inner)
+            if residual is None or residual(joined):
+                yield joined
+
+
+@handle_db_errors
+@measure("execute")
+def iter_join(metadata: dict, join: dict, left_data: list, right_data: list,
+              where_clause=None, left_indexes: dict | None = None,
+              right_indexes: dict | None = None,
+              plan: planner.PlanNode | None = None):
+    """
+    Хеш-соединение двух таблиц по равенству столбцов:
+        join = {"left": a, "left_col": x, "right": b, "right_col": y}
+    Части условия WHERE, относящиеся к одной таблице, проверяются до
+    соединения (и могут использовать ее индексы), остальные - на
+    соединенных записях. Порядок и способ соединения выбирает планировщик
+    по оценкам числа записей сторон после их условий: хеш-таблица обычно
+    строится по меньшей стороне, так что память ограничена ее размером, а
+    если по ключу соединения есть индекс, по нему можно искать пары вместо
+    хеш-таблицы. Возвращает итератор записей вида
+    {"a.ID": .., "a.x": .., "b.ID": .., ...}.
+    """
+    left, right = join["left"], join["right"]
+    for table in (left, right):
+        if table not in metadata:
+            raise TableNotFoundError(f"Таблица {table} не существует.")
+    if left == right:
+        raise ValidationError("Соединение таблицы с самой собой не поддерживается.")
+
+    schema = join_columns(metadata, join)
+    col_types = {col["name"]: col["type"] for col in schema}
+    keys = {left: join["left_col"], right: join["right_col"]}
+    for table, col in keys.items():
+        if f"{table}.{col}" not in col_types:
+            raise ValidationError(f"Столбец {table}.{col} не существует.")
+    if col_types[f"{left}.{keys[left]}"] != col_types[f"{right}.{keys[right]}"]:
+        raise ValidationError("Столбцы соединения должны быть одного типа.")
+
+    # Раскладываем условие: части одной таблицы - до соединения
+    node = predicates.normalize(where_clause)
+    pushed = {left: [], right: []}
+    residual = []
+    if node is not None:
+        node = predicates.rename_columns(node, join_qualifier(schema))
+        for part in predicates.conjuncts(node):
+            tables = {col.split(".", 1)[0] for col in predicates.columns_of(part)}
+            if len(tables) == 1:
+                table = tables.pop()
+                pushed[table].append(predicates.rename_columns(
+                    part, lambda col: col.split(".", 1)[1]
+                ))
+            else:
+                residual.append(part)
+
+    sides = {
+        left: (left_data, left_indexes or {}),
+        right: (right_data, right_indexes or {}),
+    }
+    conditions, types, filters, scans = {}, {}, {}, {}
+    for table, (data, table_indexes) in sides.items():
+        conditions[table], types[table], filters[table] = _compile(
+            data, predicates.conjoin(pushed[table]), metadata[table]["columns"]
+        )
+        data, pruned = _partitions(data, conditions[table], types[table])
+        sides[table] = (data, table_indexes)
+        scans[table] = planner.plan_scan(data, conditions[table], table_indexes,
+                                         types[table],
+                                         metadata[table].get("stats"))
+        planner.note_partitions(scans[table], pruned)
+    residual_node = predicates.conjoin(residual)
+    residual_filter = residual_node and predicates.compile_predicate(
+        residual_node, col_types, _cast_type
+    )
+
+    join_plan = planner.plan_join(
+        keys, scans, conditions,
+        {table: table_indexes for table, (_, table_indexes) in sides.items()},
+        {table: metadata[table].get("stats") for table in sides},
+        {table: len(data) for table, (data, _) in sides.items()},
+        residual_node,
+    )
+    if plan is not None:
+        plan.add(join_plan)
+
+    def scan(table):
+        data, table_indexes = sides[table]
+        return _read(scans[table], data, conditions[table], table_indexes,
+                     types[table], filters[table])
+
+    def combiner(first):
+        """combine(строка first, строка другой таблицы) в порядке left, right."""
+        if first == left:
+            return lambda row, other: _combine(left, row, right, other)
+        return lambda row, other: _combine(left, other, right, row)
+
+    first = join_plan.table
+    other = right if first == left else left
+    if join_plan.operation == planner.INDEX_JOIN:
+        # Идем по одной стороне и ищем пары в индексе другой
+        rows = _index_join(scan(first), keys[first], sides[other][1][keys[other]],
+                           filters[other], combiner(first), residual_filter)
+    else:
+        rows = _hash_join(scan(first), keys[first], scan(other), keys[other],
+                          combiner(first), residual_filter)
+    return join_plan.run(iter, rows)
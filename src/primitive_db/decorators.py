@@ -1,8 +1,9 @@
 import functools
-import time
 
 import prompt
 
+from src.primitive_db import metrics
+
 
 def handle_db_errors(func):
     """
@@ -28,15 +29,33 @@ def handle_db_errors(func):
     return wrapper
 
 
+# Интерактивные запросы (подтверждения, постраничный вывод) можно отключить
+# для пакетного выполнения скриптов
+_settings = {"interactive": True}
+
+
+def set_interactive(enabled: bool) -> None:
+    """Включает или отключает интерактивные запросы к пользователю."""
+    _settings["interactive"] = enabled
+
+
+def is_interactive() -> bool:
+    return _settings["interactive"]
+
+
 def confirm_action(action_name: str):
     """
     Фабрика декораторов. Запрашивает подтверждение перед выполнением функции.
     Если пользователь вводит не 'y', функция не выполняется.
+    При отключенных интерактивных запросах функция выполняется сразу.
     """
 
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            if not is_interactive():
+                return func(*args, **kwargs)
+
             msg = f"Вы уверены, что хотите выполнить '{action_name}'? [y/n]: "
             answer = prompt.string(msg)
 
@@ -51,38 +70,20 @@ def confirm_action(action_name: str):
     return decorator
 
 
-def log_time(func):
+def measure(phase: str):
     """
-    Декоратор для замера времени выполнения функции.
+    Фабрика декораторов. Замеряет время выполнения функции и учитывает его
+    в метриках текущей команды как фазу phase (parse, load, execute, save,
+    render). Ничего не печатает: метрики выводит команда stats.
     """
 
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        start_time = time.monotonic()
-        result = func(*args, **kwargs)
-        end_time = time.monotonic()
-
-        duration = end_time - start_time
-        print(f"Функция '{func.__name__}' выполнилась за {duration:.4f} секунд.")
-        return result
-
-    return wrapper
-
-
-def create_cacher():
-    """
-    Создает замыкание для кэширования результатов.
-    Возвращает функцию helper(key, func_to_call).
-    """
-    cache = {}
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.registry.phase(phase):
+                return func(*args, **kwargs)
 
-    def cache_result(key, value_func):
-        if key in cache:
-            return cache[key]
+        return wrapper
 
-        # Если нет - выполняем "тяжелую" функцию
-        result = value_func()
-        cache[key] = result
-        return result
+    return decorator
 
-    return cache_result
\ No newline at end of file
@@ -1,11 +1,25 @@
-import os
-import shlex
+import itertools
+import json
+import sys
+import time
 
 import prompt
 from prettytable import PrettyTable
 
-from src.primitive_db import core, decorators, parser, utils
-from src.primitive_db.constants import DB_FILE
+from src.primitive_db import (
+    aggregates,
+    core,
+    metrics,
+    parser,
+    partitions,
+    planner,
+    table_stats,
+    utils,
+)
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.constants import IMPORT_BATCH_SIZE, OUTPUT_FORMATS, PAGE_SIZE
+from src.primitive_db.decorators import handle_db_errors, is_interactive, measure
+from src.primitive_db.session import Session
 
 
 def print_help():
@@ -13,203 +27,871 @@ def print_help():
     print("\n***Процесс работы с таблицей***")
     print("Функции:")
     print("<command> create_table <имя_таблицы> <столбец1:тип> .. - создать таблицу")
+    print("          ... partition by hash(<столбец>) into <n> | range(<столбец>) "
+          "[size <n>] - хранить таблицу секциями в отдельных файлах.")
     print("<command> list_tables - показать список всех таблиц")
     print("<command> drop_table <имя_таблицы> - удалить таблицу")
+    print("<command> create_index <имя_таблицы> <столбец> [hash|sorted] - "
+          "создать индекс по столбцу")
+    print("<command> drop_index <имя_таблицы> <столбец> - удалить индекс")
     print("<command> insert into <имя_таблицы> values "
           "(<значение1>, <значение2>, ...) - создать запись.")
-    print("<command> select from <имя_таблицы> where <столбец> = <значение> - "
+    print("<command> insert into <имя_таблицы> values (...), (...), ... - "
+          "создать несколько записей.")
+    print("<command> import <имя_таблицы> <файл.csv|файл.jsonl> - "
+          "загрузить записи из файла.")
+    print("<command> select from <имя_таблицы> where <условие> - "
           "прочитать записи по условию.")
+    print("          условие: <столбец> =|!=|<|<=|>|>= <значение>, "
+          "<столбец> in (...), between .. and .., like '%шаблон_',")
+    print("          части объединяются через and, or, not и скобки.")
     print("<command> select from <имя_таблицы> - прочитать все записи.")
+    print("<command> select <столбцы|count(*)|sum(col)|min|max|avg>, ... "
+          "from <имя_таблицы> [where ...] [group by <столбцы>] - агрегаты.")
+    print("<command> select from <a> join <b> on <a>.<столбец> = <b>.<столбец> "
+          "[where ...] - соединение двух таблиц.")
+    print("          ... [order by <столбец> [asc|desc], ...] - сортировка "
+          "(с limit - только первые записи).")
+    print("          ... [limit <n>] [offset <n>] [format table|tsv|jsonl] [page]"
+          " - постраничный или потоковый вывод.")
     print("<command> update <имя_таблицы> set <столбец1> = <новое_значение1> "
           "where <столбец_условия> = <значение_условия> - обновить запись.")
     print("<command> delete from <имя_таблицы> where <столбец> = <значение> - "
           "удалить запись.")
     print("<command> info <имя_таблицы> - вывести информацию о таблице.")
+    print("<command> compact <имя_таблицы> - сжать журнал данных таблицы.")
     print("\nОбщие команды:")
+    print("<command> commit - сохранить изменения на диск (и завершить "
+          "транзакцию)")
+    print("<command> cache_stats - статистика кэша запросов")
+    print("<command> stats [reset | export <файл> | trace <файл>|off] - "
+          "время команд по фазам")
+    print("<command> profile <команда> - выполнить команду под cProfile")
+    print("<command> begin - начать транзакцию, rollback - отменить ее.")
+    print("<command> explain select ... - выполнить запрос и показать план: "
+          "способы чтения, оценки и фактическое число записей, время.")
+    print("<command> analyze <имя_таблицы> - пересчитать статистику "
+          "таблицы для планировщика.")
     print("<command> exit - выход из программы")
     print("<command> help - справочная информация\n")
 
 
-def run():
+@measure("render")
+def print_rows(rows, headers: list[str], fmt: str = "table",
+               page: bool = False) -> int:
+    """
+    Потоково выводит записи. Таблица печатается страницами по PAGE_SIZE строк,
+    поэтому первые строки появляются сразу, а в памяти держится одна страница.
+    С page=True перед следующей страницей ждем подтверждения пользователя.
+    Возвращает число выведенных записей.
+    """
+    count = 0
+
+    if fmt == "tsv":
+        print("\t".join(headers))
+        for row in rows:
+            print("\t".join(str(row.get(h)) for h in headers))
+            count += 1
+    elif fmt == "jsonl":
+        for row in rows:
+            print(json.dumps({h: row.get(h) for h in headers}, ensure_ascii=False))
+            count += 1
+    else:
+        while True:
+            chunk = list(itertools.islice(rows, PAGE_SIZE))
+            if not chunk:
+                break
+            if page and count and is_interactive():
+                answer = prompt.string("Показать следующую страницу? [y/n]: ")
+                if answer.lower() != "y":
+                    break
+            # Вывод через PrettyTable
+            pt = PrettyTable()
+            pt.field_names = headers
+            for row in chunk:
+                pt.add_row([row.get(h) for h in headers])
+            print(pt)
+            count += len(chunk)
+
+        if count == 0:
+            print("Записи не найдены.")
+    return count
+
+
+@measure("parse")
+def split_command(line: str) -> list[str] | None:
+    """Разбивает строку команды на токены. При ошибке кавычек - None."""
+    try:
+        return parser.split_args(line)
+    except ValueError:
+        print("Ошибка парсинга команды. Проверьте парность кавычек.")
+        return None
+
+
+def run(session: Session | None = None):
     """Главный цикл приложения."""
     print_help()
 
-    # Инициализируем кэш (замыкание) перед запуском цикла
-    db_cacher = decorators.create_cacher()
-
-    while True:
-        user_input = prompt.string("Введите команду: ")
-
-        try:
-            args = shlex.split(user_input)
-        except ValueError:
-            print("Ошибка парсинга команды. Проверьте парность кавычек.")
-            continue
-
-        if not args:
-            continue
-
-        command = args[0]
-        # Загружаем актуальное состояние перед каждой операцией
-        metadata = utils.load_metadata(DB_FILE)
-
-        if command == "exit":
-            break
-
-        elif command == "help":
-            print_help()
-
-        elif command == "list_tables":
-            tables = list(metadata.keys())
-            if tables:
-                for table in tables:
-                    print(f"- {table}")
-            else:
-                print("База данных пуста.")
-
-        # --- Управление таблицами ---
-        elif command == "create_table":
-            if len(args) < 2:
-                print("Ошибка: Укажите имя таблицы.")
-                continue
-
-            table_name = args[1]
-            column_defs = args[2:]
-
-            # Декораторы в core обрабатывают ошибки. Если успех - вернется dict.
-            new_metadata = core.create_table(metadata, table_name, column_defs)
-
-            if new_metadata is not None:
-                utils.save_metadata(new_metadata, DB_FILE)
-                # Получаем красивую строку схемы для вывода (не сохраняем)
-                schema = core.get_table_schema_str(new_metadata, table_name)
-                print(f'Таблица "{table_name}" успешно создана '
-                      f'со столбцами: {schema}')
-
-        elif command == "drop_table":
-            if len(args) < 2:
-                print("Ошибка: Укажите имя таблицы.")
-                continue
-
-            table_name = args[1]
-
-            # core.drop_table теперь спрашивает подтверждение (@confirm_action)
-            new_metadata = core.drop_table(metadata, table_name)
-
-            if new_metadata is not None:
-                utils.save_metadata(new_metadata, DB_FILE)
-                # Удаляем физический файл данных, если он есть
-                file_path = utils.get_table_path(table_name)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                print(f'Таблица "{table_name}" успешно удалена.')
-
-        # --- CRUD операции ---
-
-        elif command == "insert":
-            if len(args) < 4 or args[1] != "into":
-                print("Ошибка синтаксиса. Используйте: "
-                      "insert into <table> values (...)")
-                continue
-
-            table_name = args[2]
-            values_list = parser.parse_insert_values(args)
-
-            data = utils.load_table_data(table_name)
-            # core.insert использует @log_time и @handle_db_errors
-            new_record = core.insert(metadata, table_name, data, values_list)
-
-            if new_record is not None:
-                utils.save_table_data(table_name, data)
-                print(f"Запись с ID={new_record['ID']} успешно "
-                      f"добавлена в таблицу \"{table_name}\".")
-
-        elif command == "select":
-            if len(args) < 3 or args[1] != "from":
-                print("Ошибка синтаксиса. Используйте: select from <table> ...")
+    # Инициализируем кэш запросов перед запуском цикла
+    db_cacher = QueryCache()
+
+    # Одна сессия на весь цикл: каталог и таблицы загружаются лениво и один раз
+    session = session if session is not None else Session()
+
+    try:
+        while True:
+            user_input = prompt.string("Введите команду: ")
+
+            with metrics.registry.command() as current:
+                args = split_command(user_input)
+                if not args:
+                    continue
+
+                if args[0] == "exit":
+                    break
+
+                current["name"] = args[0]
+                execute_command(session, args, db_cacher)
+                session.maybe_flush()
+    finally:
+        close_session(session)
+
+
+def close_session(session: Session) -> None:
+    """Закрывает сессию; незавершенная транзакция при этом отменяется."""
+    if session.in_transaction:
+        print("Транзакция не завершена - изменения отменены.")
+    session.close()
+
+
+def run_script(lines, session: Session | None = None) -> dict:
+    """
+    Пакетное выполнение команд (из файла или stdin) в одной сессии.
+    Пустые строки и комментарии (# или --) пропускаются, завершающая ';'
+    отбрасывается. В конце в stderr выводится сводка по времени выполнения.
+    Возвращает эту сводку: {команда: {"count": n, "total": сек, "max": сек}}.
+    """
+    db_cacher = QueryCache()
+    session = session if session is not None else Session()
+    summary = {}
+    started = time.perf_counter()
+
+    try:
+        for line in lines:
+            line = line.strip().rstrip(";").strip()
+            if not line or line.startswith(("#", "--")):
                 continue
 
-            table_name = args[2]
-            where_clause = parser.parse_where_clause(args)
+            command_started = time.perf_counter()
+            with metrics.registry.command() as current:
+                args = split_command(line)
+                if not args:
+                    continue
+                if args[0] == "exit":
+                    break
+
+                current["name"] = args[0]
+                execute_command(session, args, db_cacher)
+                session.maybe_flush()
+            elapsed = time.perf_counter() - command_started
+
+            stats = summary.setdefault(args[0], {"count": 0, "total": 0.0,
+                                                 "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+    finally:
+        close_session(session)
+
+    print_summary(summary, time.perf_counter() - started)
+    return summary
+
+
+def print_summary(summary: dict, total_time: float) -> None:
+    """Выводит в stderr сводку пакетного выполнения по командам."""
+    total_count = sum(stats["count"] for stats in summary.values())
+    pt = PrettyTable()
+    pt.field_names = ["команда", "кол-во", "всего, с", "среднее, мс", "макс, мс"]
+    for command, stats in sorted(summary.items(),
+                                 key=lambda item: -item[1]["total"]):
+        pt.add_row([
+            command,
+            stats["count"],
+            f"{stats['total']:.4f}",
+            f"{stats['total'] / stats['count'] * 1000:.3f}",
+            f"{stats['max'] * 1000:.3f}",
+        ])
+    print(f"\nВыполнено команд: {total_count} за {total_time:.4f} секунд.",
+          file=sys.stderr)
+    if summary:
+        print(pt, file=sys.stderr)
+
+
+def print_stats(args: list[str]) -> None:
+    """
+    Команда stats: выводит время команд по фазам, сбрасывает метрики,
+    экспортирует их в JSONL или включает/выключает трассировку команд.
+    """
+    registry = metrics.registry
+    action = args[0] if args else None
+
+    if action == "reset":
+        registry.reset()
+        print("Метрики сброшены.")
+        return
+    if action in ("export", "trace"):
+        if len(args) < 2:
+            print(f"Ошибка синтаксиса. Используйте: stats {action} <файл>")
+            return
+        if action == "export":
+            count = registry.export(args[1])
+            print(f"Записано строк метрик: {count} в файл {args[1]}.")
+        elif args[1] == "off":
+            registry.set_trace(None)
+            print("Трассировка команд выключена.")
+        else:
+            registry.set_trace(args[1])
+            print(f"Трассировка команд пишется в файл {args[1]}.")
+        return
+    if action is not None:
+        print(f"Неизвестный параметр stats: {action}")
+        return
+
+    snapshot = registry.snapshot()
+    if not snapshot:
+        print("Метрик пока нет.")
+        return
+
+    pt = PrettyTable()
+    pt.field_names = ["команда", "фаза", "кол-во", "всего, с", "среднее, мс",
+                      "p50, мс", "p95, мс", "макс, мс"]
+    order = {phase: pos for pos, phase in enumerate(metrics.PHASES)}
+    for name, entry in sorted(snapshot.items()):
+        rows = [("всего", entry["total"])] if entry["total"] else []
+        rows += sorted(entry["phases"].items(),
+                       key=lambda item: order.get(item[0], len(order)))
+        for phase, stats in rows:
+            pt.add_row([name, phase, stats["count"], f"{stats['total_s']:.4f}",
+                        f"{stats['mean_ms']:.3f}", f"{stats['p50_ms']:.3f}",
+                        f"{stats['p95_ms']:.3f}", f"{stats['max_ms']:.3f}"])
+    print(pt)
+    if registry.trace_path:
+        print(f"Трассировка команд: {registry.trace_path}")
+
+
+def select_aggregate(session: Session, table_name: str, items: list | None,
+                     where_clause, options: dict,
+                     plan: planner.PlanNode | None = None) -> None:
+    """
+    SELECT с агрегатами и/или GROUP BY. Простые агрегаты по всей таблице
+    (count(*), min/max по int) берутся из статистики без чтения таблицы.
+    """
+    group_by = options["group_by"]
+    if items is None:
+        # select * ... group by: выводим ключи групп и их размер
+        items = [("column", col) for col in group_by] + [("agg", "count", None)]
+
+    row = core.aggregate_from_stats(session.metadata, table_name, items,
+                                    group_by, where_clause)
+    if row is not None:
+        result = [row]
+        if plan is not None:
+            node = plan.add(planner.PlanNode(planner.FROM_STATS,
+                                             "метаданные таблицы", 1))
+            node.actual = 1
+    else:
+        result = core.aggregate(
+            session.metadata, table_name, session.table(table_name), items,
+            group_by, where_clause, session.indexes(table_name), plan,
+        )
+        if result is None:
+            return
+    headers = [aggregates.label(item) for item in items]
+    rows = order_result(iter(result), headers, options, plan)
+    if rows is not None:
+        print_result(rows, headers, options, plan)
+
+
+def select_join(session: Session, join: dict, items: list | None,
+                where_clause, options: dict,
+                plan: planner.PlanNode | None = None) -> None:
+    """
+    SELECT с соединением двух таблиц. Столбцы результата называются
+    "таблица.столбец"; в списке выборки, GROUP BY и WHERE таблицу можно
+    не указывать, если столбец есть только в одной из них.
+    """
+    metadata = session.metadata
+    left, right = join["left"], join["right"]
+    for table_name in (left, right):
+        if table_name not in metadata:
+            print(f"Таблица {table_name} не существует.")
+            return
+
+    rows = core.iter_join(
+        metadata, join, session.table(left), session.table(right),
+        where_clause, session.indexes(left), session.indexes(right), plan,
+    )
+    if rows is None:
+        return
+
+    schema = core.join_columns(metadata, join)
+    qualify = core.join_qualifier(schema)
+
+    def qualify_item(item: tuple) -> tuple:
+        if item[0] == "column":
+            return ("column", qualify(item[1]))
+        _, func, col = item
+        return ("agg", func, None if col is None else qualify(col))
+
+    group_by = [qualify(col) for col in options["group_by"]]
+    options["order_by"] = [(qualify(col), descending)
+                           for col, descending in options["order_by"]]
+    if items is not None:
+        items = [qualify_item(item) for item in items]
+
+    if aggregates.is_aggregate(items, group_by):
+        if items is None:
+            items = [("column", col) for col in group_by] + [("agg", "count", None)]
+        result = core.aggregate_rows(rows, schema, items, group_by, plan)
+        if result is None:
+            return
+        rows = iter(result)
+        headers = [aggregates.label(item) for item in items]
+    elif items is not None:
+        headers = [item[1] for item in items]
+    else:
+        headers = [col["name"] for col in schema]
+    rows = order_result(rows, headers, options, plan)
+    if rows is not None:
+        print_result(rows, headers, options, plan)
+
+
+def _top(options: dict) -> int | None:
+    """Сколько первых записей результата будет выведено (limit + offset)."""
+    if options["limit"] is None:
+        return None
+    return options["offset"] + options["limit"]
+
+
+def order_result(rows, headers: list[str], options: dict,
+                 plan: planner.PlanNode | None = None):
+    """Применяет ORDER BY к готовому потоку результата (None - ошибка)."""
+    if not options["order_by"]:
+        return rows
+    return core.order_rows(rows, headers, options["order_by"], _top(options),
+                           plan)
+
+
+def print_result(rows, headers: list[str], options: dict,
+                 plan: planner.PlanNode | None = None) -> None:
+    """
+    Применяет limit/offset к потоку записей и выводит его. Для explain
+    (plan) записи только считаются: запрос выполняется, но не выводится.
+    """
+    rows = itertools.islice(rows, options["offset"], _top(options))
+    if plan is not None:
+        plan.actual = sum(1 for _ in rows)
+        return
+    print_rows(rows, headers, options["format"], options["page"])
+
+
+def select_command(session: Session, args: list[str], db_cacher: QueryCache,
+                   plan: planner.PlanNode | None = None) -> None:
+    """
+    Команда select: выборка, агрегаты, соединение, ORDER BY и limit/offset.
+    С plan (explain) запрос выполняется мимо кэша, а план его выполнения
+    собирается в plan вместо вывода записей.
+    """
+    try:
+        items, table_name = parser.parse_select_list(args)
+    except ValueError as e:
+        print(f"Ошибка синтаксиса: {e}")
+        return
+    metadata = session.metadata
+
+    if table_name not in metadata:
+        print(f"Таблица {table_name} не существует.")
+        return
+
+    try:
+        join = parser.parse_join(args)
+        where_clause = parser.parse_where_clause(args)
+        options = parser.parse_select_options(args)
+    except ValueError as e:
+        print(f"Ошибка синтаксиса: {e}")
+        return
+    if options["format"] not in OUTPUT_FORMATS:
+        print(f"Неизвестный формат вывода: {options['format']}. "
+              f"Допустимые: {', '.join(sorted(OUTPUT_FORMATS))}")
+        return
+
+    if plan is not None:
+        plan.detail = _plan_title(table_name, join, options)
+    if join is not None:
+        select_join(session, join, items, where_clause, options, plan)
+        return
+    if aggregates.is_aggregate(items, options["group_by"]):
+        select_aggregate(session, table_name, items, where_clause, options,
+                         plan)
+        return
+
+    headers = [col["name"] for col in metadata[table_name]["columns"]]
+    if items is not None:
+        unknown = [item[1] for item in items if item[1] not in headers]
+        if unknown:
+            print(f"Столбец {unknown[0]} не существует.")
+            return
+        headers = [item[1] for item in items]
+
+    # Формируем уникальный ключ для кэша: упорядоченный с limit
+    # результат - это только первые записи выборки
+    order_by = options["order_by"]
+    top = _top(options) if order_by else None
+    cache_key = (table_name, str(where_clause), str(order_by), top)
+
+    # Из кэша берем готовый список, иначе - потоково фильтруем таблицу
+    # и кэшируем результат, только если он прочитан целиком
+    cached = db_cacher.get(cache_key) if plan is None else None
+    if cached is not None:
+        rows = iter(cached)
+    else:
+        # Условие компилируется здесь же: ошибки в нем выводятся сразу
+        stats = metadata[table_name].get("stats")
+        if order_by:
+            rows = core.iter_select_ordered(
+                session.table(table_name), where_clause,
+                session.indexes(table_name),
+                metadata[table_name]["columns"], order_by, top, stats, plan,
+            )
+        else:
+            rows = core.iter_select(
+                session.table(table_name), where_clause,
+                session.indexes(table_name),
+                metadata[table_name]["columns"], stats, plan,
+            )
+        if rows is None:
+            return
+        if plan is None:
+            rows = db_cacher.collect(cache_key, rows)
+
+    print_result(rows, headers, options, plan)
+
+
+def _plan_title(table_name: str, join: dict | None, options: dict) -> str:
+    title = table_name if join is None else f"{join['left']} join {join['right']}"
+    if options["limit"] is not None:
+        title += f", limit {options['limit']}"
+    if options["offset"]:
+        title += f", offset {options['offset']}"
+    return title
+
+
+def explain(session: Session, args: list[str], db_cacher: QueryCache) -> None:
+    """
+    Команда explain: выполняет SELECT целиком (без вывода записей и мимо
+    кэша) и выводит план: для каждого узла - оценку числа записей и
+    стоимости планировщиком и фактическое число записей и время.
+    """
+    plan = planner.PlanNode("select")
+    plan.analyze = True
+    started = time.perf_counter()
+    select_command(session, args, db_cacher, plan)
+    plan.elapsed = time.perf_counter() - started
+    if plan.actual is None:
+        # Запрос не выполнился - ошибка уже выведена
+        return
+
+    options = parser.parse_select_options(args)
+    if plan.children:
+        source = plan.children[0]
+        plan.estimate = max(0.0, source.estimate - options["offset"])
+        if options["limit"] is not None:
+            plan.estimate = min(plan.estimate, options["limit"])
+        plan.cost = source.cost
+    print_plan(plan)
+
+
+def print_plan(plan: planner.PlanNode) -> None:
+    """Выводит дерево плана таблицей: узлы с отступом по глубине."""
+    pt = PrettyTable()
+    pt.field_names = ["план", "оценка записей", "записей", "время, мс",
+                      "стоимость"]
+    pt.align["план"] = "l"
+    for depth, node in plan.walk():
+        title = node.operation + (f" ({node.detail})" if node.detail else "")
+        tracked = node.actual is not None
+        pt.add_row([
+            "   " * (depth - 1) + "-> " + title if depth else title,
+            f"{node.estimate:.0f}",
+            node.actual if tracked else "-",
+            f"{node.elapsed * 1000:.3f}" if tracked else "-",
+            f"{node.cost:.0f}",
+        ])
+    print(pt)
+
+
+# Команды, изменяющие базу: выполняются под блокировкой записи
+WRITE_COMMANDS = {
+    "create_table", "drop_table", "create_index", "drop_index",
+    "insert", "import", "update", "delete", "compact", "commit",
+    "begin", "rollback", "analyze",
+}
+
+
+@handle_db_errors
+def execute_command(session: Session, args: list[str],
+                    db_cacher: QueryCache) -> None:
+    """
+    Выполняет одну разобранную команду в рамках сессии. Команда видит
+    согласованный снимок базы; если другой процесс изменил базу после
+    прошлой команды, кэш запросов сбрасывается.
+    """
+    # profile <команда> блокирует базу так же, как сама команда
+    command = args[1] if args[0] == "profile" and len(args) > 1 else args[0]
+    with session.access(write=command in WRITE_COMMANDS) as refreshed:
+        if refreshed:
+            db_cacher.clear()
+        dispatch_command(session, args, db_cacher)
+
+
+def dispatch_command(session: Session, args: list[str],
+                     db_cacher: QueryCache) -> None:
+    """Разбирает команду и вызывает ее обработчик."""
+    command = args[0]
+
+    if command == "help":
+        print_help()
+
+    elif command == "begin":
+        session.begin()
+        print("Транзакция начата.")
+
+    elif command == "commit":
+        in_transaction = session.in_transaction
+        session.commit()
+        print("Транзакция зафиксирована." if in_transaction
+              else "Изменения сохранены.")
+
+    elif command == "rollback":
+        session.rollback()
+        # В кэше могли остаться результаты с отмененными изменениями
+        db_cacher.clear()
+        print("Транзакция отменена.")
+
+    elif command == "cache_stats":
+        stats = db_cacher.stats()
+        print(f"Записей в кэше: {stats['entries']}/{stats['max_entries']}, "
+              f"строк: {stats['rows']}/{stats['max_rows']}")
+        print(f"Попадания: {stats['hits']}, промахи: {stats['misses']}, "
+              f"доля попаданий: {stats['hit_rate']:.1%}")
+        print(f"Вытеснения: {stats['evictions']}, "
+              f"сбросы по записи: {stats['invalidations']}")
+
+    elif command == "stats":
+        print_stats(args[1:])
+
+    elif command == "profile":
+        if len(args) < 2:
+            print("Ошибка синтаксиса. Используйте: profile <команда ...>")
+            return
+        _, report = metrics.profile(dispatch_command, session, args[1:],
+                                    db_cacher)
+        print(report)
+
+    elif command == "list_tables":
+        tables = list(session.metadata.keys())
+        if tables:
+            for table in tables:
+                print(f"- {table}")
+        else:
+            print("База данных пуста.")
 
-            if table_name not in metadata:
-                print(f"Таблица {table_name} не существует.")
-                continue
+    # --- Управление таблицами ---
+    elif command == "create_table":
+        if len(args) < 2:
+            print("Ошибка: Укажите имя таблицы.")
+            return
 
-            # Формируем уникальный ключ для кэша
-            cache_key = (table_name, str(where_clause))
-
-            # Оборачиваем вызов в функцию для кэшера
-            def fetch_data_operation():
-                current_data = utils.load_table_data(table_name)
-                return core.select(current_data, where_clause)
-
-            # Вызываем через замыкание-кэшер
-            result = db_cacher(cache_key, fetch_data_operation)
-
-            # Если вернулся None (ошибка внутри core), ничего не делаем
-            if result is not None:
-                # Вывод через PrettyTable
-                pt = PrettyTable()
-                headers = [col["name"] for col in metadata[table_name]]
-                pt.field_names = headers
-
-                if result:
-                    for row in result:
-                        pt.add_row([row.get(h) for h in headers])
-                    print(pt)
-                else:
-                    print("Записи не найдены.")
-
-        elif command == "delete":
-            if len(args) < 5 or args[1] != "from":
-                print("Ошибка синтаксиса.")
-                continue
+        table_name = args[1]
+        try:
+            column_defs, partition = parser.parse_partition(args[2:])
+        except ValueError as e:
+            print(f"Ошибка синтаксиса: {e}")
+            return
+
+        # Декораторы в core обрабатывают ошибки. Если успех - вернется dict.
+        new_metadata = core.create_table(session.metadata, table_name,
+                                         column_defs, partition)
+
+        if new_metadata is not None:
+            session.mark_metadata_dirty()
+            db_cacher.invalidate(table_name)
+            # Получаем красивую строку схемы для вывода (не сохраняем)
+            schema = core.get_table_schema_str(new_metadata, table_name)
+            print(f'Таблица "{table_name}" успешно создана '
+                  f'со столбцами: {schema}')
+
+    elif command == "drop_table":
+        if len(args) < 2:
+            print("Ошибка: Укажите имя таблицы.")
+            return
+
+        table_name = args[1]
+
+        # core.drop_table теперь спрашивает подтверждение (@confirm_action)
+        new_metadata = core.drop_table(session.metadata, table_name)
+
+        if new_metadata is not None:
+            session.mark_metadata_dirty()
+            # Физические файлы данных удаляются при сохранении сессии
+            session.drop_table(table_name)
+            db_cacher.invalidate(table_name)
+            print(f'Таблица "{table_name}" успешно удалена.')
+
+    elif command == "create_index":
+        if len(args) < 3:
+            print("Ошибка синтаксиса. Используйте: "
+                  "create_index <table> <column> [hash|sorted]")
+            return
+
+        table_name, column = args[1], args[2]
+        kind = args[3] if len(args) > 3 else "hash"
+        new_metadata = core.create_index(session.metadata, table_name, column, kind)
+
+        if new_metadata is not None:
+            session.mark_metadata_dirty()
+            session.reset_indexes(table_name)
+            print(f'Индекс ({kind}) по столбцу "{column}" '
+                  f'таблицы "{table_name}" успешно создан.')
+
+    elif command == "drop_index":
+        if len(args) < 3:
+            print("Ошибка синтаксиса. Используйте: "
+                  "drop_index <table> <column>")
+            return
+
+        table_name, column = args[1], args[2]
+        new_metadata = core.drop_index(session.metadata, table_name, column)
+
+        if new_metadata is not None:
+            session.mark_metadata_dirty()
+            session.reset_indexes(table_name)
+            print(f'Индекс по столбцу "{column}" удален.')
+
+    # --- CRUD операции ---
+
+    elif command == "insert":
+        if len(args) < 4 or args[1] != "into":
+            print("Ошибка синтаксиса. Используйте: "
+                  "insert into <table> values (...)")
+            return
+
+        table_name = args[2]
+        rows_values = parser.parse_insert_rows(args)
+        data = session.table(table_name)
+
+        if len(rows_values) > 1:
+            new_rows = core.insert_many(session.metadata, table_name, data,
+                                        rows_values, session.indexes(table_name))
+            if new_rows is not None:
+                session.mark_metadata_dirty()
+                session.mark_rows_changed(table_name, new_rows)
+                db_cacher.invalidate(table_name)
+                print(f"Добавлено записей: {len(new_rows)} "
+                      f"(ID {new_rows[0]['ID']}-{new_rows[-1]['ID']}) "
+                      f"в таблицу \"{table_name}\".")
+            return
+
+        # core.insert использует @measure и @handle_db_errors
+        new_record = core.insert(session.metadata, table_name, data,
+                                 rows_values[0] if rows_values else [],
+                                 session.indexes(table_name))
+
+        if new_record is not None:
+            # Последовательность ID сохраняется вместе с метаданными раньше
+            # записей: при сбое ID будет пропущен, но никогда не выдан повторно
+            session.mark_metadata_dirty()
+            session.mark_rows_changed(table_name, [new_record])
+            db_cacher.invalidate(table_name)
+            print(f"Запись с ID={new_record['ID']} успешно "
+                  f"добавлена в таблицу \"{table_name}\".")
+
+    elif command == "import":
+        if len(args) < 3:
+            print("Ошибка синтаксиса. Используйте: import <table> <file>")
+            return
+
+        table_name, filepath = args[1], args[2]
+        if table_name not in session.metadata:
+            print(f"Таблица {table_name} не существует.")
+            return
+
+        total = import_file(session, table_name, filepath)
+        db_cacher.invalidate(table_name)
+        if total is not None:
+            print(f"Импортировано записей: {total} "
+                  f"в таблицу \"{table_name}\".")
+
+    elif command == "select":
+        select_command(session, args, db_cacher)
+
+    elif command == "explain":
+        if len(args) < 2 or args[1] != "select":
+            print("Ошибка синтаксиса. Используйте: explain select ...")
+            return
+        explain(session, args[1:], db_cacher)
+
+    elif command == "delete":
+        if len(args) < 5 or args[1] != "from":
+            print("Ошибка синтаксиса.")
+            return
+
+        table_name = args[2]
+        if table_name not in session.metadata:
+            print(f"Таблица {table_name} не существует.")
+            return
 
-            table_name = args[2]
+        try:
             where_clause = parser.parse_where_clause(args)
-            data = utils.load_table_data(table_name)
-
-            # core.delete спрашивает подтверждение
-            new_data = core.delete(data, where_clause)
-
-            if new_data is not None:
-                utils.save_table_data(table_name, new_data)
-                print(f"Записи успешно удалены из таблицы \"{table_name}\".")
-
-        elif command == "update":
-            if len(args) < 6:
-                print("Ошибка синтаксиса.")
-                continue
-
-            table_name = args[1]
-            set_clause = parser.parse_set_clause(args)
+        except ValueError as e:
+            print(f"Ошибка синтаксиса: {e}")
+            return
+        data = session.table(table_name)
+
+        # core.delete спрашивает подтверждение
+        deleted = core.delete(session.metadata, table_name, data, where_clause,
+                              session.indexes(table_name))
+
+        if deleted is not None:
+            # Статистика таблицы (число записей) хранится в метаданных
+            session.mark_metadata_dirty()
+            session.mark_rows_deleted(table_name, deleted)
+            db_cacher.invalidate(table_name)
+            print(f"Записи успешно удалены из таблицы \"{table_name}\".")
+
+    elif command == "update":
+        if len(args) < 6:
+            print("Ошибка синтаксиса.")
+            return
+
+        table_name = args[1]
+        set_clause = parser.parse_set_clause(args)
+        try:
             where_clause = parser.parse_where_clause(args)
-            data = utils.load_table_data(table_name)
-
-            # core.update изменяет данные
-            updated_data = core.update(
-                metadata, table_name, data, set_clause, where_clause
-            )
-
-            if updated_data is not None:
-                utils.save_table_data(table_name, updated_data)
-                print(f"Записи в таблице \"{table_name}\" успешно обновлены.")
-
-        elif command == "info":
-            if len(args) < 2:
-                continue
-            table_name = args[1]
-            if table_name in metadata:
-                print(f"Таблица: {table_name}")
-                schema_str = ", ".join([f"{c['name']}:{c['type']}"
-                                        for c in metadata[table_name]
-                                        ])
-                print(f"Столбцы: {schema_str}")
-                data = utils.load_table_data(table_name)
-                print(f"Количество записей: {len(data)}")
+        except ValueError as e:
+            print(f"Ошибка синтаксиса: {e}")
+            return
+        if table_name not in session.metadata:
+            print(f"Таблица {table_name} не существует.")
+            return
+        data = session.table(table_name)
+
+        # core.update изменяет данные и возвращает измененные записи
+        updated = core.update(
+            session.metadata, table_name, data, set_clause, where_clause,
+            session.indexes(table_name),
+        )
+
+        if updated is not None:
+            session.mark_metadata_dirty()
+            session.mark_rows_changed(table_name, updated)
+            db_cacher.invalidate(table_name)
+            print(f"Записи в таблице \"{table_name}\" успешно обновлены.")
+
+    elif command == "info":
+        if len(args) < 2:
+            return
+        table_name = args[1]
+        metadata = session.metadata
+        if table_name in metadata:
+            print(f"Таблица: {table_name}")
+            schema_str = core.get_table_schema_str(metadata, table_name)
+            print(f"Столбцы: {schema_str}")
+            scheme = metadata[table_name].get("partition")
+            if scheme is not None:
+                print(f"Секционирование: {partitions.describe(scheme)}, "
+                      f"секций: {len(partitions.numbers(scheme))}")
+            table_indexes = metadata[table_name].get("indexes", {})
+            if table_indexes:
+                print("Индексы: " + ", ".join(
+                    f"{col} ({kind})" for col, kind in table_indexes.items()
+                ))
+            stats = metadata[table_name].get("stats")
+            if stats is None:
+                print(f"Количество записей: {len(session.table(table_name))}")
             else:
-                print("Таблица не найдена")
-
+                # Число записей и границы берутся из метаданных, без чтения
+                # таблицы
+                print(f"Количество записей: {stats['rows']}")
+                for col in stats["min"]:
+                    print(f"Диапазон {col}: {stats['min'][col]} .. "
+                          f"{stats['max'][col]}")
+                # Различные значения, посчитанные по еще пустой таблице,
+                # для заполненной ничего не говорят - их не выводим
+                if table_stats.distinct_known(stats):
+                    print("Различных значений: " + ", ".join(
+                        f"{col}={count}"
+                        for col, count in stats["distinct"].items()
+                    ))
         else:
-            print(f"Функции {command} нет. Попробуйте снова.")
+            print("Таблица не найдена")
+
+    elif command == "analyze":
+        if len(args) < 2:
+            print("Ошибка: Укажите имя таблицы.")
+            return
+        table_name = args[1]
+        if table_name not in session.metadata:
+            print(f"Таблица {table_name} не существует.")
+            return
+        table_meta = session.metadata[table_name]
+        table_stats.analyze(table_meta, session.table(table_name))
+        session.mark_metadata_dirty()
+        print(f"Статистика таблицы \"{table_name}\" обновлена: "
+              f"записей {table_meta['stats']['rows']}.")
+
+    elif command == "compact":
+        if len(args) < 2:
+            print("Ошибка: Укажите имя таблицы.")
+            return
+        table_name = args[1]
+        if table_name not in session.metadata:
+            print(f"Таблица {table_name} не существует.")
+            return
+        if session.in_transaction:
+            print("Сжатие недоступно внутри транзакции: выполните commit "
+                  "или rollback.")
+            return
+        # Сначала сохраняем накопленные изменения, затем сжимаем журнал
+        session.commit()
+        session.compact(table_name)
+        print(f"Журнал таблицы \"{table_name}\" сжат.")
+
+    else:
+        print(f"Функции {command} нет. Попробуйте снова.")
+
+
+@handle_db_errors
+def import_file(session: Session, table_name: str, filepath: str) -> int:
+    """
+    Потоково импортирует записи из файла пачками по IMPORT_BATCH_SIZE.
+    Каждая пачка вставляется одним вызовом core.insert_many и сразу
+    сохраняется на диск. Возвращает число импортированных записей.
+    """
+    columns = [col["name"] for col in session.metadata[table_name]["columns"][1:]]
+    data = session.table(table_name)
+
+    total = 0
+    for batch in utils.read_import_file(filepath, columns, IMPORT_BATCH_SIZE):
+        new_rows = core.insert_many(session.metadata, table_name, data, batch,
+                                    session.indexes(table_name))
+        if new_rows is None:
+            # Ошибка в пачке уже выведена, предыдущие пачки сохранены
+            break
+        session.mark_metadata_dirty()
+        session.mark_rows_changed(table_name, new_rows)
+        # В транзакции пачки сохраняются вместе с ней при commit
+        if not session.in_transaction:
+            session.commit()
+        total += len(new_rows)
+    return total
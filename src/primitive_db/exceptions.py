@@ -0,0 +1,34 @@
+class DatabaseError(Exception):
+    """Базовая ошибка базы данных."""
+
+
+# Ошибки ниже наследуют ValueError, чтобы декоратор handle_db_errors
+# по-прежнему выводил их как ошибки валидации
+
+
+class ValidationError(DatabaseError, ValueError):
+    """Некорректные данные: тип значения, столбец, число значений."""
+
+
+class QuerySyntaxError(ValidationError):
+    """Ошибка синтаксиса команды или условия WHERE."""
+
+
+class TableNotFoundError(DatabaseError, ValueError):
+    """Таблица не существует."""
+
+
+class TableExistsError(DatabaseError, ValueError):
+    """Таблица с таким именем уже существует."""
+
+
+class RecordNotFoundError(DatabaseError, ValueError):
+    """Под условие не подошла ни одна запись."""
+
+
+class CorruptedDataError(DatabaseError, ValueError):
+    """Файл метаданных или данных таблицы поврежден."""
+
+
+class TransactionError(DatabaseError, ValueError):
+    """Команда недопустима в текущем состоянии транзакции."""
@@ -0,0 +1,241 @@
+import bisect
+
+INDEX_KINDS = {"hash", "sorted"}
+
+
+class HashIndex:
+    """
+    Хеш-индекс по столбцу: значение -> {ID: запись}.
+    Поиск по равенству за O(1).
+    """
+
+    kind = "hash"
+
+    def __init__(self, column: str, col_type: str):
+        self.column = column
+        self.col_type = col_type
+        self._buckets = {}
+
+    def add(self, row: dict) -> None:
+        self._buckets.setdefault(row.get(self.column), {})[row["ID"]] = row
+
+    def remove(self, row: dict) -> None:
+        value = row.get(self.column)
+        bucket = self._buckets.get(value)
+        if bucket is None:
+            return
+        bucket.pop(row["ID"], None)
+        if not bucket:
+            del self._buckets[value]
+
+    def bulk_load(self, rows: list[dict]) -> None:
+        self.add_many(rows)
+
+    def add_many(self, rows: list[dict]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def remove_many(self, rows: list[dict]) -> None:
+        for row in rows:
+            self.remove(row)
+
+    def lookup(self, value) -> list[dict]:
+        return list(self._buckets.get(value, {}).values())
+
+
+class SortedIndex:
+    """
+    Упорядоченный индекс по столбцу: отсортированный список пар (значение, ID).
+    Поиск по равенству и диапазону за O(log n).
+    """
+
+    kind = "sorted"
+
+    def __init__(self, column: str, col_type: str):
+        self.column = column
+        self.col_type = col_type
+        self._keys = []
+        self._rows = {}
+
+    def add(self, row: dict) -> None:
+        """Вставка одной записи: O(n) на сдвиг списка - для пачек add_many."""
+        bisect.insort(self._keys, (row.get(self.column), row["ID"]))
+        self._rows[row["ID"]] = row
+
+    def remove(self, row: dict) -> None:
+        key = (row.get(self.column), row["ID"])
+        pos = bisect.bisect_left(self._keys, key)
+        if pos < len(self._keys) and self._keys[pos] == key:
+            del self._keys[pos]
+            self._rows.pop(row["ID"], None)
+
+    def bulk_load(self, rows: list[dict]) -> None:
+        """Строит индекс одной сортировкой вместо вставки по одной записи."""
+        self._keys = sorted((row.get(self.column), row["ID"]) for row in rows)
+        self._rows = {row["ID"]: row for row in rows}
+
+    def add_many(self, rows: list[dict]) -> None:
+        """
+        Добавляет пачку записей: дописывает ключи и пересортировывает.
+        Timsort сливает уже упорядоченные участки за линейное время, так
+        что пачка стоит O(n + k log k), а не O(n) на каждую запись.
+        """
+        if len(rows) == 1:
+            self.add(rows[0])
+            return
+        self._keys.extend((row.get(self.column), row["ID"]) for row in rows)
+        self._keys.sort()
+        for row in rows:
+            self._rows[row["ID"]] = row
+
+    def remove_many(self, rows: list[dict]) -> None:
+        """
+        Удаляет пачку записей: позиции ключей находятся двоичным поиском, а
+        список собирается заново срезами между ними - один проход вместо
+        сдвига списка на каждую запись.
+        """
+        if len(rows) == 1:
+            self.remove(rows[0])
+            return
+        positions = []
+        for key in sorted({(row.get(self.column), row["ID"]) for row in rows}):
+            pos = bisect.bisect_left(self._keys, key)
+            if pos < len(self._keys) and self._keys[pos] == key:
+                positions.append(pos)
+                self._rows.pop(key[1], None)
+        kept, start = [], 0
+        for pos in positions:
+            kept.extend(self._keys[start:pos])
+            start = pos + 1
+        kept.extend(self._keys[start:])
+        self._keys = kept
+
+    def lookup(self, value) -> list[dict]:
+        return self.range(value, value)
+
+    def range(self, low=None, high=None,
+              include_low: bool = True, include_high: bool = True) -> list[dict]:
+        """Возвращает записи со значением столбца в диапазоне [low, high]."""
+        if low is None:
+            start = 0
+        elif include_low:
+            start = bisect.bisect_left(self._keys, (low,))
+        else:
+            start = bisect.bisect_right(self._keys, (low, float("inf")))
+
+        if high is None:
+            end = len(self._keys)
+        elif include_high:
+            end = bisect.bisect_right(self._keys, (high, float("inf")))
+        else:
+            end = bisect.bisect_left(self._keys, (high,))
+
+        return [self._rows[row_id] for _, row_id in self._keys[start:end]]
+
+    def ordered(self, descending: bool = False):
+        """
+        Генератор записей в порядке значения столбца (для ORDER BY).
+        Записи с равными значениями идут по возрастанию ID в обоих
+        направлениях - как после устойчивой сортировки таблицы.
+        """
+        if not descending:
+            for _, row_id in self._keys:
+                yield self._rows[row_id]
+            return
+
+        end = len(self._keys)
+        while end > 0:
+            start = bisect.bisect_left(self._keys, (self._keys[end - 1][0],), 0, end)
+            for _, row_id in self._keys[start:end]:
+                yield self._rows[row_id]
+            end = start
+
+
+class PrimaryKeyIndex:
+    """
+    Индекс первичного ключа: ID -> запись. Строится для каждой таблицы
+    автоматически и дает прямой доступ к записи по ID.
+    """
+
+    kind = "primary"
+
+    def __init__(self, column: str = "ID", col_type: str = "int"):
+        self.column = column
+        self.col_type = col_type
+        self._rows = {}
+
+    def add(self, row: dict) -> None:
+        self._rows[row["ID"]] = row
+
+    def remove(self, row: dict) -> None:
+        self._rows.pop(row["ID"], None)
+
+    def bulk_load(self, rows: list[dict]) -> None:
+        self._rows = {row["ID"]: row for row in rows}
+
+    def add_many(self, rows: list[dict]) -> None:
+        for row in rows:
+            self._rows[row["ID"]] = row
+
+    def remove_many(self, rows: list[dict]) -> None:
+        for row in rows:
+            self._rows.pop(row["ID"], None)
+
+    def get(self, row_id: int) -> dict | None:
+        return self._rows.get(row_id)
+
+    def lookup(self, value) -> list[dict]:
+        row = self._rows.get(value)
+        return [row] if row is not None else []
+
+
+INDEX_CLASSES = {
+    HashIndex.kind: HashIndex,
+    SortedIndex.kind: SortedIndex,
+}
+
+
+def build_indexes(metadata: dict, table_name: str, table_data: list) -> dict:
+    """
+    Строит в памяти индексы таблицы по описаниям из метаданных.
+    Возвращает словарь {столбец: индекс}.
+    """
+    table_meta = metadata[table_name]
+    col_types = {col["name"]: col["type"] for col in table_meta["columns"]}
+
+    indexes = {}
+    for column, kind in table_meta.get("indexes", {}).items():
+        index = INDEX_CLASSES[kind](column, col_types[column])
+        index.bulk_load(table_data)
+        indexes[column] = index
+
+    # Явный индекс по ID (например, упорядоченный) заменяет первичный
+    if "ID" not in indexes:
+        primary = PrimaryKeyIndex()
+        primary.bulk_load(table_data)
+        indexes["ID"] = primary
+    return indexes
+
+
+def add_row(indexes: dict | None, row: dict) -> None:
+    """Добавляет запись во все индексы таблицы."""
+    for index in (indexes or {}).values():
+        index.add(row)
+
+
+def remove_row(indexes: dict | None, row: dict) -> None:
+    """Удаляет запись из всех индексов таблицы."""
+    for index in (indexes or {}).values():
+        index.remove(row)
+
+
+def add_rows(indexes: dict | None, rows: list[dict]) -> None:
+    """Добавляет пачку записей во все индексы таблицы."""
+    for index in (indexes or {}).values():
+        index.add_many(rows)
+
+
+def remove_rows(indexes: dict | None, rows: list[dict]) -> None:
+    """Удаляет пачку записей из всех индексов таблицы."""
+    for index in (indexes or {}).values():
+        index.remove_many(rows)
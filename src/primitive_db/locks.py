@@ -0,0 +1,114 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировок между процессами нет
+    fcntl = None
+
+
+class FileLock:
+    """
+    Блокировка файла между процессами (fcntl.flock) с режимами "shared"
+    (много читателей) и "exclusive" (один владелец). Внутри процесса
+    захваты считаются: повторный захват не блокирует, а исключительный
+    захват поверх разделяемого повышает режим до выхода из него.
+    Без fcntl (Windows) блокировка ничего не делает. Счетчики захватов
+    общие для потоков процесса и меняются под внутренней блокировкой.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        self._shared = 0
+        self._exclusive = 0
+        self._mode = None
+        self._guard = threading.RLock()
+
+    def _open(self) -> int:
+        return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _sync_mode(self) -> None:
+        if self._exclusive:
+            mode = "exclusive"
+        elif self._shared:
+            mode = "shared"
+        else:
+            mode = None
+        if mode == self._mode or fcntl is None:
+            self._mode = mode
+            return
+
+        if self._fd is None:
+            self._fd = self._open()
+        if mode == "exclusive":
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        elif mode == "shared":
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
+        else:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mode = mode
+
+    def acquire(self, exclusive: bool = False) -> None:
+        with self._guard:
+            if exclusive:
+                self._exclusive += 1
+            else:
+                self._shared += 1
+            self._sync_mode()
+
+    def try_acquire(self, exclusive: bool = False) -> bool:
+        """Захватывает блокировку без ожидания. False - она занята."""
+        with self._guard:
+            if fcntl is not None and not self.held:
+                if self._fd is None:
+                    self._fd = self._open()
+                flag = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+                try:
+                    fcntl.flock(self._fd, flag | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False
+                self._mode = "exclusive" if exclusive else "shared"
+            self.acquire(exclusive)
+            return True
+
+    def release(self, exclusive: bool = False) -> None:
+        with self._guard:
+            if exclusive:
+                self._exclusive -= 1
+            else:
+                self._shared -= 1
+            self._sync_mode()
+
+    @property
+    def held(self) -> bool:
+        return self._mode is not None
+
+    def shared(self) -> "_Hold":
+        return _Hold(self, exclusive=False)
+
+    def exclusive(self) -> "_Hold":
+        return _Hold(self, exclusive=True)
+
+    def close(self) -> None:
+        with self._guard:
+            self._shared = self._exclusive = 0
+            self._sync_mode()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+class _Hold:
+    """Контекст захвата блокировки: with lock.shared(): ..."""
+
+    def __init__(self, lock: FileLock, exclusive: bool):
+        self.lock = lock
+        self.exclusive = exclusive
+
+    def __enter__(self) -> FileLock:
+        self.lock.acquire(self.exclusive)
+        return self.lock
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.lock.release(self.exclusive)
@@ -1,10 +1,86 @@
 #!/usr/bin/env python3
-from src.primitive_db.engine import run
+import argparse
+import sys
+
+from src.primitive_db import metrics
+from src.primitive_db.constants import FLUSH_INTERVAL, SERVER_HOST, SERVER_PORT
+from src.primitive_db.decorators import set_interactive
+from src.primitive_db.engine import run, run_script
+from src.primitive_db.server import serve
+from src.primitive_db.session import Session
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(
+        prog="project",
+        description="Примитивная база данных. Без аргументов запускается "
+                    "интерактивный режим, при перенаправленном stdin команды "
+                    "читаются из него.",
+    )
+    arg_parser.add_argument(
+        "--exec", metavar="FILE", dest="script",
+        help="выполнить команды из файла (по одной на строку) и выйти",
+    )
+    arg_parser.add_argument(
+        "-y", "--yes", action="store_true",
+        help="не запрашивать подтверждения (удаление таблиц и записей)",
+    )
+    arg_parser.add_argument(
+        "--flush-interval", metavar="SECONDS", type=float,
+        default=FLUSH_INTERVAL,
+        help="как часто сохранять изменения на диск (0 - после каждой команды)",
+    )
+    arg_parser.add_argument(
+        "--trace", metavar="FILE",
+        help="писать в FILE (JSONL) время каждой команды по фазам",
+    )
+
+    modes = arg_parser.add_subparsers(dest="mode")
+    serve_parser = modes.add_parser(
+        "serve", help="запустить сетевой сервер для многих клиентов",
+        description="Сервер принимает команды по TCP или Unix-сокету: "
+                    "одна команда на строку.",
+    )
+    serve_parser.add_argument("--host", default=SERVER_HOST,
+                              help=f"адрес (по умолчанию {SERVER_HOST})")
+    serve_parser.add_argument("--port", type=int, default=SERVER_PORT,
+                              help=f"порт (по умолчанию {SERVER_PORT})")
+    serve_parser.add_argument("--unix", metavar="PATH",
+                              help="слушать Unix-сокет вместо TCP")
+    return arg_parser.parse_args(argv)
 
 
 def main():
-    run()
+    args = parse_args()
+
+    if args.yes:
+        set_interactive(False)
+    if args.trace:
+        try:
+            metrics.registry.set_trace(args.trace)
+        except OSError as e:
+            print(f"Ошибка: не удалось открыть файл {args.trace}: {e.strerror}")
+            sys.exit(1)
+
+    session = Session(flush_interval=args.flush_interval)
+
+    if args.mode == "serve":
+        serve(session, args.host, args.port, args.unix)
+    elif args.script:
+        try:
+            script = open(args.script, "r", encoding="utf-8")
+        except OSError as e:
+            print(f"Ошибка: не удалось открыть файл {args.script}: {e.strerror}")
+            sys.exit(1)
+        with script:
+            run_script(script, session)
+    elif not sys.stdin.isatty():
+        # readline, а не итерация по файлу: подтверждения (prompt) читают
+        # ответы из того же stdin
+        run_script(iter(sys.stdin.readline, ""), session)
+    else:
+        run(session)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
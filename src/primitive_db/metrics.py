@@ -0,0 +1,223 @@
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Фазы выполнения команды. Время фазы считается "собственным": вложенные
+# фазы (например, загрузка таблицы внутри выполнения) из него вычитаются,
+# поэтому сумма фаз равна времени команды
+PHASES = ("parse", "load", "execute", "save", "render")
+
+# Фазы вне команд (сохранение при выходе, восстановление при запуске)
+NO_COMMAND = "(сессия)"
+
+
+class Histogram:
+    """
+    Счетчик и гистограмма длительностей. Корзины - степени двойки в
+    микросекундах, так что память не растет с числом замеров, а перцентили
+    оцениваются с точностью до корзины (не хуже чем вдвое).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        bucket = int(seconds * 1_000_000).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, fraction: float) -> float:
+        """Верхняя граница корзины, в которую попадает перцентиль (секунды)."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min((1 << bucket) / 1_000_000, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 6),
+            "mean_ms": round(self.total / self.count * 1000, 4) if self.count else 0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 4),
+            "p95_ms": round(self.percentile(0.95) * 1000, 4),
+            "p99_ms": round(self.percentile(0.99) * 1000, 4),
+            "max_ms": round(self.max * 1000, 4),
+            "buckets_us": {str(1 << bucket): n
+                           for bucket, n in sorted(self.buckets.items())},
+        }
+
+
+class Metrics:
+    """
+    Метрики выполнения команд: для каждой команды - гистограмма полного
+    времени и гистограммы по фазам (parse/load/execute/save/render).
+    Фазы отмечаются декоратором decorators.measure, команды - контекстом
+    command(); внутри команды время фазы суммируется и попадает в
+    гистограмму одним замером на команду. Если задан файл трассировки,
+    каждая команда дописывается в него строкой JSON с длительностями фаз.
+    Команды могут выполняться в разных потоках (сервер): текущая команда и
+    стек фаз у каждого потока свои, общие гистограммы меняются под блокировкой.
+    """
+
+    def __init__(self):
+        self.commands = {}
+        self.phases = {}
+        self.trace_path = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def _current_phases(self) -> dict | None:
+        return getattr(self._local, "phases", None)
+
+    @_current_phases.setter
+    def _current_phases(self, phases: dict | None) -> None:
+        self._local.phases = phases
+
+    @property
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def command(self):
+        """
+        Замеряет одну команду целиком и ее фазы. Имя команды становится
+        известно после разбора строки, поэтому его задают внутри блока:
+        current["name"] = ... Команда без имени (пустая строка) не учитывается.
+        """
+        outer = self._current_phases
+        current = {"name": None}
+        self._current_phases = {}
+        started = time.perf_counter()
+        try:
+            yield current
+        finally:
+            elapsed = time.perf_counter() - started
+            phases = self._current_phases
+            self._current_phases = outer
+            if current["name"] is not None:
+                self._finish(current["name"], started, elapsed, phases)
+
+    def _finish(self, name: str, started: float, elapsed: float,
+                phases: dict) -> None:
+        with self._lock:
+            self.commands.setdefault(name, Histogram()).add(elapsed)
+            # Один замер фазы на команду: суммарное время фазы в этой команде
+            for phase, seconds in phases.items():
+                self.phases.setdefault((name, phase), Histogram()).add(seconds)
+            if self.trace_path:
+                self._trace(name, started, elapsed, phases)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замеряет собственное время фазы (без вложенных фаз)."""
+        # [начало, время вложенных фаз]
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            if self._stack:
+                self._stack[-1][1] += elapsed
+            self.record(name, elapsed - frame[1])
+
+    def record(self, phase: str, seconds: float) -> None:
+        if self._current_phases is None:
+            # Вне команд: сохранение при выходе, восстановление при запуске
+            with self._lock:
+                self.phases.setdefault((NO_COMMAND, phase),
+                                       Histogram()).add(seconds)
+        else:
+            self._current_phases[phase] = (
+                self._current_phases.get(phase, 0.0) + seconds
+            )
+
+    def _trace(self, name: str, started: float, elapsed: float,
+               phases: dict) -> None:
+        entry = {
+            "ts": round(time.time(), 6),
+            "command": name,
+            "total_ms": round(elapsed * 1000, 4),
+            "phases_ms": {phase: round(seconds * 1000, 4)
+                          for phase, seconds in phases.items()},
+        }
+        with open(self.trace_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def set_trace(self, path: str | None) -> None:
+        """Включает (путь к файлу) или выключает (None) трассировку JSONL."""
+        if path:
+            # Проверяем, что файл доступен для записи, до первой команды
+            open(path, "a", encoding="utf-8").close()
+        self.trace_path = path
+
+    def reset(self) -> None:
+        with self._lock:
+            self.commands.clear()
+            self.phases.clear()
+
+    def snapshot(self) -> dict:
+        """Все метрики в виде словаря (для вывода и экспорта)."""
+        result = {}
+        with self._lock:
+            for name, hist in self.commands.items():
+                result[name] = {"total": hist.to_dict(), "phases": {}}
+            for (name, phase), hist in self.phases.items():
+                entry = result.setdefault(name, {"total": None, "phases": {}})
+                entry["phases"][phase] = hist.to_dict()
+        return result
+
+    def export(self, path: str) -> int:
+        """
+        Дописывает текущие метрики в файл JSONL: строка на пару
+        (команда, фаза). Возвращает число записанных строк.
+        """
+        lines = []
+        ts = round(time.time(), 6)
+        for name, entry in self.snapshot().items():
+            if entry["total"] is not None:
+                lines.append({"ts": ts, "command": name, "phase": "total",
+                              **entry["total"]})
+            for phase, stats in entry["phases"].items():
+                lines.append({"ts": ts, "command": name, "phase": phase, **stats})
+        with open(path, "a", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        return len(lines)
+
+
+def profile(func, *args, limit: int = 20, **kwargs):
+    """
+    Выполняет func под cProfile. Возвращает (результат, отчет) - отчет
+    содержит limit самых затратных функций по суммарному времени.
+    """
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(func, *args, **kwargs)
+    finally:
+        out = io.StringIO()
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(limit)
+    return result, out.getvalue()
+
+
+# Метрики процесса: одни на все сессии и команды
+registry = Metrics()
@@ -0,0 +1,58 @@
+import heapq
+from operator import itemgetter
+
+from src.primitive_db.exceptions import ValidationError
+
+# ORDER BY - список пар (столбец, по_убыванию): [("age", True), ("name", False)]
+
+
+class _Descending:
+    """Обертка значения с обратным порядком - для ORDER BY a, b DESC."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: "_Descending") -> bool:
+        return self.value == other.value
+
+
+def validate(order_by: list[tuple], columns) -> None:
+    """Проверяет, что столбцы ORDER BY есть среди столбцов результата."""
+    for col, _ in order_by:
+        if col not in columns:
+            raise ValidationError(f"Столбец {col} не существует.")
+
+
+def sort_key(order_by: list[tuple]) -> tuple:
+    """
+    Ключ сортировки и флаг reverse. Если все столбцы в одном направлении,
+    ключ - обычный itemgetter, иначе убывающие значения оборачиваются.
+    """
+    columns = [col for col, _ in order_by]
+    directions = {descending for _, descending in order_by}
+    if len(directions) == 1:
+        return itemgetter(*columns), directions.pop()
+
+    def key(row: dict) -> tuple:
+        return tuple(_Descending(row[col]) if descending else row[col]
+                     for col, descending in order_by)
+    return key, False
+
+
+def sort_rows(rows, order_by: list[tuple], limit: int | None = None) -> list:
+    """
+    Упорядочивает поток записей. С limit нужны только первые limit записей:
+    их отбирает куча размера limit за O(n log limit) и O(limit) памяти,
+    без сортировки всего потока. Равные записи сохраняют исходный порядок.
+    """
+    key, reverse = sort_key(order_by)
+    if limit is None:
+        return sorted(rows, key=key, reverse=reverse)
+    if reverse:
+        return heapq.nlargest(limit, rows, key=key)
+    return heapq.nsmallest(limit, rows, key=key)
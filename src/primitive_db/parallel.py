@@ -0,0 +1,181 @@
+"""
+Параллельный полный перебор таблицы по условию WHERE.
+
+Таблица делится на куски, каждый кусок фильтрует отдельный процесс из
+пула (ProcessPoolExecutor), так что сканирование больших таблиц не
+упирается в GIL. В процессы передается только нужное условию: узел
+выражения WHERE (обычный кортеж) и значения упомянутых в нем столбцов.
+Предикат компилируется в каждом процессе заново, обратно возвращаются
+позиции подходящих записей - сами записи остаются в памяти сессии, и
+update/delete меняют именно их. Результаты кусков склеиваются в исходном
+порядке записей.
+
+Куски всегда передаются столбцами: у колоночной таблицы это срезы ее
+массивов, а у строчной - срезы колоночного снимка нужных столбцов. Снимок
+строится один раз (без цикла Python по записям) и живет до первого
+изменения таблиц через core (invalidate), так что повторные запросы к
+неизменной таблице только копируют срезы массивов.
+"""
+import os
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from operator import itemgetter
+
+from src.primitive_db import predicates
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.constants import (
+    PARALLEL_CHUNKS_PER_WORKER,
+    PARALLEL_SCAN_ROWS,
+    PARALLEL_SNAPSHOT_TABLES,
+    PARALLEL_WORKERS,
+)
+
+_pool = None
+_pool_workers = 0
+
+# Колоночные снимки строчных таблиц: {id(таблицы): (таблица, {столбец:
+# значения})}. Ссылка на таблицу не дает ее id достаться другому списку
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def worker_count() -> int:
+    """Число процессов пула: PARALLEL_WORKERS или число доступных ядер."""
+    if PARALLEL_WORKERS:
+        return PARALLEL_WORKERS
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def enabled(table_data) -> bool:
+    """Стоит ли сканировать таблицу параллельно (иначе - обычный перебор)."""
+    return (PARALLEL_SCAN_ROWS > 0 and len(table_data) >= PARALLEL_SCAN_ROWS
+            and worker_count() > 1)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    workers = worker_count()
+    if _pool is None or _pool_workers != workers:
+        shutdown()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown() -> None:
+    """Останавливает пул процессов (он создается заново при следующем скане)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+    invalidate()
+
+
+def invalidate() -> None:
+    """
+    Сбрасывает колоночные снимки строчных таблиц. Вызывается при каждом
+    изменении записей в памяти (core.insert, update, delete).
+    """
+    with _snapshots_lock:
+        _snapshots.clear()
+
+
+def _column(rows: list[dict], name: str, col_type: str):
+    # map/itemgetter обходят записи в C, без байткода; array из списка
+    # строится быстрее, чем из итератора
+    values = list(map(itemgetter(name), rows))
+    if col_type == "int":
+        try:
+            return array("q", values)
+        except OverflowError:
+            pass
+    return values
+
+
+def _snapshot(table_data: list[dict], types: dict) -> dict:
+    """Столбцы types строчной таблицы (по позициям записей в списке)."""
+    with _snapshots_lock:
+        _, columns = _snapshots.get(id(table_data), (None, {}))
+        missing = [name for name in types if name not in columns]
+        if missing:
+            if len(_snapshots) >= PARALLEL_SNAPSHOT_TABLES:
+                _snapshots.pop(next(iter(_snapshots)))
+            columns = dict(columns)
+            for name in missing:
+                columns[name] = _column(table_data, name, types[name])
+            _snapshots[id(table_data)] = (table_data, columns)
+        return columns
+
+
+def _filter_chunk(node: tuple, col_types: dict, cast, columns: dict,
+                  live, start: int) -> list[int]:
+    """
+    Выполняется в процессе пула: компилирует предикат и возвращает позиции
+    (от начала таблицы) подходящих записей куска. live - маска живых
+    записей колоночной таблицы или None.
+    """
+    predicate = predicates.compile_predicate(node, col_types, cast)
+    names = list(columns)
+    found = []
+    for offset, row in enumerate(zip(*columns.values())):
+        if live is not None and not live[offset]:
+            continue
+        if predicate(dict(zip(names, row))):
+            found.append(start + offset)
+    return found
+
+
+def _chunks(size: int, workers: int):
+    count = max(1, workers * PARALLEL_CHUNKS_PER_WORKER)
+    step = -(-size // count)
+    for start in range(0, size, step):
+        yield start, min(start + step, size)
+
+
+def _tasks(table_data, types: dict, workers: int):
+    """Аргументы _filter_chunk для каждого куска таблицы: (столбцы, маска, начало)."""
+    names = list(types)
+    if isinstance(table_data, ColumnarTable):
+        for start, stop in _chunks(table_data.physical_size(), workers):
+            columns, live = table_data.column_slices(names, start, stop)
+            yield columns, live, start
+        return
+
+    snapshot = _snapshot(table_data, types)
+    for start, stop in _chunks(len(table_data), workers):
+        yield {name: snapshot[name][start:stop] for name in names}, None, start
+
+
+def scan(table_data, node: tuple, col_types: dict, cast):
+    """
+    Генератор записей table_data, подходящих под условие node, в исходном
+    порядке. Куски фильтруются в пуле процессов; если пул недоступен
+    (нет поддержки процессов, упал рабочий процесс), перебор идет здесь.
+    """
+    names = sorted(predicates.columns_of(node))
+    types = {name: col_types[name] for name in names}
+    if isinstance(table_data, ColumnarTable):
+        row_at = table_data.row_at
+    else:
+        row_at = table_data.__getitem__
+
+    try:
+        pool = _get_pool()
+        futures = [
+            pool.submit(_filter_chunk, node, types, cast, columns, live, start)
+            for columns, live, start in _tasks(table_data, types, _pool_workers)
+        ]
+        positions = [future.result() for future in futures]
+    except (OSError, BrokenProcessPool):
+        shutdown()
+        predicate = predicates.compile_predicate(node, col_types, cast)
+        yield from filter(predicate, table_data)
+        return
+
+    for chunk in positions:
+        for pos in chunk:
+            yield row_at(pos)
@@ -1,46 +1,316 @@
+import re
+
+from src.primitive_db.decorators import measure
+from src.primitive_db.exceptions import QuerySyntaxError
+
+_TOKEN_RE = re.compile(r"(<=|>=|!=|<>|=|<|>|\(|\)|,)")
+_VALUES_TOKEN_RE = re.compile(r"(\(|\)|,)")
+_OPERATORS = {"=", "!=", "<>", "<", "<=", ">", ">="}
+_SELECT_ITEM_RE = re.compile(
+    r"^(\w+)\s*\(\s*(\*|[\w.]+)\s*\)$|^([\w.]+)$"
+)
+_PARTITION_USAGE = ("Используйте: partition by hash(<столбец>) into <n> "
+                    "или partition by range(<столбец>) [size <n>]")
+_PARTITION_RE = re.compile(
+    r"^(\w+)\s*\(\s*(\w+)\s*\)(?:\s+(into|size)\s+(\d+))?$"
+)
+# Ключевые слова, которые могут идти после условия WHERE
+CLAUSE_KEYWORDS = {"limit", "offset", "format", "page", "group", "order"}
+
+
+class Arg(str):
+    """
+    Токен команды из split_args. Равен токену shlex.split, но помнит, какие
+    его части были в кавычках: parts - [(текст, в_кавычках), ...].
+    """
+
+    parts: tuple = ()
+
+    def __new__(cls, parts: list[tuple[str, bool]]):
+        arg = super().__new__(cls, "".join(text for text, _ in parts))
+        arg.parts = tuple(parts)
+        return arg
+
+
+class Literal(str):
+    """Значение из кавычек: не дробится по операторам и не ключевое слово."""
+
+
+def split_args(line: str) -> list[str]:
+    """
+    Разбивает строку команды на токены по правилам shlex.split (POSIX):
+    пробелы разделяют токены, '...' и "..." - литералы, \\ экранирует
+    символ. Непарная кавычка - ValueError, как у shlex.
+    """
+    args, parts, text = [], None, []
+
+    def flush_part():
+        if text:
+            parts.append(("".join(text), False))
+            text.clear()
+
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if char.isspace():
+            if parts is not None:
+                flush_part()
+                args.append(Arg(parts))
+                parts = None
+            i += 1
+            continue
+        if parts is None:
+            parts = []
+        if char in "'\"":
+            end = i + 1
+            chunk = []
+            while True:
+                if end >= len(line):
+                    raise ValueError("No closing quotation")
+                if line[end] == char:
+                    break
+                if char == '"' and line[end] == "\\" \
+                        and line[end + 1:end + 2] in ('"', "\\"):
+                    end += 1
+                chunk.append(line[end])
+                end += 1
+            flush_part()
+            parts.append(("".join(chunk), True))
+            i = end + 1
+            continue
+        if char == "\\":
+            if i + 1 >= len(line):
+                raise ValueError("No escaped character")
+            flush_part()
+            parts.append((line[i + 1], True))
+            i += 2
+            continue
+        text.append(char)
+        i += 1
+    if parts is not None:
+        flush_part()
+        args.append(Arg(parts))
+    return args
+
+
 def clean_value(val: str) -> str:
     """Удаляет лишние кавычки и запятые из значения."""
+    if isinstance(val, Literal):
+        return str(val)
     return val.strip('",\'')
 
 
-def parse_where_clause(args: list[str]) -> dict:
+def _split_parts(parts, token_re: re.Pattern) -> list[str]:
+    tokens, word, literal = [], "", False
+    for text, quoted in parts:
+        if quoted:
+            word, literal = word + text, True
+            continue
+        for i, piece in enumerate(token_re.split(text)):
+            if i % 2 == 0:
+                word += piece
+                continue
+            if word or literal:
+                tokens.append(Literal(word) if literal else word)
+            tokens.append(piece)
+            word, literal = "", False
+    if word or literal:
+        tokens.append(Literal(word) if literal else word)
+    return tokens
+
+
+def _tokenize(args: list[str], token_re: re.Pattern = _TOKEN_RE) -> list[str]:
     """
-    Парсит часть команды после WHERE.
-    Ожидается формат: ['col', '=', 'val']
-    Поддерживает пока только одно условие.
+    Дробит токены команды по операторам, скобкам и запятым:
+    ['age>=5', 'and', 'name', 'in', '(a,', 'b)'] ->
+    ['age', '>=', '5', 'and', 'name', 'in', '(', 'a', ',', 'b', ')']
+    Части в кавычках (токены split_args) не дробятся и становятся Literal:
+    name="a,b" -> ['name', '=', Literal('a,b')].
     """
-    if not args or len(args) < 3:
-        return {}
+    tokens = []
+    for arg in args:
+        if isinstance(arg, Arg) and any(quoted for _, quoted in arg.parts):
+            tokens.extend(_split_parts(arg.parts, token_re))
+        else:
+            tokens.extend(t for t in token_re.split(arg) if t and t.strip())
+    return tokens
 
-    # Ищем индекс слова where, если оно попало в args
-    start_idx = 0
-    if "where" in args:
-        start_idx = args.index("where") + 1
 
-    if start_idx + 2 >= len(args):
-        return {}
+def _keyword_index(args: list[str], word: str) -> int | None:
+    """Позиция ключевого слова среди токенов, не считая слов в кавычках."""
+    for i, arg in enumerate(args):
+        if arg == word and not (isinstance(arg, Arg) and arg.parts[0][1]):
+            return i
+    return None
+
+
+class _WhereParser:
+    """
+    Рекурсивный спуск по грамматике условия WHERE:
+        expr      := and_expr ("or" and_expr)*
+        and_expr  := not_expr ("and" not_expr)*
+        not_expr  := "not" not_expr | "(" expr ")" | predicate
+        predicate := col op value
+                   | col ["not"] "in" "(" value ("," value)* ")"
+                   | col ["not"] "between" value "and" value
+                   | col ["not"] "like" value
+    """
+
+    def __init__(self, tokens: list[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self) -> str | None:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None
+
+    def _peek_word(self) -> str | None:
+        """Следующий токен-слово или оператор (значение в кавычках - None)."""
+        token = self._peek()
+        if token is None or isinstance(token, Literal):
+            return None
+        return token.lower()
+
+    def _next(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise QuerySyntaxError("Неожиданный конец условия WHERE.")
+        self.pos += 1
+        return token
+
+    def _expect(self, word: str) -> None:
+        token = self._next()
+        if isinstance(token, Literal) or token.lower() != word:
+            raise QuerySyntaxError(f"Ожидалось '{word}', получено '{token}'.")
+
+    def parse_expr(self) -> tuple:
+        parts = [self.parse_and()]
+        while self._peek_word() == "or":
+            self.pos += 1
+            parts.append(self.parse_and())
+        return parts[0] if len(parts) == 1 else ("or", parts)
+
+    def parse_and(self) -> tuple:
+        parts = [self.parse_not()]
+        while self._peek_word() == "and":
+            self.pos += 1
+            parts.append(self.parse_not())
+        return parts[0] if len(parts) == 1 else ("and", parts)
+
+    def parse_not(self) -> tuple:
+        if self._peek_word() == "not":
+            self.pos += 1
+            return ("not", self.parse_not())
+        if self._peek_word() == "(":
+            self.pos += 1
+            node = self.parse_expr()
+            self._expect(")")
+            return node
+        return self.parse_predicate()
+
+    def parse_predicate(self) -> tuple:
+        col = self._next()
+        if isinstance(col, Literal) or col in _OPERATORS or col in "(),":
+            raise QuerySyntaxError(
+                f"Ожидалось имя столбца, получено '{col}'."
+            )
+
+        negate = False
+        if self._peek_word() == "not":
+            self.pos += 1
+            negate = True
+
+        op = self._next()
+        word = "" if isinstance(op, Literal) else op.lower()
+        if word == "in":
+            node = ("in", col, self._parse_list())
+        elif word == "between":
+            low = clean_value(self._next())
+            self._expect("and")
+            node = ("between", col, low, clean_value(self._next()))
+        elif word == "like":
+            node = ("like", col, clean_value(self._next()))
+        elif word in _OPERATORS and not negate:
+            op = "!=" if op == "<>" else op
+            node = ("cmp", col, op, clean_value(self._next()))
+        else:
+            raise QuerySyntaxError(f"Неизвестный оператор: {op}")
+
+        return ("not", node) if negate else node
+
+    def _parse_list(self) -> list[str]:
+        self._expect("(")
+        values = [clean_value(self._next())]
+        while self._peek_word() == ",":
+            self.pos += 1
+            values.append(clean_value(self._next()))
+        self._expect(")")
+        return values
 
-    col = args[start_idx]
-    op = args[start_idx + 1]
-    val = args[start_idx + 2]
 
-    if op != "=":
-        return {}  # Пока поддерживаем только равенство
+def _split_where(args: list[str]) -> tuple[tuple | None, list[str]]:
+    """
+    Разбирает условие после WHERE. Возвращает узел выражения (или None,
+    если WHERE нет) и токены, оставшиеся после условия.
+    """
+    where_pos = _keyword_index(args, "where")
+    if where_pos is None:
+        return None, args
+
+    tokens = _tokenize(args[where_pos + 1:])
+    if not tokens:
+        raise QuerySyntaxError("После WHERE не указано условие.")
+
+    where_parser = _WhereParser(tokens)
+    node = where_parser.parse_expr()
+    rest = tokens[where_parser.pos:]
+    if rest and (isinstance(rest[0], Literal)
+                 or rest[0].lower() not in CLAUSE_KEYWORDS):
+        raise QuerySyntaxError(
+            f"Не удалось разобрать условие WHERE около '{rest[0]}'."
+        )
+    return node, rest
+
+
+@measure("parse")
+def parse_where_clause(args: list[str]) -> tuple | None:
+    """
+    Парсит часть команды после WHERE в дерево выражения.
+    Поддерживает AND/OR/NOT, скобки, операторы = != <> < <= > >=,
+    IN (...), BETWEEN ... AND ..., LIKE (с шаблонами % и _).
+    Возвращает None, если WHERE в команде нет.
+    При ошибке синтаксиса выбрасывает ValueError - "пустое" условие
+    больше не превращается молча в выборку всей таблицы.
+    """
+    return _split_where(args)[0]
 
-    return {col: clean_value(val)}
 
+def parse_where_expression(text: str) -> tuple | None:
+    """Парсит условие WHERE, заданное отдельной строкой (без слова where)."""
+    try:
+        args = split_args(text)
+    except ValueError:
+        raise QuerySyntaxError("Непарные кавычки в условии WHERE.")
+    if not args:
+        return None
+    return parse_where_clause(["where", *args])
 
+
+@measure("parse")
 def parse_set_clause(args: list[str]) -> dict:
     """
     Парсит часть команды для UPDATE (SET col = val).
     Возвращает словарь изменений.
     Останавливается, если встречает 'where'.
     """
-    if "set" not in args:
+    set_pos = _keyword_index(args, "set")
+    if set_pos is None:
         return {}
 
-    start = args.index("set") + 1
-    end = args.index("where") if "where" in args else len(args)
+    start = set_pos + 1
+    end = _keyword_index(args, "where")
+    end = len(args) if end is None else end
 
     set_part = args[start:end]
     updates = {}
@@ -58,18 +328,212 @@ def parse_set_clause(args: list[str]) -> dict:
     return updates
 
 
+def parse_partition(args: list[str]) -> tuple[list[str], dict | None]:
+    """
+    Отделяет от определений столбцов create_table схему секционирования:
+        <столбцы> partition by hash(<кол>) into <n>
+        <столбцы> partition by range(<кол>) [size <n>]
+    Возвращает (определения столбцов, {"method", "column", "count"|"size"}
+    или None). Допустимость метода и столбца проверяет core.create_table.
+    """
+    if "partition" not in args:
+        return args, None
+
+    pos = args.index("partition")
+    if args[pos + 1:pos + 2] != ["by"]:
+        raise QuerySyntaxError(_PARTITION_USAGE)
+    match = _PARTITION_RE.match(" ".join(args[pos + 2:]))
+    if match is None:
+        raise QuerySyntaxError(_PARTITION_USAGE)
+    method, column, keyword, number = match.groups()
+    spec = {"method": method, "column": column}
+    if keyword is not None:
+        spec["count" if keyword == "into" else "size"] = int(number)
+    return args[:pos], spec
+
+
 def parse_insert_values(raw_args: list[str]) -> list[str]:
     """
     Вытаскивает значения из команды insert.
     Работает с сырым списком токенов, ищет слово `values` и обрабатывает всё что после.
     """
-    if "values" not in raw_args:
+    return [value for row in parse_insert_rows(raw_args) for value in row]
+
+@measure("parse")
+def parse_insert_rows(raw_args: list[str]) -> list[list[str]]:
+    """
+    Вытаскивает одну или несколько строк значений из команды insert:
+    insert into <table> values (...), (...), ...
+    Каждая группа в скобках - отдельная запись.
+    """
+    val_idx = _keyword_index(raw_args, "values")
+    if val_idx is None:
         return []
 
-    val_idx = raw_args.index("values") + 1
-    # Собираем всё что после values в одну строку, чтобы убрать скобки
-    values_raw = " ".join(raw_args[val_idx:])
-    values_raw = values_raw.replace("(", "").replace(")", "")
+    # Значения дробятся только по скобкам и запятым вне кавычек, слова
+    # одного значения склеиваются через пробел
+    rows, values, words = [], [], []
+
+    def end_value():
+        if len(words) == 1 and isinstance(words[0], Literal):
+            values.append(str(words[0]))
+        else:
+            values.append(clean_value(" ".join(words).strip()))
+        words.clear()
+
+    in_row = False
+    for token in _tokenize(raw_args[val_idx + 1:], _VALUES_TOKEN_RE):
+        if isinstance(token, Literal):
+            words.append(token)
+        elif token == "(":
+            in_row, values[:] = True, []
+            words.clear()
+        elif token == ")" and in_row:
+            end_value()
+            rows.append(list(values))
+            in_row = False
+        elif token == "," and (in_row or not rows):
+            end_value()
+        elif token != ",":
+            words.append(token)
+    if not rows:
+        # Значения без скобок - одна запись
+        end_value()
+        rows.append(values)
+    return rows
+
+
+@measure("parse")
+def parse_select_list(args: list[str]) -> tuple[list[tuple] | None, str]:
+    """
+    Парсит начало SELECT: select [<список>] from <таблица>.
+    Элементы списка - столбцы и агрегаты count(*), sum(col), min, max, avg.
+    Возвращает (элементы или None для всех столбцов, имя таблицы).
+    """
+    if "from" not in args or args.index("from") + 1 >= len(args):
+        raise QuerySyntaxError("Используйте: select [<столбцы>] from <таблица>")
+
+    from_pos = args.index("from")
+    table_name = args[from_pos + 1]
+    text = " ".join(args[1:from_pos]).strip()
+    if not text or text == "*":
+        return None, table_name
+
+    items = []
+    for part in text.split(","):
+        match = _SELECT_ITEM_RE.match(part.strip())
+        if not match:
+            raise QuerySyntaxError(
+                f"Не удалось разобрать элемент выборки '{part.strip()}'."
+            )
+        func, arg, column = match.groups()
+        if column is not None:
+            items.append(("column", column))
+        else:
+            items.append(("agg", func.lower(), None if arg == "*" else arg))
+    return items, table_name
+
+
+@measure("parse")
+def parse_join(args: list[str]) -> dict | None:
+    """
+    Парсит соединение в SELECT: ... from a join b on a.col = b.col ...
+    Возвращает {"left": a, "left_col": .., "right": b, "right_col": ..}
+    или None, если соединения нет. Стороны равенства можно менять местами.
+    """
+    if "join" not in args:
+        return None
+
+    join_pos = args.index("join")
+    from_pos = args.index("from") if "from" in args else -1
+    if join_pos != from_pos + 2 or join_pos + 2 >= len(args) \
+            or args[join_pos + 2] != "on":
+        raise QuerySyntaxError(
+            "Используйте: select from <a> join <b> on <a>.<кол> = <b>.<кол>"
+        )
+    left, right = args[from_pos + 1], args[join_pos + 1]
+
+    end = _keyword_index(args, "where")
+    end = len(args) if end is None else end
+    tokens = _tokenize(args[join_pos + 3:end])
+    if len(tokens) < 3 or tokens[1] != "=":
+        raise QuerySyntaxError("Условие соединения должно иметь вид a.кол = b.кол.")
+
+    sides = {}
+    for token in (tokens[0], tokens[2]):
+        table, _, column = token.partition(".")
+        if not column or table not in (left, right) or table in sides:
+            raise QuerySyntaxError(
+                f"В условии соединения ожидается столбец {left}.<кол> "
+                f"или {right}.<кол>, а не '{token}'."
+            )
+        sides[table] = column
+    return {"left": left, "left_col": sides[left],
+            "right": right, "right_col": sides[right]}
+
+
+@measure("parse")
+def parse_select_options(args: list[str]) -> dict:
+    """
+    Парсит необязательные части SELECT после условия WHERE:
+    group by <столбцы>, order by <столбец> [asc|desc], ..., limit <n>,
+    offset <n>, format <table|tsv|jsonl>, page.
+    """
+    options = {"limit": None, "offset": 0, "format": "table", "page": False,
+               "group_by": [], "order_by": []}
+
+    # Параметры ищем только после условия WHERE, чтобы не спутать их
+    # со значениями в условии
+    args = _split_where(args)[1]
+    for i, token in enumerate(args):
+        if token in ("limit", "offset") and i + 1 < len(args):
+            value = args[i + 1]
+            if not value.isdigit():
+                raise QuerySyntaxError(
+                    f"Значение {token} должно быть целым числом."
+                )
+            options[token] = int(value)
+        elif token == "format" and i + 1 < len(args):
+            options["format"] = args[i + 1]
+        elif token == "page":
+            options["page"] = True
+        elif token == "group":
+            if i + 1 >= len(args) or args[i + 1] != "by":
+                raise QuerySyntaxError("После GROUP ожидается BY.")
+            for col_token in args[i + 2:]:
+                if col_token in CLAUSE_KEYWORDS:
+                    break
+                options["group_by"].extend(
+                    col for col in col_token.split(",") if col
+                )
+            if not options["group_by"]:
+                raise QuerySyntaxError("После GROUP BY не указаны столбцы.")
+        elif token == "order":
+            if i + 1 >= len(args) or args[i + 1] != "by":
+                raise QuerySyntaxError("После ORDER ожидается BY.")
+            options["order_by"] = _parse_order_by(args[i + 2:])
+
+    return options
+
+
+def _parse_order_by(args: list[str]) -> list[tuple]:
+    """Разбирает "col1 [asc|desc], col2 ..." в список (столбец, по_убыванию)."""
+    words = []
+    for token in args:
+        if token in CLAUSE_KEYWORDS:
+            break
+        words.append(token)
+    if not words:
+        raise QuerySyntaxError("После ORDER BY не указаны столбцы.")
 
-    parts = [clean_value(p.strip()) for p in values_raw.split(",")]
-    return parts
\ No newline at end of file
+    order_by = []
+    for part in " ".join(words).split(","):
+        tokens = part.split()
+        direction = tokens[1].lower() if len(tokens) == 2 else "asc"
+        if not tokens or len(tokens) > 2 or direction not in ("asc", "desc"):
+            raise QuerySyntaxError(
+                f"Не удалось разобрать ORDER BY около '{part.strip()}'. "
+                "Используйте: order by <столбец> [asc|desc], ..."
+            )
+        order_by.append((tokens[0], direction == "desc"))
+    return order_by
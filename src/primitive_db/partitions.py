@@ -0,0 +1,223 @@
+"""
+Горизонтальное секционирование таблиц: записи таблицы делятся по значению
+столбца-ключа на секции, и каждая секция хранится в своем файле
+(data/<table>.p<номер>.<расширение бэкенда>). Схема секционирования
+записана в метаданных таблицы:
+
+    metadata[table]["partition"] = {"method": "hash", "column": "city",
+                                    "count": 8}
+    metadata[table]["partition"] = {"method": "range", "column": "ID",
+                                    "size": 100000, "parts": [0, 1, 2]}
+
+hash - секция hash(значение) % count, секций ровно count.
+range - секция значение // size: записи с близкими значениями лежат в
+одной секции, новые секции появляются при вставке (их номера - в parts).
+
+Секции загружаются лениво (PartitionedTable): условие WHERE на ключ
+секционирования ограничивает чтение нужными секциями (prune), вставка
+читает только свою секцию, а commit дописывает только в файлы секций,
+которых коснулись изменения.
+"""
+import heapq
+import threading
+import zlib
+from operator import itemgetter
+
+PARTITION_METHODS = {"hash", "range"}
+
+_by_id = itemgetter("ID")
+
+
+def storage_name(table_name: str, number: int) -> str:
+    """Имя, под которым секция хранится в бэкенде (вместо имени таблицы)."""
+    return f"{table_name}.p{number}"
+
+
+def describe(scheme: dict) -> str:
+    """Схема секционирования в виде текста: hash(city) into 8."""
+    text = f"{scheme['method']}({scheme['column']})"
+    if scheme["method"] == "hash":
+        return f"{text} into {scheme['count']}"
+    return f"{text} size {scheme['size']}"
+
+
+def numbers(scheme: dict) -> list[int]:
+    """Номера существующих секций по возрастанию."""
+    if scheme["method"] == "hash":
+        return list(range(scheme["count"]))
+    return scheme["parts"]
+
+
+def _hash(value) -> int:
+    # hash() строк меняется от запуска к запуску - нужна стабильная функция
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return zlib.crc32(value.encode("utf-8"))
+    return int(value)
+
+
+def number_of(scheme: dict, value) -> int:
+    """Номер секции для значения ключа секционирования."""
+    if scheme["method"] == "hash":
+        return _hash(value) % scheme["count"]
+    return (value or 0) // scheme["size"]
+
+
+def partition_of(scheme: dict, row: dict) -> int:
+    """Номер секции записи."""
+    return number_of(scheme, row[scheme["column"]])
+
+
+def _range_parts(scheme: dict, existing: list[int], low, high) -> set:
+    """Секции range, в которые попадают значения ключа из [low, high]."""
+    first = None if low is None else number_of(scheme, low)
+    last = None if high is None else number_of(scheme, high)
+    return {n for n in existing
+            if (first is None or n >= first) and (last is None or n <= last)}
+
+
+def _matching(scheme: dict, node: tuple, col_type: str, cast,
+              existing: list[int]) -> set | None:
+    """Секции, в которых могут быть записи под условие node (None - любые)."""
+    kind = node[0]
+    if kind in ("and", "or"):
+        found = [_matching(scheme, child, col_type, cast, existing)
+                 for child in node[1]]
+        if kind == "and":
+            known = [parts for parts in found if parts is not None]
+            return set.intersection(*known) if known else None
+        if any(parts is None for parts in found):
+            return None
+        return set().union(*found)
+    if kind == "not" or node[1] != scheme["column"]:
+        return None
+
+    if kind == "in":
+        return {number_of(scheme, cast(value, col_type))
+                for value in node[2]} & set(existing)
+    if kind == "cmp" and node[2] == "=":
+        return {number_of(scheme, cast(node[3], col_type))} & set(existing)
+    if scheme["method"] != "range":
+        # Соседние значения лежат в разных секциях hash
+        return None
+    if kind == "between":
+        return _range_parts(scheme, existing, cast(node[2], col_type),
+                            cast(node[3], col_type))
+    if kind == "cmp" and node[2] in ("<", "<=", ">", ">="):
+        value = cast(node[3], col_type)
+        if node[2] == "<":
+            return _range_parts(scheme, existing, None, value - 1)
+        if node[2] == "<=":
+            return _range_parts(scheme, existing, None, value)
+        if node[2] == ">":
+            return _range_parts(scheme, existing, value + 1, None)
+        return _range_parts(scheme, existing, value, None)
+    return None
+
+
+def prune(scheme: dict, node: tuple | None, col_types: dict,
+          cast) -> list[int] | None:
+    """
+    Номера секций, которые нужно читать для условия node, или None, если
+    условие не ограничивает ключ секционирования. Ограничивают его части
+    условия через AND (и ветви OR, если ограничена каждая): равенство и IN,
+    а для range - еще сравнения и BETWEEN.
+    """
+    if node is None:
+        return None
+    existing = numbers(scheme)
+    found = _matching(scheme, node, col_types[scheme["column"]], cast, existing)
+    if found is None:
+        return None
+    return [n for n in existing if n in found]
+
+
+class PartitionedTable:
+    """
+    Таблица из секций, загружаемых при первом обращении к ним: load(номер)
+    возвращает записи секции. Снаружи ведет себя как список записей по
+    возрастанию ID (len(), итерация, append, extend), но перебор всей
+    таблицы загружает все секции - для запросов с условием на ключ
+    секционирования core берет только нужные секции через view().
+    scheme - схема секционирования из метаданных (для range номера новых
+    секций дописываются в нее при вставке).
+    """
+
+    def __init__(self, scheme: dict, load):
+        self.scheme = scheme
+        self._load = load
+        self._parts = {}
+        # Склеенные представления нескольких секций (сбрасываются при записи)
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def numbers(self) -> list[int]:
+        return numbers(self.scheme)
+
+    def loaded(self) -> bool:
+        """Загружены ли уже все секции."""
+        return all(number in self._parts for number in self.numbers())
+
+    def part(self, number: int) -> list[dict]:
+        """Записи секции, загружаемые при первом обращении."""
+        if number not in self._parts:
+            with self._lock:
+                if number not in self._parts:
+                    self._parts[number] = self._load(number)
+        return self._parts[number]
+
+    def view(self, selected: list[int] | None = None) -> list[dict]:
+        """
+        Записи секций selected (None - всех) списком по возрастанию ID.
+        Одна секция отдается как есть, несколько - сливаются по ID.
+        """
+        selected = self.numbers() if selected is None else selected
+        if len(selected) == 1:
+            return self.part(selected[0])
+        key = tuple(selected)
+        if key not in self._views:
+            parts = [self.part(n) for n in selected]
+            if self.scheme["method"] == "range" and self.scheme["column"] == "ID":
+                # Секции range(ID) уже идут по возрастанию ID
+                rows = [row for part in parts for row in part]
+            else:
+                rows = list(heapq.merge(*parts, key=_by_id))
+            self._views[key] = rows
+        return self._views[key]
+
+    def __len__(self) -> int:
+        return sum(len(self.part(n)) for n in self.numbers())
+
+    def __iter__(self):
+        return iter(self.view())
+
+    def __reversed__(self):
+        return reversed(self.view())
+
+    def _place(self, row: dict) -> list[dict]:
+        number = partition_of(self.scheme, row)
+        parts = self.scheme.get("parts")
+        if parts is not None and number not in parts:
+            parts.append(number)
+            parts.sort()
+        return self.part(number)
+
+    def append(self, row: dict) -> None:
+        self._place(row).append(row)
+        self._views.clear()
+
+    def extend(self, rows) -> None:
+        for row in rows:
+            self._place(row).append(row)
+        self._views.clear()
+
+    def remove_rows(self, rows: list[dict]) -> None:
+        """Удаляет записи из их секций (другие секции не загружаются)."""
+        by_part = {}
+        for row in rows:
+            by_part.setdefault(partition_of(self.scheme, row), set()).add(row["ID"])
+        for number, ids in by_part.items():
+            part = self.part(number)
+            part[:] = [row for row in part if row["ID"] not in ids]
+        self._views.clear()
@@ -0,0 +1,437 @@
+"""
+Планировщик запросов: по статистике таблиц из метаданных (table_stats)
+выбирает способ чтения таблицы, порядок выдачи для ORDER BY и способ и
+порядок соединения. Результат - план, дерево узлов PlanNode, по которому
+core выполняет запрос и которое выводит команда explain.
+
+Стоимость - условное число проверок записи при полном переборе:
+    full scan         записей в таблице
+    parallel scan     запуск пула + записей / процессов
+                      + записей * PLAN_PARALLEL_ROW_COST (передача в пул)
+    index lookup      кандидатов из индекса * PLAN_INDEX_ROW_COST
+    index range scan  кандидатов из индекса * PLAN_INDEX_ROW_COST
+    column filter     записей * PLAN_COLUMN_FILTER_COST + кандидатов
+Число подходящих записей оценивается по селективности частей условия:
+равенство - 1 / число различных значений столбца, сравнения и BETWEEN по
+int-столбцу - доля отрезка [min, max], остальное - константы ниже.
+"""
+import math
+import time
+
+from src.primitive_db import indexes as idx
+from src.primitive_db import parallel, predicates
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.constants import (
+    PLAN_COLUMN_FILTER_COST,
+    PLAN_HASH_BUILD_COST,
+    PLAN_INDEX_ROW_COST,
+    PLAN_PARALLEL_ROW_COST,
+    PLAN_PARALLEL_STARTUP_COST,
+    PLAN_SORT_ROW_COST,
+)
+
+# Способы чтения таблицы
+FULL_SCAN = "full scan"
+PARALLEL_SCAN = "parallel scan"
+INDEX_LOOKUP = "index lookup"
+INDEX_RANGE = "index range scan"
+COLUMN_FILTER = "column filter"
+INDEX_ORDER = "index order scan"
+# Операции над потоком записей
+SORT = "sort"
+HASH_AGGREGATE = "hash aggregate"
+FROM_STATS = "statistics"
+HASH_JOIN = "hash join"
+INDEX_JOIN = "index join"
+
+# Селективность частей условия, для которых статистики не хватает
+DEFAULT_EQ_SELECTIVITY = 0.005
+DEFAULT_RANGE_SELECTIVITY = 1 / 3
+DEFAULT_LIKE_SELECTIVITY = 0.05
+
+_END = object()
+
+
+class PlanNode:
+    """
+    Узел плана: операция, подробности для explain, оценки числа записей на
+    выходе (estimate) и стоимости (cost, вместе с дочерними узлами). В
+    режиме analyze (команда explain) узел при выполнении считает выданные
+    записи (actual) и время (elapsed, тоже вместе с дочерними узлами).
+    """
+
+    def __init__(self, operation: str, detail: str = "", estimate: float = 0.0,
+                 cost: float = 0.0):
+        self.operation = operation
+        self.detail = detail
+        self.estimate = estimate
+        self.cost = cost
+        self.children = []
+        self.analyze = False
+        self.actual = None
+        self.elapsed = 0.0
+        # Параметры выполнения: столбец и часть условия для чтения через
+        # индекс, первая таблица (построения или внешняя) для соединения
+        self.column = None
+        self.part = None
+        self.table = None
+
+    def add(self, child: "PlanNode") -> "PlanNode":
+        self.children.append(child)
+        if self.analyze:
+            for _, node in child.walk():
+                node.analyze = True
+        return child
+
+    def walk(self, depth: int = 0):
+        """Обход дерева: пары (глубина, узел), родитель раньше потомков."""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def run(self, func, *args):
+        """
+        Итератор записей func(*args). В режиме analyze func вызывается при
+        первом чтении, а выданные записи и затраченное время учитываются.
+        """
+        if not self.analyze:
+            return func(*args)
+        return self._tracked(func, args)
+
+    def _tracked(self, func, args):
+        self.actual = 0
+        started = time.perf_counter()
+        rows = iter(func(*args))
+        self.elapsed += time.perf_counter() - started
+        while True:
+            started = time.perf_counter()
+            row = next(rows, _END)
+            self.elapsed += time.perf_counter() - started
+            if row is _END:
+                return
+            self.actual += 1
+            yield row
+
+
+def detach_last(plan: PlanNode | None) -> PlanNode | None:
+    """Забирает у plan последний дочерний узел - вход следующей операции."""
+    if plan is None or not plan.children:
+        return None
+    return plan.children.pop()
+
+
+# --- Описание условий для explain ---
+
+def describe(node: tuple) -> str:
+    """Условие WHERE в виде текста."""
+    kind = node[0]
+    if kind in ("and", "or"):
+        return f" {kind} ".join(
+            f"({describe(child)})" if child[0] in ("and", "or") else describe(child)
+            for child in node[1]
+        )
+    if kind == "not":
+        return f"not ({describe(node[1])})"
+    if kind == "in":
+        return f"{node[1]} in ({', '.join(map(str, node[2]))})"
+    if kind == "between":
+        return f"{node[1]} between {node[2]} and {node[3]}"
+    if kind == "like":
+        return f"{node[1]} like '{node[2]}'"
+    return f"{node[1]} {node[2]} {node[3]}"
+
+
+def describe_order(order_by: list[tuple], limit: int | None = None) -> str:
+    text = ", ".join(f"{col} {'desc' if descending else 'asc'}"
+                     for col, descending in order_by)
+    return text if limit is None else f"{text}, top-K: {limit}"
+
+
+def _with_filter(text: str, parts: list[tuple]) -> str:
+    node = predicates.conjoin(parts)
+    if node is None:
+        return text
+    return f"{text}; фильтр: {describe(node)}" if text else f"фильтр: {describe(node)}"
+
+
+def note_partitions(node: PlanNode, note: str | None) -> None:
+    """Дописывает к узлу чтения, сколько секций таблицы он читает."""
+    if note:
+        node.detail = f"{note}; {node.detail}" if node.detail else note
+
+
+# --- Оценка селективности ---
+
+def _number(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _equal(col: str, value, stats: dict, rows: int) -> float:
+    low, high = stats.get("min", {}).get(col), stats.get("max", {}).get(col)
+    number = _number(value)
+    if low is not None and number is not None and not low <= number <= high:
+        return 0.0
+    return key_selectivity(col, stats, rows)
+
+
+def key_selectivity(col: str, stats: dict | None, rows: int) -> float:
+    """Доля записей таблицы с одним (любым) значением столбца."""
+    if col == "ID" and rows:
+        return 1 / rows
+    distinct = (stats or {}).get("distinct", {}).get(col)
+    if not distinct:
+        # Статистику еще не считали или таблица была пуста
+        return DEFAULT_EQ_SELECTIVITY
+    return 1 / distinct
+
+
+def _fraction(col: str, low, high, stats: dict) -> float:
+    """Доля отрезка [min, max] int-столбца, попадающая в [low, high]."""
+    col_min, col_max = stats.get("min", {}).get(col), stats.get("max", {}).get(col)
+    low = col_min if low is None else _number(low)
+    high = col_max if high is None else _number(high)
+    if col_min is None or low is None or high is None:
+        return DEFAULT_RANGE_SELECTIVITY
+    covered = min(high, col_max) - max(low, col_min) + 1
+    return max(0.0, min(1.0, covered / (col_max - col_min + 1)))
+
+
+def selectivity(node: tuple | None, stats: dict | None, rows: int) -> float:
+    """Оценка доли записей таблицы, подходящих под условие."""
+    if node is None:
+        return 1.0
+    kind = node[0]
+    if kind == "and":
+        return math.prod(selectivity(child, stats, rows) for child in node[1])
+    if kind == "or":
+        return 1 - math.prod(1 - selectivity(child, stats, rows)
+                             for child in node[1])
+    if kind == "not":
+        return 1 - selectivity(node[1], stats, rows)
+
+    stats = stats or {}
+    col = node[1]
+    if kind == "in":
+        return min(1.0, sum(_equal(col, value, stats, rows)
+                            for value in set(map(str, node[2]))))
+    if kind == "between":
+        return _fraction(col, node[2], node[3], stats)
+    if kind == "like":
+        if "%" in node[2] or "_" in node[2]:
+            return DEFAULT_LIKE_SELECTIVITY
+        return _equal(col, node[2], stats, rows)
+
+    op, value = node[2], node[3]
+    if op == "=":
+        return _equal(col, value, stats, rows)
+    if op == "!=":
+        return 1 - _equal(col, value, stats, rows)
+    if op in ("<", "<="):
+        return _fraction(col, None, value, stats)
+    return _fraction(col, value, None, stats)
+
+
+# --- Выбор способа чтения таблицы ---
+
+def plan_scan(table_data, node: tuple | None, indexes: dict | None,
+              col_types: dict, stats: dict | None) -> PlanNode:
+    """
+    Выбирает самый дешевый способ чтения записей таблицы, подходящих под
+    условие node: полный или параллельный перебор, поиск или диапазон по
+    индексу для одной из частей условия, соединенных через AND, фильтр
+    столбцов колоночной таблицы по равенствам. Условие целиком все равно
+    проверяется на каждой выданной записи.
+    """
+    rows = len(table_data)
+    # Подходящие записи оцениваются по всей таблице: у секционированной
+    # table_data - только секции, допускаемые условием
+    table_rows = (stats or {}).get("rows", rows)
+    estimate = table_rows * selectivity(node, stats, table_rows)
+    plans = [PlanNode(FULL_SCAN, _with_filter("", [node] if node else []),
+                      estimate, float(rows))]
+    if node is None:
+        return plans[0]
+    parts = predicates.conjuncts(node)
+
+    if parallel.enabled(table_data):
+        workers = parallel.worker_count()
+        plans.append(PlanNode(
+            PARALLEL_SCAN, _with_filter(f"процессов: {workers}", parts), estimate,
+            PLAN_PARALLEL_STARTUP_COST + rows / workers
+            + rows * PLAN_PARALLEL_ROW_COST,
+        ))
+
+    if isinstance(table_data, ColumnarTable):
+        equal = [part for part in parts if part[0] == "cmp" and part[2] == "="
+                 and part[1] in col_types]
+        if equal:
+            candidates = rows * selectivity(predicates.conjoin(equal), stats, rows)
+            # Равенство по ID - двоичный поиск, остальные - проход по столбцу
+            scanned = 0 if any(part[1] == "ID" for part in equal) else rows
+            plans.append(PlanNode(
+                COLUMN_FILTER,
+                _with_filter(describe(predicates.conjoin(equal)),
+                             [part for part in parts if part not in equal]),
+                estimate, scanned * PLAN_COLUMN_FILTER_COST + candidates,
+            ))
+    else:
+        for part in parts:
+            if part[0] not in predicates.LEAF_KINDS:
+                continue
+            index = (indexes or {}).get(part[1])
+            method = index and predicates.index_access(part, index)
+            if method is None:
+                continue
+            candidates = rows * selectivity(part, stats, rows)
+            probes = 1 if method == "lookup" else math.log2(rows + 1)
+            plan = PlanNode(
+                INDEX_LOOKUP if method == "lookup" else INDEX_RANGE,
+                _with_filter(f"индекс {part[1]} ({index.kind}): {describe(part)}",
+                             [other for other in parts if other is not part]),
+                estimate, probes + candidates * PLAN_INDEX_ROW_COST,
+            )
+            plan.column, plan.part = part[1], part
+            plans.append(plan)
+
+    # При равной стоимости остается более ранний (более простой) способ
+    return min(plans, key=lambda plan: plan.cost)
+
+
+# --- Сортировка и агрегация ---
+
+def _sort_cost(count: float, limit: int | None) -> float:
+    kept = count if limit is None else min(count, limit)
+    return count * PLAN_SORT_ROW_COST * math.log2(max(2.0, kept))
+
+
+def sort_node(order_by: list[tuple], limit: int | None,
+              source: PlanNode | None) -> PlanNode:
+    """Узел сортировки потока source (top-K кучей, если задан limit)."""
+    count = source.estimate if source is not None else 0.0
+    node = PlanNode(SORT, describe_order(order_by, limit),
+                    count if limit is None else min(count, limit),
+                    (source.cost if source is not None else 0.0)
+                    + _sort_cost(count, limit))
+    if source is not None:
+        node.children.append(source)
+    return node
+
+
+def _order_source(indexes: dict | None, order_by: list[tuple]) -> str | None:
+    """Что выдает записи сразу в порядке ORDER BY (см. core._index_order)."""
+    if len(order_by) != 1:
+        return None
+    col = order_by[0][0]
+    if col == "ID":
+        return "по ID"
+    if isinstance((indexes or {}).get(col), idx.SortedIndex):
+        return f"индекс {col} (sorted)"
+    return None
+
+
+def plan_order(table_data, node: tuple | None, indexes: dict | None,
+               col_types: dict, stats: dict | None, order_by: list[tuple],
+               limit: int | None) -> PlanNode:
+    """
+    План SELECT с ORDER BY: чтение записей сразу в нужном порядке (по ID или
+    упорядоченному индексу) с проверкой условия - до limit-й подходящей
+    записи, или лучший способ чтения из plan_scan и сортировка результата.
+    """
+    sort = sort_node(order_by, limit, plan_scan(table_data, node, indexes,
+                                                col_types, stats))
+    source = _order_source(indexes, order_by)
+    if source is None:
+        return sort
+
+    rows = len(table_data)
+    matches = rows * selectivity(node, stats, rows)
+    if limit is None or matches <= limit:
+        to_read = rows
+    else:
+        to_read = min(rows, limit * rows / matches)
+    row_cost = 1.0 if order_by[0][0] == "ID" else PLAN_INDEX_ROW_COST
+    ordered = PlanNode(
+        INDEX_ORDER,
+        _with_filter(f"{source}, {describe_order(order_by, limit)}",
+                     [node] if node else []),
+        sort.estimate, to_read * row_cost,
+    )
+    return min((ordered, sort), key=lambda plan: plan.cost)
+
+
+def estimate_aggregate(node: PlanNode, group_by: list[str],
+                       stats: dict | None) -> None:
+    """Оценки узла агрегации по его входу: групп не больше, чем записей."""
+    source = node.children[0] if node.children else None
+    count = source.estimate if source is not None else 0.0
+    groups = 1.0
+    if group_by:
+        rows = (stats or {}).get("rows", 0)
+        for col in group_by:
+            groups *= 1 / key_selectivity(col, stats, rows)
+        groups = min(groups, count)
+    node.estimate = groups
+    node.cost = count + (source.cost if source is not None else 0.0)
+
+
+# --- Соединение ---
+
+def plan_join(keys: dict, scans: dict, conditions: dict, indexes: dict,
+              stats: dict, rows: dict, residual: tuple | None) -> PlanNode:
+    """
+    Выбирает способ и порядок соединения двух таблиц по ключам keys
+    ({таблица: столбец}). Для каждой таблицы: scans - план чтения с ее
+    частью условия conditions, indexes, stats, rows - ее индексы,
+    статистика и число записей; residual - условие на обе таблицы.
+    Рассматриваются хеш-соединение с хеш-таблицей по любой из сторон и
+    соединение через индекс по ключу одной стороны, когда другая сторона
+    перебирается, а ее записи ищутся в индексе (условие на таблицу с
+    индексом проверяется на найденных записях). Узел результата: table -
+    сторона построения хеш-таблицы или перебираемая сторона.
+    """
+    first_table, second_table = keys
+    key_share = {table: key_selectivity(keys[table], stats[table], rows[table])
+                 for table in keys}
+    estimate = (scans[first_table].estimate * scans[second_table].estimate
+                * min(key_share.values()) * selectivity(residual, None, 0))
+    residual_text = f"; фильтр: {describe(residual)}" if residual else ""
+
+    plans = []
+    for first, other in ((first_table, second_table), (second_table, first_table)):
+        outer, inner = scans[first], scans[other]
+        plan = PlanNode(
+            HASH_JOIN,
+            f"хеш-таблица по {first}.{keys[first]}, проверка "
+            f"{other}.{keys[other]}{residual_text}",
+            estimate,
+            outer.cost + inner.cost + outer.estimate * PLAN_HASH_BUILD_COST
+            + inner.estimate,
+        )
+        plan.table = first
+        plan.children = [outer, inner]
+        plans.append(plan)
+
+        index = indexes[other].get(keys[other])
+        if index is None:
+            continue
+        matches = rows[other] * key_share[other]
+        lookup = PlanNode(
+            INDEX_LOOKUP,
+            _with_filter(f"{other}: индекс {keys[other]} ({index.kind}) "
+                         f"= {first}.{keys[first]}",
+                         [conditions[other]] if conditions[other] else []),
+            outer.estimate * matches, outer.estimate * matches * PLAN_INDEX_ROW_COST,
+        )
+        plan = PlanNode(
+            INDEX_JOIN,
+            f"перебор {first}, поиск в {other}.{keys[other]}{residual_text}",
+            estimate, outer.cost + outer.estimate + lookup.cost,
+        )
+        plan.table = first
+        plan.children = [outer, lookup]
+        plans.append(plan)
+
+    return min(plans, key=lambda plan: plan.cost)
@@ -0,0 +1,175 @@
+import operator
+import re
+
+from src.primitive_db.exceptions import ValidationError
+
+# Узлы выражения WHERE - обычные кортежи (их можно сравнивать и передавать
+# в другие процессы):
+#   ("cmp", col, op, value)         op: = != < <= > >=
+#   ("in", col, [values])
+#   ("between", col, low, high)
+#   ("like", col, pattern)
+#   ("and", [nodes]), ("or", [nodes]), ("not", node)
+# Значения в узлах - строки, к типам столбцов они приводятся при компиляции.
+
+COMPARISON_OPS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+RANGE_OPS = {"<", "<=", ">", ">="}
+LEAF_KINDS = {"cmp", "in", "between", "like"}
+
+
+def normalize(where_clause) -> tuple | None:
+    """
+    Приводит условие к узлу выражения. Словарь {col: val} (старый формат)
+    означает равенство по всем столбцам. Пустое условие - None.
+    """
+    if not where_clause:
+        return None
+    if isinstance(where_clause, dict):
+        conditions = [("cmp", col, "=", val) for col, val in where_clause.items()]
+        return conditions[0] if len(conditions) == 1 else ("and", conditions)
+    return where_clause
+
+
+def conjuncts(node: tuple) -> list[tuple]:
+    """Раскладывает условие на части, соединенные через AND."""
+    if node[0] == "and":
+        return [part for child in node[1] for part in conjuncts(child)]
+    return [node]
+
+
+def columns_of(node: tuple) -> set[str]:
+    """Возвращает множество столбцов, упомянутых в условии."""
+    if node[0] in ("and", "or"):
+        return set().union(*(columns_of(child) for child in node[1]))
+    if node[0] == "not":
+        return columns_of(node[1])
+    return {node[1]}
+
+
+def conjoin(parts: list[tuple]) -> tuple | None:
+    """Обратная к conjuncts: соединяет части через AND (пустой список - None)."""
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else ("and", parts)
+
+
+def rename_columns(node: tuple, rename) -> tuple:
+    """Копия условия, в которой каждый столбец col заменен на rename(col)."""
+    kind = node[0]
+    if kind in ("and", "or"):
+        return (kind, [rename_columns(child, rename) for child in node[1]])
+    if kind == "not":
+        return (kind, rename_columns(node[1], rename))
+    return (kind, rename(node[1]), *node[2:])
+
+
+def _like_regex(pattern: str) -> re.Pattern:
+    """Переводит шаблон LIKE (% - любая строка, _ - один символ) в regex."""
+    parts = []
+    for char in pattern:
+        if char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.DOTALL)
+
+
+def compile_predicate(node: tuple, col_types: dict, cast):
+    """
+    Компилирует условие в функцию row -> bool один раз перед сканированием.
+    Значения условия приводятся к типам столбцов через cast(value, type),
+    поэтому при проверке записей сравниваются уже типизированные значения.
+    """
+    kind = node[0]
+
+    if kind in ("and", "or"):
+        parts = [compile_predicate(child, col_types, cast) for child in node[1]]
+        if kind == "and":
+            return lambda row: all(part(row) for part in parts)
+        return lambda row: any(part(row) for part in parts)
+
+    if kind == "not":
+        inner = compile_predicate(node[1], col_types, cast)
+        return lambda row: not inner(row)
+
+    col = node[1]
+    if col not in col_types:
+        raise ValidationError(f"Столбец {col} не существует.")
+    col_type = col_types[col]
+
+    if kind == "cmp":
+        compare = COMPARISON_OPS[node[2]]
+        value = cast(node[3], col_type)
+        return lambda row: compare(row[col], value)
+
+    if kind == "in":
+        values = {cast(val, col_type) for val in node[2]}
+        return lambda row: row[col] in values
+
+    if kind == "between":
+        low, high = cast(node[2], col_type), cast(node[3], col_type)
+        return lambda row: low <= row[col] <= high
+
+    if kind == "like":
+        regex = _like_regex(node[2])
+        return lambda row: regex.fullmatch(str(row[col])) is not None
+
+    raise ValidationError(f"Неизвестный тип условия: {kind}")
+
+
+def index_access(part: tuple, index) -> str | None:
+    """
+    Как индекс может выдать кандидатов для части условия: "lookup" -
+    равенство и IN (любой индекс), "range" - сравнения и BETWEEN
+    (упорядоченный индекс), None - никак.
+    """
+    if part[0] == "in" or part[0] == "cmp" and part[2] == "=":
+        return "lookup"
+    if not hasattr(index, "range"):
+        return None
+    if part[0] == "between" or part[0] == "cmp" and part[2] in RANGE_OPS:
+        return "range"
+    return None
+
+
+def part_candidates(part: tuple, index, col_type: str, cast) -> list[dict]:
+    """
+    Записи-кандидаты из индекса для части условия, которую он поддерживает
+    (см. index_access). Кандидаты все равно проверяются всем условием.
+    """
+    if part[0] == "in":
+        found = {}
+        for val in part[2]:
+            for row in index.lookup(cast(val, col_type)):
+                found[row["ID"]] = row
+        return list(found.values())
+    if part[0] == "between":
+        return index.range(cast(part[2], col_type), cast(part[3], col_type))
+
+    value = cast(part[3], col_type)
+    if part[2] == "=":
+        return index.lookup(value)
+    if part[2] in ("<", "<="):
+        return index.range(high=value, include_high=part[2] == "<=")
+    return index.range(low=value, include_low=part[2] == ">=")
+
+
+def equality_conditions(node: tuple, col_types: dict, cast) -> dict:
+    """
+    Возвращает типизированные равенства {столбец: значение} из частей
+    условия, соединенных через AND (для поиска по целым столбцам).
+    """
+    return {
+        part[1]: cast(part[3], col_types[part[1]])
+        for part in conjuncts(node)
+        if part[0] == "cmp" and part[2] == "=" and part[1] in col_types
+    }
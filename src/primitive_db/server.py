@@ -0,0 +1,255 @@
+"""
+Сетевой режим: asyncio-сервер, принимающий команды того же языка, что и
+консоль, от многих клиентов сразу. Все клиенты работают с одной сессией,
+так что каталог, таблицы, индексы и кэш запросов остаются "прогретыми".
+
+Протокол (TCP или Unix-сокет, UTF-8):
+    запрос  - одна команда на строку: "select from users where age > 18\\n"
+    ответ   - строка "OK <n>\\n" и затем n байт вывода команды
+
+Читающие команды выполняются параллельно в пуле потоков, изменяющие - по
+одной, без чтений одновременно с ними. Изменения не сохраняются после
+каждой команды: первая изменившая базу команда запускает групповую
+фиксацию через SERVER_COMMIT_DELAY секунд, и все изменения, накопленные
+к этому моменту всеми клиентами, записываются одним commit. Клиент
+получает ответ на изменяющую команду, когда ее изменения уже на диске.
+"""
+import asyncio
+import io
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from src.primitive_db import metrics
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.constants import (
+    SERVER_COMMIT_DELAY,
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_READ_WORKERS,
+)
+from src.primitive_db.decorators import set_interactive
+from src.primitive_db.engine import WRITE_COMMANDS, execute_command, split_command
+from src.primitive_db.session import Session
+
+# Транзакции принадлежат сессии, а она у всех клиентов общая
+UNSUPPORTED_COMMANDS = {"begin", "rollback"}
+
+
+class _ThreadOutput(io.TextIOBase):
+    """
+    Подмена sys.stdout: вывод потока, для которого задан буфер, попадает в
+    этот буфер (ответ клиенту), вывод остальных - в настоящий stdout.
+    """
+
+    def __init__(self, default):
+        self.default = default
+        self._local = threading.local()
+
+    def capture(self, buffer: io.StringIO | None) -> None:
+        self._local.buffer = buffer
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self.default).write(text)
+
+    def flush(self) -> None:
+        if getattr(self._local, "buffer", None) is None:
+            self.default.flush()
+
+
+class ReadWriteLock:
+    """
+    Блокировка для asyncio: много читателей или один писатель. Ждущий
+    писатель не пропускает новых читателей вперед себя.
+    """
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @asynccontextmanager
+    async def read(self):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: not self._writer and not self._waiting_writers
+            )
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def write(self):
+        async with self._condition:
+            self._waiting_writers += 1
+            await self._condition.wait_for(
+                lambda: not self._writer and not self._readers
+            )
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class Server:
+    """Сервер базы данных поверх одной общей сессии."""
+
+    def __init__(self, session: Session, commit_delay: float = SERVER_COMMIT_DELAY,
+                 read_workers: int = SERVER_READ_WORKERS):
+        self.session = session
+        self.commit_delay = commit_delay
+        self.cache = QueryCache()
+        self.output = _ThreadOutput(sys.stdout)
+        self._executor = ThreadPoolExecutor(max_workers=read_workers,
+                                            thread_name_prefix="primitive_db")
+        self._lock = None
+        self._flush_waiters = []
+        self._flush_task = None
+
+    # --- Выполнение команд ---
+
+    def _run(self, args: list[str]) -> str:
+        """Выполняет команду в потоке пула и возвращает ее вывод."""
+        buffer = io.StringIO()
+        self.output.capture(buffer)
+        try:
+            with metrics.registry.command() as current:
+                current["name"] = args[0]
+                execute_command(self.session, args, self.cache)
+        finally:
+            self.output.capture(None)
+        return buffer.getvalue()
+
+    async def _in_thread(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def execute(self, line: str) -> str:
+        """Выполняет одну строку команды и возвращает ее вывод."""
+        args = split_command(line)
+        if not args:
+            return ""
+        command = args[1] if args[0] == "profile" and len(args) > 1 else args[0]
+        if command in UNSUPPORTED_COMMANDS:
+            return f"Команда {command} недоступна в режиме сервера.\n"
+
+        if command not in WRITE_COMMANDS:
+            async with self._lock.read():
+                return await self._in_thread(self._run, args)
+
+        async with self._lock.write():
+            output = await self._in_thread(self._run, args)
+        await self._committed()
+        return output
+
+    # --- Групповая фиксация ---
+
+    async def _committed(self) -> None:
+        """Ждет, пока изменения сессии будут сохранены групповым commit."""
+        if not self.session.dirty:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._flush_waiters.append(waiter)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        await waiter
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.commit_delay)
+        # Изменения, сделанные после этого момента, ждут следующей фиксации
+        waiters, self._flush_waiters = self._flush_waiters, []
+        self._flush_task = None
+        try:
+            async with self._lock.write():
+                await self._in_thread(self.session.commit)
+        except Exception as e:
+            for waiter in waiters:
+                waiter.set_exception(e)
+        else:
+            for waiter in waiters:
+                waiter.set_result(None)
+
+    # --- Сеть ---
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                text = line.decode("utf-8", errors="replace").strip()
+                if text == "exit":
+                    break
+                try:
+                    output = await self.execute(text)
+                except Exception as e:
+                    output = f"Произошла непредвиденная ошибка: {e}\n"
+                data = output.encode("utf-8")
+                writer.write(f"OK {len(data)}\n".encode("ascii") + data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = SERVER_HOST, port: int = SERVER_PORT,
+                    unix_path: str | None = None) -> None:
+        """Принимает клиентов до SIGINT/SIGTERM."""
+        self._lock = ReadWriteLock()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except NotImplementedError:
+                # Windows: остановка по Ctrl+C через KeyboardInterrupt
+                pass
+
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client,
+                                                     path=unix_path)
+            address = unix_path
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            address = f"{host}:{port}"
+        print(f"Сервер базы данных слушает {address}", file=sys.stderr)
+        async with server:
+            await stop.wait()
+        # Дожидаемся уже запущенной групповой фиксации
+        if self._flush_task is not None:
+            await self._flush_task
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self.session.close()
+
+
+def serve(session: Session, host: str = SERVER_HOST, port: int = SERVER_PORT,
+          unix_path: str | None = None) -> None:
+    """Запускает сервер до остановки; при остановке изменения сохраняются."""
+    set_interactive(False)
+    server = Server(session)
+    stdout, sys.stdout = sys.stdout, server.output
+    try:
+        asyncio.run(server.serve(host, port, unix_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sys.stdout = stdout
+        server.close()
+        if unix_path and os.path.exists(unix_path):
+            os.remove(unix_path)
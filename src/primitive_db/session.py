@@ -0,0 +1,466 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from src.primitive_db import indexes, partitions, utils
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.constants import (
+    DB_FILE,
+    FLUSH_INTERVAL,
+    LOCK_FILE,
+    TABLE_LAYOUT,
+    WAL_CHECKPOINT_BYTES,
+    WRITE_LOCK_FILE,
+)
+from src.primitive_db.decorators import measure
+from src.primitive_db.exceptions import TransactionError
+from src.primitive_db.locks import FileLock
+from src.primitive_db.wal import WriteAheadLog
+
+
+class Session:
+    """
+    Долгоживущее состояние базы данных в памяти.
+    Метаданные и таблицы загружаются лениво, один раз за сессию, и дальше
+    живут в памяти. Изменения копятся как "грязные" записи и сбрасываются
+    на диск при commit(), по истечении flush_interval или при закрытии.
+
+    Каждый commit сначала пишется одной записью в WAL, затем применяется к
+    файлам таблиц. На контрольной точке файлы таблиц сбрасываются на диск и
+    WAL очищается. При открытии сессии неприменённые записи WAL повторяются.
+
+    Одну базу могут открыть несколько процессов: команды выполняются внутри
+    access(), который держит разделяемую блокировку базы (читатели видят
+    согласованный снимок) и сбрасывает кэш, если другой процесс успел
+    зафиксировать изменения. Пишущая сессия одна: она держит блокировку
+    записи от первого изменения до сохранения, а файлы меняет только под
+    исключительной блокировкой базы. Каждый commit увеличивает номер версии.
+
+    Транзакция (begin ... commit/rollback) копит изменения в памяти без
+    автоматической записи: commit сохраняет их все одной записью WAL
+    (по одной дозаписи на каждую затронутую таблицу), rollback отбрасывает
+    и перечитывает данные с диска.
+
+    Читать через одну сессию можно из нескольких потоков (так работает
+    сервер): ленивая загрузка каталога, таблиц и индексов идет под
+    блокировкой. Изменять данные потоки должны по очереди.
+
+    Секционированная таблица (partitions.py) загружается по секциям, при
+    первом обращении к каждой, и всегда хранится в памяти списками записей.
+    Commit раскладывает ее изменения по файлам секций.
+    """
+
+    def __init__(self, db_file: str = DB_FILE,
+                 flush_interval: float = FLUSH_INTERVAL,
+                 layout: str = TABLE_LAYOUT,
+                 wal: WriteAheadLog | None = None):
+        self.db_file = db_file
+        self.flush_interval = flush_interval
+        self.layout = layout
+        self.wal = wal if wal is not None else WriteAheadLog()
+        # Таблицы, измененные после последней контрольной точки
+        self._unsynced_tables = set()
+        self._metadata = None
+        self._metadata_dirty = False
+        self._tables = {}
+        self._indexes = {}
+        # Несохраненные изменения:
+        # {таблица: {"put": {ID: запись}, "del": {ID: удаленная запись}}}
+        self._pending = {}
+        self._dropped = set()
+        self._last_flush = time.monotonic()
+        # Версия базы, которую видит сессия (None - еще не читали)
+        self._version = None
+        self._data_lock = FileLock(LOCK_FILE)
+        self._write_lock = FileLock(WRITE_LOCK_FILE)
+        self._writing = False
+        self._access_depth = 0
+        self.in_transaction = False
+        self._lock = threading.RLock()
+
+    # --- Совместный доступ процессов ---
+
+    @contextmanager
+    def access(self, write: bool = False):
+        """
+        Контекст одной команды. Пока он открыт, другие процессы не меняют
+        файлы базы, так что команда видит согласованный снимок. Возвращает
+        (через as) True, если кэш сессии сброшен из-за чужого commit.
+        Пишущая команда сначала захватывает блокировку записи: между
+        чтением данных и их сохранением никто другой базу не изменит.
+        """
+        if write:
+            self._hold_writer()
+        with self._lock:
+            self._access_depth += 1
+        try:
+            with self._data_lock.shared():
+                with self._lock:
+                    refreshed = self._refresh()
+                yield refreshed
+        finally:
+            with self._lock:
+                self._access_depth -= 1
+                self._release_writer()
+
+    def _hold_writer(self) -> None:
+        if not self._writing:
+            self._write_lock.acquire(exclusive=True)
+            self._writing = True
+            # Пока ждали блокировку, другой писатель мог зафиксировать данные
+            with self._data_lock.shared():
+                self._refresh()
+
+    def _release_writer(self) -> None:
+        """Отпускает блокировку записи, когда все изменения сохранены."""
+        if (self._writing and not self.dirty and not self._access_depth
+                and not self.in_transaction):
+            self._write_lock.release(exclusive=True)
+            self._writing = False
+
+    def _refresh(self) -> bool:
+        """Сбрасывает кэш каталога и таблиц, если версия базы на диске новее."""
+        version = utils.load_version()
+        if version == self._version or self.dirty:
+            return False
+        self._version = version
+        self._metadata = None
+        self._tables.clear()
+        self._indexes.clear()
+        return True
+
+    # --- Чтение состояния ---
+
+    @property
+    def metadata(self) -> dict:
+        if self._metadata is None:
+            with self._lock:
+                return self._load_metadata()
+        return self._metadata
+
+    def _load_metadata(self) -> dict:
+        if self._metadata is None:
+            self.recover()
+            self._metadata = utils.load_metadata(self.db_file)
+            # Переносим таблицы из старого формата хранения, если они остались
+            utils.migrate_storage(self._metadata)
+            changed = utils.ensure_sequences(self._metadata)
+            changed = utils.ensure_stats(self._metadata) or changed
+            if changed:
+                with self._data_lock.exclusive():
+                    utils.save_metadata(self._metadata, self.db_file)
+        return self._metadata
+
+    def table(self, table_name: str) -> list[dict]:
+        """Возвращает записи таблицы, загружая их при первом обращении."""
+        if table_name not in self._tables:
+            with self._lock:
+                if table_name not in self._tables:
+                    self._tables[table_name] = self._load_table(table_name)
+        return self._tables[table_name]
+
+    @measure("load")
+    def _load_table(self, table_name: str):
+        # Файлы удаленной (и, возможно, пересозданной) таблицы еще не
+        # стерты с диска до сохранения - читать их нельзя
+        scheme = self.metadata.get(table_name, {}).get("partition")
+        if scheme is not None:
+            return partitions.PartitionedTable(
+                scheme, lambda number: self._load_partition(table_name, number)
+            )
+        if self.layout == "columns" and table_name in self.metadata:
+            schema = self.metadata[table_name]["columns"]
+            if table_name in self._dropped:
+                return ColumnarTable.from_rows(schema, [])
+            return utils.load_columnar_table(table_name, schema)
+        if table_name in self._dropped:
+            return []
+        return utils.load_table_data(table_name)
+
+    @measure("load")
+    def _load_partition(self, table_name: str, number: int) -> list[dict]:
+        if table_name in self._dropped:
+            return []
+        return utils.load_table_data(partitions.storage_name(table_name, number))
+
+    def indexes(self, table_name: str) -> dict:
+        """Возвращает индексы таблицы, строя их при первом обращении."""
+        if table_name not in self.metadata:
+            return {}
+        if isinstance(self.table(table_name),
+                      (ColumnarTable, partitions.PartitionedTable)):
+            # Колоночная таблица ищет по столбцам сама, включая ID, а
+            # секционированная не загружается целиком ради индекса
+            return {}
+        if table_name not in self._indexes:
+            with self._lock:
+                if table_name not in self._indexes:
+                    self._indexes[table_name] = self._build_indexes(table_name)
+        return self._indexes[table_name]
+
+    @measure("load")
+    def _build_indexes(self, table_name: str) -> dict:
+        return indexes.build_indexes(
+            self.metadata, table_name, self.table(table_name)
+        )
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._metadata_dirty or self._pending or self._dropped)
+
+    # --- Регистрация изменений ---
+
+    def _changes(self, table_name: str) -> dict:
+        return self._pending.setdefault(table_name, {"put": {}, "del": {}})
+
+    def mark_metadata_dirty(self) -> None:
+        self._metadata_dirty = True
+
+    def mark_rows_changed(self, table_name: str, rows: list[dict]) -> None:
+        """Отмечает вставленные или измененные записи для сохранения."""
+        puts = self._changes(table_name)["put"]
+        for row in rows:
+            puts[row["ID"]] = row
+
+    def mark_rows_deleted(self, table_name: str, rows: list[dict]) -> None:
+        """Отмечает удаленные записи для сохранения."""
+        changes = self._changes(table_name)
+        for row in rows:
+            changes["put"].pop(row["ID"], None)
+            # Запись нужна, чтобы найти секцию, из файла которой ее удалить
+            changes["del"][row["ID"]] = row
+
+    def reset_indexes(self, table_name: str) -> None:
+        """Сбрасывает индексы таблицы - они перестроятся при следующем обращении."""
+        self._indexes.pop(table_name, None)
+
+    def drop_table(self, table_name: str) -> None:
+        """Отмечает файлы данных таблицы для удаления при сохранении."""
+        self._indexes.pop(table_name, None)
+        self._pending.pop(table_name, None)
+        self._dropped.add(table_name)
+        self._tables.pop(table_name, None)
+
+    # --- Транзакции ---
+
+    def begin(self) -> None:
+        """
+        Начинает транзакцию. Изменения, сделанные до нее, сохраняются
+        сразу, чтобы rollback отменял только изменения транзакции. На время
+        транзакции сессия держит блокировку записи: данные, прочитанные в
+        транзакции, не изменит другой процесс.
+        """
+        if self.in_transaction:
+            raise TransactionError("Транзакция уже начата.")
+        self.commit()
+        self._hold_writer()
+        self.in_transaction = True
+
+    def rollback(self) -> None:
+        """
+        Отменяет транзакцию: несохраненные изменения отбрасываются вместе с
+        кэшем каталога и таблиц, при следующем обращении они читаются с диска.
+        """
+        if not self.in_transaction:
+            raise TransactionError("Нет активной транзакции.")
+        self.in_transaction = False
+        self._metadata = None
+        self._metadata_dirty = False
+        self._tables.clear()
+        self._indexes.clear()
+        self._pending.clear()
+        self._dropped.clear()
+        self._release_writer()
+
+    # --- Сохранение ---
+
+    @measure("save")
+    def commit(self) -> None:
+        """
+        Записывает все накопленные изменения на диск: одной записью в WAL
+        (групповая фиксация), затем в метаданные и файлы таблиц.
+        Завершает транзакцию, если она начата.
+        """
+        self.in_transaction = False
+        if not self.dirty:
+            self._last_flush = time.monotonic()
+            self._release_writer()
+            return
+
+        self._hold_writer()
+        with self._data_lock.exclusive():
+            self._commit_locked()
+        self._release_writer()
+
+    def _stored_changes(self, table_name: str, changes: dict) -> dict:
+        """
+        Изменения таблицы по файлам хранения: {имя: (записи файла, изменения)}.
+        Изменения секционированной таблицы раскладываются по секциям, и
+        commit пишет только в файлы затронутых секций.
+        """
+        scheme = self.metadata[table_name].get("partition")
+        if scheme is None:
+            return {table_name: (self.table(table_name), {
+                "put": list(changes["put"].values()),
+                "del": sorted(changes["del"]),
+            })}
+
+        table = self.table(table_name)
+        stored = {}
+        for kind, rows in (("put", changes["put"].values()),
+                           ("del", changes["del"].values())):
+            for row in rows:
+                number = partitions.partition_of(scheme, row)
+                name = partitions.storage_name(table_name, number)
+                if name not in stored:
+                    stored[name] = (table.part(number), {"put": [], "del": []})
+                stored[name][1][kind].append(row if kind == "put" else row["ID"])
+        for _, file_changes in stored.values():
+            file_changes["del"].sort()
+        return stored
+
+    def _commit_locked(self) -> None:
+        version = utils.load_version() + 1
+        stored, schemas = {}, {}
+        for table_name, changes in self._pending.items():
+            for name, value in self._stored_changes(table_name, changes).items():
+                stored[name] = value
+                schemas[name] = self.metadata[table_name]["columns"]
+        record = {
+            "version": version,
+            "metadata": self._metadata if self._metadata_dirty else None,
+            "drop": sorted(self._dropped),
+            "tables": {name: changes for name, (_, changes) in stored.items()},
+        }
+        self.wal.append(record)
+        self._apply(record)
+
+        for name, (rows, _) in stored.items():
+            if utils.table_needs_compaction(name, len(rows)):
+                utils.save_table_data(name, rows, schemas[name])
+
+        # Новая версия видна другим процессам только после применения записи
+        utils.save_version(version)
+        self._version = version
+        self._metadata_dirty = False
+        self._dropped.clear()
+        self._pending.clear()
+        self._last_flush = time.monotonic()
+
+        if self.wal.size() >= WAL_CHECKPOINT_BYTES:
+            self.checkpoint()
+
+    def _apply(self, record: dict) -> None:
+        """Применяет запись WAL к метаданным и файлам таблиц."""
+        if record.get("metadata") is not None:
+            utils.save_metadata(record["metadata"], self.db_file)
+
+        for table_name in record.get("drop", []):
+            utils.drop_table_data(table_name)
+            self._unsynced_tables.discard(table_name)
+
+        for table_name, changes in record.get("tables", {}).items():
+            utils.append_table_rows(table_name, changes["put"])
+            utils.delete_table_rows(table_name, changes["del"])
+            self._unsynced_tables.add(table_name)
+
+    @measure("save")
+    def checkpoint(self) -> None:
+        """
+        Контрольная точка: сбрасывает на диск файлы таблиц, в которые писали
+        после прошлой точки, и очищает WAL - его записи больше не нужны.
+        Таблицы берутся и из записей WAL: их могли менять другие процессы.
+        """
+        with self._data_lock.exclusive():
+            self.wal.sync()
+            tables = set(self._unsynced_tables)
+            for record in self.wal.read_records():
+                tables.update(record.get("tables", {}))
+            for table_name in tables:
+                utils.sync_table_data(table_name)
+            self._unsynced_tables.clear()
+            self.wal.reset()
+
+    @measure("load")
+    def recover(self) -> int:
+        """
+        Повторяет записи WAL, оставшиеся после сбоя, и делает контрольную
+        точку. Возвращает число повторенных записей.
+        Записи с версией не новее версии базы уже применены и пропускаются.
+        """
+        if not self._pending_records() and not self.wal.has_torn_tail():
+            return 0
+        # Занятая блокировка записи значит, что писатель жив и его запись
+        # еще применяется - это не сбой, повторять ее нельзя
+        if not self._write_lock.try_acquire(exclusive=True):
+            return 0
+        try:
+            with self._data_lock.exclusive():
+                # Оборванная последняя запись не была подтверждена: отрезаем
+                # ее, чтобы следующий commit не оказался за ней
+                self.wal.truncate_tail()
+                records = self._pending_records()
+                if not records:
+                    return 0
+                touched = {name for record in records
+                           for name in record.get("tables", {})}
+                for table_name in touched:
+                    utils.repair_table_data(table_name)
+                for record in records:
+                    self._apply(record)
+                version = max(record.get("version", 0) for record in records)
+                if version > utils.load_version():
+                    utils.save_version(version)
+                self._version = utils.load_version()
+                self.checkpoint()
+                return len(records)
+        finally:
+            self._write_lock.release(exclusive=True)
+
+    def _pending_records(self) -> list[dict]:
+        """Записи WAL, еще не примененные к файлам базы."""
+        version = utils.load_version()
+        # У записей без версии (до ее появления) применение не отследить
+        return [record for record in self.wal.read_records()
+                if record.get("version", version + 1) > version]
+
+    def compact(self, table_name: str) -> None:
+        """
+        Переписывает журнал таблицы только живыми записями из памяти
+        (у секционированной таблицы - журналы всех секций).
+        """
+        if self.in_transaction:
+            # Записи в памяти содержат незафиксированные изменения
+            raise TransactionError("Сжатие недоступно внутри транзакции.")
+        table = self.table(table_name)
+        if isinstance(table, partitions.PartitionedTable):
+            stored = {partitions.storage_name(table_name, number): table.part(number)
+                      for number in table.numbers()}
+        else:
+            stored = {table_name: table}
+        schema = self.metadata[table_name]["columns"]
+        with self._data_lock.exclusive():
+            for name, rows in stored.items():
+                utils.save_table_data(name, rows, schema)
+
+    def maybe_flush(self) -> None:
+        """Сохраняет изменения, если истек интервал автоматической записи."""
+        if not self.dirty or self.in_transaction:
+            return
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.commit()
+
+    def close(self) -> None:
+        # Незавершенная транзакция при закрытии отменяется
+        if self.in_transaction:
+            self.rollback()
+        # Если база так и не открывалась, WAL мог остаться от сбоя и еще не
+        # повторен - очищать его контрольной точкой нельзя
+        if self._metadata is not None:
+            self.commit()
+            # Контрольную точку делает только писавшая сессия
+            if self._unsynced_tables:
+                self.checkpoint()
+        self.wal.close()
+        self._data_lock.close()
+        self._write_lock.close()
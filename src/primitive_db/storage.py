@@ -0,0 +1,461 @@
+import json
+import os
+
+from src.primitive_db import binary_format
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.constants import (
+    COMPACTION_MIN_RECORDS,
+    COMPACTION_RATIO,
+    DATA_DIR,
+    FSYNC_MODE,
+)
+from src.primitive_db.exceptions import CorruptedDataError
+
+TOMBSTONE_KEY = "$del"
+
+
+def _ensure_data_dir():
+    """Создает директорию для данных, если она не существует."""
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+
+
+def _replace_file(filepath: str, lines, binary: bool = False) -> None:
+    """
+    Записывает файл во временный и атомарно подменяет им исходный.
+    При сбое на диске остается либо старая, либо новая версия целиком.
+    """
+    tmp_path = f"{filepath}.tmp"
+    if binary:
+        f = open(tmp_path, "wb")
+    else:
+        f = open(tmp_path, "w", encoding="utf-8")
+    with f:
+        f.writelines(lines)
+        f.flush()
+        if FSYNC_MODE != "off":
+            os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
+
+def _fsync_path(filepath: str) -> None:
+    """Сбрасывает на диск уже записанный файл, если он существует."""
+    if FSYNC_MODE == "off" or not os.path.exists(filepath):
+        return
+    fd = os.open(filepath, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class JsonFileBackend:
+    """
+    Исходный формат: вся таблица хранится одним JSON-списком в data/<table>.json.
+    Любое изменение переписывает файл целиком.
+    """
+
+    name = "json"
+    extension = ".json"
+
+    def get_path(self, table_name: str) -> str:
+        _ensure_data_dir()
+        return os.path.join(DATA_DIR, f"{table_name}{self.extension}")
+
+    def load(self, table_name: str) -> list[dict]:
+        try:
+            with open(self.get_path(table_name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except json.JSONDecodeError as e:
+            # Пустой список вместо ошибки означал бы молчаливую потерю данных
+            raise CorruptedDataError(
+                f'Файл данных таблицы "{table_name}" поврежден: {e}'
+            )
+
+    def rewrite(self, table_name: str, rows: list[dict],
+                schema: list[dict] | None = None) -> None:
+        _replace_file(
+            self.get_path(table_name),
+            # list(): записи могут прийти не списком (колоночная таблица)
+            [json.dumps(list(rows), indent=4, ensure_ascii=False)],
+        )
+
+    def append(self, table_name: str, rows: list[dict]) -> None:
+        by_id = {row["ID"]: row for row in self.load(table_name)}
+        for row in rows:
+            by_id[row["ID"]] = row
+        self.rewrite(table_name, list(by_id.values()))
+
+    def remove(self, table_name: str, ids: list[int]) -> None:
+        ids = set(ids)
+        rows = [row for row in self.load(table_name) if row["ID"] not in ids]
+        self.rewrite(table_name, rows)
+
+    def needs_compaction(self, table_name: str, live_count: int) -> bool:
+        return False
+
+    def maybe_compact(self, table_name: str, live_count: int,
+                      schema: list[dict] | None = None) -> bool:
+        return False
+
+    def repair(self, table_name: str) -> None:
+        pass
+
+    def sync(self, table_name: str) -> None:
+        _fsync_path(self.get_path(table_name))
+
+    def drop(self, table_name: str) -> None:
+        file_path = self.get_path(table_name)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+class JsonLinesBackend:
+    """
+    Журнал строк (JSON Lines) в data/<table>.jsonl, только дозапись.
+    Каждая строка файла - либо полная версия записи, либо "надгробие"
+    {"$del": <ID>}. Последняя версия записи с данным ID побеждает.
+    Устаревшие версии убираются сжатием (compaction).
+    """
+
+    name = "jsonl"
+    extension = ".jsonl"
+
+    def __init__(self):
+        # Количество физических записей в журнале каждой таблицы
+        self._record_counts = {}
+        self._legacy = JsonFileBackend()
+
+    def get_path(self, table_name: str) -> str:
+        _ensure_data_dir()
+        return os.path.join(DATA_DIR, f"{table_name}{self.extension}")
+
+    def migrate_legacy(self, table_name: str,
+                       schema: list[dict] | None = None) -> bool:
+        """
+        Переносит таблицу из старого формата data/<table>.json в журнал.
+        Старый файл удаляется только после успешной записи журнала.
+        """
+        legacy_path = self._legacy.get_path(table_name)
+        if not os.path.exists(legacy_path) or os.path.exists(
+            self.get_path(table_name)
+        ):
+            return False
+
+        self.rewrite(table_name, self._legacy.load(table_name))
+        os.remove(legacy_path)
+        return True
+
+    def load(self, table_name: str) -> list[dict]:
+        self.migrate_legacy(table_name)
+
+        rows = {}
+        for record in self.read_records(table_name):
+            if TOMBSTONE_KEY in record:
+                rows.pop(record[TOMBSTONE_KEY], None)
+            else:
+                rows[record["ID"]] = record
+        return list(rows.values())
+
+    def read_records(self, table_name: str) -> list[dict]:
+        """Все записи журнала по порядку, включая надгробия."""
+        records = []
+        try:
+            with open(self.get_path(table_name), "r", encoding="utf-8") as f:
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    if not line.endswith("\n"):
+                        # Оборванная при сбое последняя запись не была
+                        # подтверждена - пропускаем ее. Файл не меняем:
+                        # чтение идет под разделяемой блокировкой, а
+                        # отрезается хвост перед дозаписью (_append_lines)
+                        # и при восстановлении
+                        break
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError as e:
+                        raise CorruptedDataError(
+                            f'Файл данных таблицы "{table_name}" поврежден '
+                            f"(строка {line_no}): {e}"
+                        )
+        except FileNotFoundError:
+            pass
+
+        self._record_counts[table_name] = len(records)
+        return records
+
+    def _append_lines(self, table_name: str, records: list[dict]) -> None:
+        if not records:
+            return
+        lines = [json.dumps(r, ensure_ascii=False) + "\n" for r in records]
+        # Дозапись идет под исключительной блокировкой - здесь можно отрезать
+        # оборванный хвост, чтобы новая строка не склеилась с ним
+        self.repair(table_name)
+        with open(self.get_path(table_name), "a", encoding="utf-8") as f:
+            f.writelines(lines)
+        self._record_counts[table_name] = (
+            self._count_records(table_name) + len(records)
+        )
+
+    def _count_records(self, table_name: str) -> int:
+        if table_name not in self._record_counts:
+            try:
+                with open(self.get_path(table_name), "rb") as f:
+                    self._record_counts[table_name] = sum(1 for _ in f)
+            except FileNotFoundError:
+                self._record_counts[table_name] = 0
+        return self._record_counts[table_name]
+
+    def append(self, table_name: str, rows: list[dict]) -> None:
+        """Дописывает новые версии записей (вставка или обновление)."""
+        self._append_lines(table_name, rows)
+
+    def remove(self, table_name: str, ids: list[int]) -> None:
+        """Дописывает надгробия для удаленных записей."""
+        self._append_lines(table_name, [{TOMBSTONE_KEY: i} for i in ids])
+
+    def rewrite(self, table_name: str, rows: list[dict],
+                schema: list[dict] | None = None) -> None:
+        """Атомарно переписывает журнал, оставляя только живые записи."""
+        _replace_file(
+            self.get_path(table_name),
+            (json.dumps(r, ensure_ascii=False) + "\n" for r in rows),
+        )
+        self._record_counts[table_name] = len(rows)
+
+    def needs_compaction(self, table_name: str, live_count: int) -> bool:
+        """Проверяет, не стало ли мусора в журнале слишком много."""
+        records = self._count_records(table_name)
+        if records < COMPACTION_MIN_RECORDS:
+            return False
+        return records > max(live_count, 1) * COMPACTION_RATIO
+
+    def maybe_compact(self, table_name: str, live_count: int,
+                      schema: list[dict] | None = None) -> bool:
+        """
+        Проверяет долю мусора в журнале и, если она велика, сжимает его.
+        Возвращает True, если сжатие было выполнено.
+        """
+        if not self.needs_compaction(table_name, live_count):
+            return False
+        self.rewrite(table_name, self.load(table_name))
+        return True
+
+    def repair(self, table_name: str) -> None:
+        """Отрезает оборванную последнюю строку журнала, если она есть."""
+        file_path = self.get_path(table_name)
+        if not os.path.exists(file_path):
+            return
+        with open(file_path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                # Обычный случай: файл кончается целой строкой
+                return
+            pos = end
+            # Идем с конца файла блоками, пока не найдем последний перевод строки
+            while pos > 0:
+                step = min(64 * 1024, pos)
+                pos -= step
+                f.seek(pos)
+                chunk = f.read(step)
+                if pos + step == end and chunk.endswith(b"\n"):
+                    return
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    f.truncate(pos + newline + 1)
+                    break
+            else:
+                f.truncate(0)
+        self._record_counts.pop(table_name, None)
+
+    def sync(self, table_name: str) -> None:
+        """Сбрасывает журнал таблицы на диск."""
+        _fsync_path(self.get_path(table_name))
+
+    def drop(self, table_name: str) -> None:
+        for file_path in (self.get_path(table_name),
+                          self._legacy.get_path(table_name)):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        self._record_counts.pop(table_name, None)
+
+
+class _DeltaLog(JsonLinesBackend):
+    """Журнал изменений поверх двоичного файла: data/<table>.delta.jsonl."""
+
+    extension = ".delta.jsonl"
+
+    def migrate_legacy(self, table_name: str,
+                       schema: list[dict] | None = None) -> bool:
+        return False
+
+    def record_count(self, table_name: str) -> int:
+        return self._count_records(table_name)
+
+    def drop(self, table_name: str) -> None:
+        file_path = self.get_path(table_name)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        self._record_counts.pop(table_name, None)
+
+
+class BinaryBackend:
+    """
+    Двоичный столбцовый формат (см. binary_format.py) в data/<table>.bin:
+    компактнее JSON и читается через mmap без разбора текста (целиком, при
+    загрузке таблицы). Столбцы файла - схема таблицы из метаданных
+    (schema); без нее берется схема уже записанного файла. Файл не
+    дописывается - вставки, изменения и удаления идут в журнал
+    data/<table>.delta.jsonl, который накладывается на файл при загрузке.
+    Когда журнал разрастается, таблица переписывается в двоичный файл
+    целиком, а журнал удаляется.
+    """
+
+    name = "binary"
+    extension = ".bin"
+
+    def __init__(self):
+        self._delta = _DeltaLog()
+        self._journal = JsonLinesBackend()
+
+    def get_path(self, table_name: str) -> str:
+        _ensure_data_dir()
+        return os.path.join(DATA_DIR, f"{table_name}{self.extension}")
+
+    def migrate_legacy(self, table_name: str,
+                       schema: list[dict] | None = None) -> bool:
+        """
+        Переносит таблицу из журнала data/<table>.jsonl (или еще более
+        старого data/<table>.json) в двоичный файл.
+        """
+        if os.path.exists(self.get_path(table_name)):
+            return False
+        self._journal.migrate_legacy(table_name)
+        journal_path = self._journal.get_path(table_name)
+        if not os.path.exists(journal_path):
+            return False
+
+        self.rewrite(table_name, self._journal.load(table_name), schema)
+        os.remove(journal_path)
+        return True
+
+    def _file_schema(self, table_name: str, rows) -> list[dict]:
+        try:
+            return binary_format.read_schema(self.get_path(table_name))
+        except FileNotFoundError:
+            # Схема неизвестна только у старых таблиц, переносимых при
+            # загрузке без метаданных
+            return binary_format.infer_schema(rows)
+
+    def _read_base(self, table_name: str) -> tuple:
+        try:
+            return binary_format.read_columns(self.get_path(table_name))
+        except FileNotFoundError:
+            return [], {}, {}, 0
+
+    def load(self, table_name: str) -> list[dict]:
+        self.migrate_legacy(table_name)
+        names, types, columns, _ = self._read_base(table_name)
+        rows = {row["ID"]: row
+                for row in binary_format.to_rows(names, types, columns)}
+        for record in self._delta.read_records(table_name):
+            if TOMBSTONE_KEY in record:
+                rows.pop(record[TOMBSTONE_KEY], None)
+            else:
+                rows[record["ID"]] = record
+        return list(rows.values())
+
+    def load_columnar(self, table_name: str, schema: list[dict]) -> ColumnarTable:
+        """
+        Загружает таблицу сразу в колоночное представление: столбцы файла
+        становятся столбцами таблицы без промежуточных записей-словарей.
+        """
+        self.migrate_legacy(table_name, schema)
+        names, types, columns, count = self._read_base(table_name)
+        if names != [col["name"] for col in schema] or any(
+            types[col["name"]] != col["type"] for col in schema
+        ):
+            # Пустой файл или другая схема - собираем по записям
+            return ColumnarTable.from_rows(schema, self.load(table_name))
+
+        table = ColumnarTable.from_columns(schema, columns, count)
+        for record in self._delta.read_records(table_name):
+            if TOMBSTONE_KEY in record:
+                table.remove_ids([record[TOMBSTONE_KEY]])
+            elif table.get(record["ID"]) is not None:
+                table.update_rows([record["ID"]], record)
+            else:
+                table.append(record)
+        return table
+
+    def append(self, table_name: str, rows: list[dict]) -> None:
+        self._delta.append(table_name, rows)
+
+    def remove(self, table_name: str, ids: list[int]) -> None:
+        self._delta.remove(table_name, ids)
+
+    def rewrite(self, table_name: str, rows: list[dict],
+                schema: list[dict] | None = None) -> None:
+        """Атомарно записывает двоичный файл и удаляет журнал изменений."""
+        if schema is None:
+            schema = self._file_schema(table_name, rows)
+        _replace_file(self.get_path(table_name),
+                      binary_format.pack(rows, schema), binary=True)
+        # Сбой до удаления журнала безопасен: его записи уже есть в файле,
+        # и повторное наложение дает то же состояние
+        self._delta.drop(table_name)
+
+    def needs_compaction(self, table_name: str, live_count: int) -> bool:
+        """Журнал изменений читается медленнее файла - сливаем его раньше."""
+        records = self._delta.record_count(table_name)
+        if records < COMPACTION_MIN_RECORDS:
+            return False
+        return records * COMPACTION_RATIO > live_count
+
+    def maybe_compact(self, table_name: str, live_count: int,
+                      schema: list[dict] | None = None) -> bool:
+        if not self.needs_compaction(table_name, live_count):
+            return False
+        self.rewrite(table_name, self.load(table_name), schema)
+        return True
+
+    def repair(self, table_name: str) -> None:
+        self._delta.repair(table_name)
+
+    def sync(self, table_name: str) -> None:
+        _fsync_path(self.get_path(table_name))
+        self._delta.sync(table_name)
+
+    def drop(self, table_name: str) -> None:
+        file_path = self.get_path(table_name)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        self._delta.drop(table_name)
+        self._journal.drop(table_name)
+
+
+BACKENDS = {
+    JsonFileBackend.name: JsonFileBackend,
+    JsonLinesBackend.name: JsonLinesBackend,
+    BinaryBackend.name: BinaryBackend,
+}
+
+_instances = {}
+
+
+def get_backend(name: str) -> JsonFileBackend | JsonLinesBackend | BinaryBackend:
+    """Возвращает (единственный) экземпляр бэкенда хранения по имени."""
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Неизвестный формат хранения: {name}. "
+            f"Допустимые: {', '.join(BACKENDS)}"
+        )
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
@@ -0,0 +1,251 @@
+"""
+Статистика таблицы в метаданных: число записей, min/max каждого
+int-столбца и число различных значений каждого столбца. Число записей и
+min/max поддерживаются при каждой вставке, изменении и удалении, поэтому
+число записей и простые агрегаты известны без чтения таблицы:
+
+    metadata[table]["stats"] = {"rows": 3, "min": {"age": 18}, "max": {...},
+                                "distinct": {"ID": 3, "age": 2, ...},
+                                "analyzed_rows": 3, "changes": 0}
+
+Пустой столбец (нет записей) в min/max отсутствует. Число различных
+значений инкрементально не поддерживается: changes считает измененные
+записи, и когда их набирается больше ANALYZE_RATIO от таблицы или таблица
+вырастает в ANALYZE_GROWTH раз с прошлого пересчета (analyzed_rows
+записей), статистика пересчитывается целиком (maybe_analyze). Ее
+использует планировщик.
+
+У секционированной таблицы min/max хранятся еще и по секциям
+(stats["partitions"] = {"<номер>": {"min": {...}, "max": {...}}}), а
+общие границы - их объединение: когда уходит крайнее значение, границы
+пересчитываются только по секциям измененных записей, и запись не
+загружает остальные секции. По той же причине автоматический пересчет
+различных значений ждет, пока загружены все секции (или команды analyze).
+"""
+from src.primitive_db import partitions
+from src.primitive_db.constants import (
+    ANALYZE_GROWTH,
+    ANALYZE_MIN_CHANGES,
+    ANALYZE_RATIO,
+)
+
+
+def _int_columns(schema: list[dict]) -> list[str]:
+    return [col["name"] for col in schema if col["type"] == "int"]
+
+
+def _column_bounds(rows, column: str) -> tuple:
+    low = high = None
+    for row in rows:
+        value = row[column]
+        if value is None:
+            continue
+        if low is None or value < low:
+            low = value
+        if high is None or value > high:
+            high = value
+    return low, high
+
+
+def _set_bounds(stats: dict, column: str, low, high) -> None:
+    for key, value in (("min", low), ("max", high)):
+        if value is None:
+            stats[key].pop(column, None)
+        else:
+            stats[key][column] = value
+
+
+def _widen(stats: dict, columns: list[str], row: dict) -> None:
+    for column in columns:
+        value = row[column]
+        if value is None:
+            continue
+        if column not in stats["min"] or value < stats["min"][column]:
+            stats["min"][column] = value
+        if column not in stats["max"] or value > stats["max"][column]:
+            stats["max"][column] = value
+
+
+def _part_bounds(stats: dict, number: int) -> dict:
+    return stats["partitions"].setdefault(str(number), {"min": {}, "max": {}})
+
+
+def compute(schema: list[dict], rows, partitioned: bool = False) -> dict:
+    """
+    Считает статистику таблицы заново одним проходом по записям.
+    partitioned - завести границы по секциям (для новой пустой таблицы;
+    у PartitionedTable они считаются всегда).
+    """
+    columns = _int_columns(schema)
+    values = {col["name"]: set() for col in schema}
+    stats = {"rows": 0, "min": {}, "max": {}}
+    if isinstance(rows, partitions.PartitionedTable):
+        parts = {number: rows.part(number) for number in rows.numbers()}
+        partitioned = True
+    else:
+        parts = {None: rows}
+    if partitioned:
+        stats["partitions"] = {}
+    for number, part_rows in parts.items():
+        bounds = None if number is None else _part_bounds(stats, number)
+        for row in part_rows:
+            stats["rows"] += 1
+            _widen(stats, columns, row)
+            if bounds is not None:
+                _widen(bounds, columns, row)
+            for column, seen in values.items():
+                seen.add(row[column])
+    stats["distinct"] = {column: len(seen) for column, seen in values.items()}
+    stats["analyzed_rows"] = stats["rows"]
+    stats["changes"] = 0
+    return stats
+
+
+def _count_changes(stats: dict, count: int) -> None:
+    stats["changes"] = stats.get("changes", 0) + count
+
+
+def _analyzed_rows(stats: dict) -> int:
+    if "analyzed_rows" in stats:
+        return stats["analyzed_rows"]
+    # Статистика до появления analyzed_rows: ID различны у всех записей
+    return stats["distinct"].get("ID", 0)
+
+
+def distinct_known(stats: dict | None) -> bool:
+    """
+    Посчитано ли число различных значений по записям таблицы. Статистика
+    новой таблицы считается по пустой таблице - для заполненной она
+    ничего не говорит.
+    """
+    if stats is None or "distinct" not in stats:
+        return False
+    return stats["rows"] == 0 or _analyzed_rows(stats) > 0
+
+
+def needs_analyze(stats: dict | None) -> bool:
+    """Устарело ли число различных значений (или его еще не считали)."""
+    if stats is None or "distinct" not in stats:
+        return True
+    # Рост таблицы в разы (в том числе первые записи пустой таблицы)
+    # пересчитывается независимо от ANALYZE_MIN_CHANGES: иначе у небольших
+    # таблиц оставалась бы статистика пустой таблицы
+    if stats["rows"] > ANALYZE_GROWTH * _analyzed_rows(stats):
+        return True
+    return stats["changes"] > ANALYZE_MIN_CHANGES + ANALYZE_RATIO * stats["rows"]
+
+
+def analyze(table_meta: dict, table_data) -> None:
+    """Пересчитывает статистику таблицы по ее записям."""
+    table_meta["stats"] = compute(table_meta["columns"], table_data)
+
+
+def maybe_analyze(table_meta: dict, table_data) -> bool:
+    """
+    Пересчитывает статистику, если с прошлого пересчета изменилось много
+    записей или таблица выросла в ANALYZE_GROWTH раз. Стоимость пересчета -
+    проход по таблице, но делается он не чаще, чем раз на ANALYZE_RATIO
+    измененных записей от ее размера или при росте в ANALYZE_GROWTH раз,
+    так что на одну вставку приходится O(1) в среднем.
+    """
+    if "stats" not in table_meta or not needs_analyze(table_meta["stats"]):
+        return False
+    if isinstance(table_data, partitions.PartitionedTable) \
+            and not table_data.loaded():
+        # Пересчет загрузил бы все секции ради одной записи - ждем, пока
+        # они загрузятся сами, или команды analyze
+        return False
+    analyze(table_meta, table_data)
+    return True
+
+
+def _partition_bounds(table_meta: dict, rows: list[dict]) -> list[dict]:
+    """Границы по секциям, в которых лежат записи rows (если они ведутся)."""
+    stats, scheme = table_meta["stats"], table_meta.get("partition")
+    if scheme is None or "partitions" not in stats:
+        return []
+    numbers = {partitions.partition_of(scheme, row) for row in rows}
+    return [_part_bounds(stats, number) for number in sorted(numbers)]
+
+
+def add_rows(table_meta: dict, rows: list[dict]) -> None:
+    """Учитывает вставленные записи."""
+    stats = table_meta.get("stats")
+    if stats is None:
+        return
+    columns = _int_columns(table_meta["columns"])
+    stats["rows"] += len(rows)
+    _count_changes(stats, len(rows))
+    for row in rows:
+        _widen(stats, columns, row)
+    if "partitions" in stats:
+        scheme = table_meta["partition"]
+        for row in rows:
+            number = partitions.partition_of(scheme, row)
+            _widen(_part_bounds(stats, number), columns, row)
+
+
+def remove_rows(table_meta: dict, rows: list[dict], table_data) -> None:
+    """
+    Учитывает удаленные записи. Если удалено крайнее значение столбца,
+    его min/max пересчитываются по оставшимся записям table_data (у
+    секционированной таблицы - только секций удаленных записей).
+    """
+    stats = table_meta.get("stats")
+    if stats is None:
+        return
+    stats["rows"] -= len(rows)
+    _count_changes(stats, len(rows))
+    for column in _int_columns(table_meta["columns"]):
+        _refresh_if_touched(table_meta, column, {row[column] for row in rows},
+                            table_data, rows)
+
+
+def update_column(table_meta: dict, column: str, old_values: set, new_value,
+                  table_data, rows: list[dict]) -> None:
+    """
+    Учитывает изменение столбца: old_values - значения до изменения,
+    new_value - новое значение, table_data - таблица уже после изменения,
+    rows - измененные записи.
+    """
+    stats = table_meta.get("stats")
+    if stats is None or column not in _int_columns(table_meta["columns"]):
+        return
+    if new_value is not None:
+        for bounds in _partition_bounds(table_meta, rows):
+            _widen(bounds, [column], {column: new_value})
+    if _refresh_if_touched(table_meta, column, old_values, table_data, rows):
+        return
+    if new_value is not None:
+        _widen(stats, [column], {column: new_value})
+
+
+def _refresh_if_touched(table_meta: dict, column: str, old_values: set,
+                        table_data, rows: list[dict]) -> bool:
+    """Пересчитывает границы столбца, если ушло одно из его крайних значений."""
+    stats = table_meta["stats"]
+    bounds = {stats["min"].get(column), stats["max"].get(column)}
+    if bounds.isdisjoint(old_values - {None}):
+        return False
+    if not isinstance(table_data, partitions.PartitionedTable) \
+            or "partitions" not in stats:
+        _set_bounds(stats, column, *_column_bounds(table_data, column))
+        return True
+
+    # Секции измененных записей уже загружены, остальные берутся из stats
+    scheme = table_data.scheme
+    for number in sorted({partitions.partition_of(scheme, row) for row in rows}):
+        _set_bounds(_part_bounds(stats, number), column,
+                    *_column_bounds(table_data.part(number), column))
+    parts = stats["partitions"].values()
+    lows = [part["min"][column] for part in parts if column in part["min"]]
+    highs = [part["max"][column] for part in parts if column in part["max"]]
+    _set_bounds(stats, column, min(lows, default=None), max(highs, default=None))
+    return True
+
+
+def count_updated(table_meta: dict, count: int) -> None:
+    """Учитывает число измененных командой update записей."""
+    stats = table_meta.get("stats")
+    if stats is not None:
+        _count_changes(stats, count)
@@ -1,10 +1,37 @@
+import csv
+import itertools
 import json
 import os
+import re
 
-from src.primitive_db.constants import DB_FILE
+from src.primitive_db import storage, table_stats
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.constants import (
+    DATA_DIR,
+    DB_FILE,
+    FSYNC_MODE,
+    STORAGE_BACKEND,
+    VERSION_FILE,
+)
+from src.primitive_db.decorators import measure
+from src.primitive_db.exceptions import CorruptedDataError, ValidationError
 
-DATA_DIR = "data"
 
+def _upgrade_metadata(data: dict) -> dict:
+    """
+    Приводит метаданные к текущему формату.
+    Раньше таблица описывалась только списком столбцов, теперь это словарь
+    {"columns": [...], "indexes": {столбец: тип_индекса}, "sequence": N},
+    где sequence - последний выданный ID (для старых таблиц заполняется
+    при первой вставке).
+    """
+    for table_name, table_meta in data.items():
+        if isinstance(table_meta, list):
+            data[table_name] = {"columns": table_meta, "indexes": {}}
+    return data
+
+
+@measure("load")
 def load_metadata(filepath: str = DB_FILE) -> dict:
     """
     Загружает данные из JSON-файла.
@@ -12,37 +39,227 @@ def load_metadata(filepath: str = DB_FILE) -> dict:
     """
     try:
         with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+            content = f.read()
+    except FileNotFoundError:
         return {}
+    if not content.strip():
+        return {}
+    try:
+        return _upgrade_metadata(json.loads(content))
+    except json.JSONDecodeError as e:
+        # Пустой словарь вместо ошибки означал бы потерю всего каталога
+        raise CorruptedDataError(f"Файл метаданных {filepath} поврежден: {e}")
 
 
+@measure("save")
 def save_metadata(data: dict, filepath: str = DB_FILE) -> None:
-    """Сохраняет переданные данные в JSON-файл."""
-    with open(filepath, "w", encoding="utf-8") as f:
+    """
+    Сохраняет переданные данные в JSON-файл.
+    Запись идет во временный файл, который затем атомарно подменяет исходный,
+    поэтому последовательности ID не теряются при сбое посреди записи.
+    """
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
+        f.flush()
+        if FSYNC_MODE != "off":
+            os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
+@measure("load")
+def load_version(filepath: str = VERSION_FILE) -> int:
+    """Номер последнего зафиксированного commit (0 - база еще не менялась)."""
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+    except ValueError:
+        raise CorruptedDataError(f"Файл версии {filepath} поврежден.")
+
+
+def save_version(version: int, filepath: str = VERSION_FILE) -> None:
+    """Атомарно (через временный файл) записывает номер версии базы."""
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(f"{version}\n")
+        f.flush()
+        if FSYNC_MODE != "off":
+            os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
 
-def _ensure_data_dir():
-    """Создает директорию для данных, если она не существует."""
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
+def get_backend():
+    """Возвращает настроенный бэкенд хранения данных таблиц."""
+    return storage.get_backend(STORAGE_BACKEND)
 
 def get_table_path(table_name: str) -> str:
     """Возвращает путь к файлу данных таблицы."""
-    _ensure_data_dir()
-    return os.path.join(DATA_DIR, f"{table_name}.json")
+    return get_backend().get_path(table_name)
 
+@measure("load")
 def load_table_data(table_name: str) -> list[dict]:
-    """Загружает список записей из JSON-файла таблицы."""
-    filepath = get_table_path(table_name)
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    """Загружает список записей таблицы из хранилища."""
+    return get_backend().load(table_name)
+
+@measure("load")
+def load_columnar_table(table_name: str, schema: list[dict]) -> ColumnarTable:
+    """
+    Загружает таблицу в колоночном представлении. Двоичный бэкенд отдает
+    столбцы файла напрямую, остальные - через список записей.
+    """
+    backend = get_backend()
+    if hasattr(backend, "load_columnar"):
+        return backend.load_columnar(table_name, schema)
+    return ColumnarTable.from_rows(schema, backend.load(table_name))
+
+@measure("save")
+def save_table_data(table_name: str, data: list[dict],
+                    schema: list[dict] | None = None) -> None:
+    """
+    Полностью перезаписывает данные таблицы (контрольная точка). schema -
+    столбцы таблицы из метаданных (нужны двоичному бэкенду).
+    """
+    get_backend().rewrite(table_name, data, schema)
+
+def append_table_rows(table_name: str, rows: list[dict]) -> None:
+    """Дописывает в хранилище новые или измененные записи."""
+    get_backend().append(table_name, rows)
+
+def delete_table_rows(table_name: str, ids: list[int]) -> None:
+    """Помечает записи с указанными ID как удаленные."""
+    get_backend().remove(table_name, ids)
+
+def compact_table_data(table_name: str, live_count: int | None = None,
+                       schema: list[dict] | None = None) -> bool:
+    """
+    Сжимает журнал таблицы. Без live_count сжатие выполняется безусловно,
+    иначе - только если мусора в журнале накопилось слишком много.
+    """
+    backend = get_backend()
+    if live_count is None:
+        backend.rewrite(table_name, backend.load(table_name), schema)
+        return True
+    return backend.maybe_compact(table_name, live_count, schema)
+
+def table_needs_compaction(table_name: str, live_count: int) -> bool:
+    """Проверяет, пора ли сжимать журнал таблицы."""
+    return get_backend().needs_compaction(table_name, live_count)
+
+def sync_table_data(table_name: str) -> None:
+    """Сбрасывает файл данных таблицы на диск (fsync)."""
+    get_backend().sync(table_name)
+
+def repair_table_data(table_name: str) -> None:
+    """Отрезает недописанную при сбое последнюю запись файла данных."""
+    get_backend().repair(table_name)
+
+def partition_files(table_name: str) -> list[str]:
+    """
+    Имена хранения (<table>.p<номер>) секций таблицы, файлы которых есть на
+    диске. Берутся из каталога данных, а не из метаданных: при удалении
+    таблицы ее описания в метаданных уже нет.
+    """
+    if not os.path.isdir(DATA_DIR):
         return []
+    pattern = re.compile(rf"^({re.escape(table_name)}\.p-?\d+)\.")
+    names = set()
+    for filename in os.listdir(DATA_DIR):
+        match = pattern.match(filename)
+        if match:
+            names.add(match.group(1))
+    return sorted(names)
+
+def drop_table_data(table_name: str) -> None:
+    """Удаляет физические файлы данных таблицы, включая файлы ее секций."""
+    backend = get_backend()
+    backend.drop(table_name)
+    for name in partition_files(table_name):
+        backend.drop(name)
+
+def migrate_storage(metadata: dict) -> list[str]:
+    """
+    Переносит таблицы из старого формата data/<table>.json в текущий бэкенд.
+    Возвращает список перенесенных таблиц.
+    """
+    backend = get_backend()
+    if not hasattr(backend, "migrate_legacy"):
+        return []
+    return [name for name, table_meta in metadata.items()
+            if backend.migrate_legacy(name, table_meta["columns"])]
+
+def ensure_sequences(metadata: dict) -> bool:
+    """
+    Заполняет последовательности ID для таблиц, созданных до их появления,
+    максимальным существующим ID. Возвращает True, если метаданные изменились.
+    """
+    changed = False
+    for table_name, table_meta in metadata.items():
+        if "sequence" not in table_meta:
+            rows = load_table_data(table_name)
+            table_meta["sequence"] = max((row["ID"] for row in rows), default=0)
+            changed = True
+    return changed
+
+def ensure_stats(metadata: dict) -> bool:
+    """
+    Считает статистику (число записей, min/max int-столбцов) для таблиц,
+    созданных до ее появления. Возвращает True, если метаданные изменились.
+    """
+    changed = False
+    for table_name, table_meta in metadata.items():
+        if "stats" not in table_meta:
+            table_meta["stats"] = table_stats.compute(
+                table_meta["columns"], load_table_data(table_name)
+            )
+            changed = True
+    return changed
+
+
+def _import_row(record, columns: list[str]) -> list[str]:
+    """Приводит запись из файла импорта к списку значений в порядке схемы."""
+    if isinstance(record, dict):
+        missing = [col for col in columns if col not in record]
+        if missing:
+            raise ValidationError(
+                f"В записи нет столбцов: {', '.join(missing)}"
+            )
+        record = [record[col] for col in columns]
+    # Значения приводятся к типам схемы через core._cast_type, ждущий строки
+    return [val if isinstance(val, str) else str(val) for val in record]
+
+
+def read_import_file(filepath: str, columns: list[str], batch_size: int):
+    """
+    Потоково читает файл импорта (.csv или .jsonl) и отдает пачки записей
+    в виде списков строковых значений в порядке столбцов columns (без ID).
+    В CSV первая строка считается заголовком, если совпадает с именами
+    столбцов; иначе значения берутся по порядку.
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext not in (".csv", ".jsonl"):
+        raise ValidationError(
+            "Поддерживается импорт только из .csv и .jsonl файлов."
+        )
+
+    with open(filepath, "r", encoding="utf-8", newline="") as f:
+        if ext == ".csv":
+            records = csv.reader(f)
+            first = next(records, None)
+            if first is not None and set(first) >= set(columns):
+                header = first
+                records = (dict(zip(header, rec)) for rec in records)
+            elif first is not None:
+                records = itertools.chain([first], records)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
 
-def save_table_data(table_name: str, data: list[dict]) -> None:
-    """Сохраняет список записей в JSON-файл."""
-    filepath = get_table_path(table_name)
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+        batch = []
+        for record in records:
+            if isinstance(record, dict):
+                record.pop("ID", None)
+            batch.append(_import_row(record, columns))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
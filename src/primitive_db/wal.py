@@ -0,0 +1,130 @@
+import json
+import os
+import zlib
+
+from src.primitive_db.constants import (
+    FSYNC_MODE,
+    FSYNC_MODES,
+    WAL_BATCH_SIZE,
+    WAL_FILE,
+)
+
+
+class WriteAheadLog:
+    """
+    Журнал упреждающей записи. Каждый commit сессии - одна строка
+    "<crc32> <json>\\n" со всеми изменениями (групповая фиксация).
+    Запись в WAL происходит раньше, чем в файлы таблиц, поэтому после сбоя
+    изменения можно повторить. Повтор идемпотентен: новые версии записей и
+    надгробия просто дописываются еще раз.
+    """
+
+    def __init__(self, path: str = WAL_FILE, fsync_mode: str = FSYNC_MODE,
+                 batch_size: int = WAL_BATCH_SIZE):
+        if fsync_mode not in FSYNC_MODES:
+            raise ValueError(
+                f"Неизвестный режим fsync: {fsync_mode}. "
+                f"Допустимые: {', '.join(sorted(FSYNC_MODES))}"
+            )
+        self.path = path
+        self.fsync_mode = fsync_mode
+        self.batch_size = batch_size
+        self._file = None
+        self._unsynced = 0
+
+    def _open(self):
+        if self._file is None:
+            # Дописанная после оборванной строки запись была бы потеряна:
+            # чтение журнала останавливается на оборванной строке
+            self.truncate_tail()
+            self._file = open(self.path, "ab")
+        return self._file
+
+    def append(self, record: dict) -> None:
+        """Дописывает запись в журнал и синхронизирует его по политике fsync."""
+        payload = json.dumps(record, ensure_ascii=False).encode("utf-8")
+        line = b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+        f = self._open()
+        f.write(line)
+        f.flush()
+        self._unsynced += 1
+
+        if self.fsync_mode == "always" or (
+            self.fsync_mode == "batch" and self._unsynced >= self.batch_size
+        ):
+            self.sync()
+
+    def sync(self) -> None:
+        """Принудительно сбрасывает журнал на диск (если это разрешено)."""
+        if self._file is not None and self._unsynced and self.fsync_mode != "off":
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def _scan(self) -> tuple[list[dict], int]:
+        """Целые записи журнала и смещение конца последней из них."""
+        records = []
+        end = 0
+        try:
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    crc, _, payload = line.rstrip(b"\n").partition(b" ")
+                    try:
+                        if int(crc, 16) != zlib.crc32(payload):
+                            break
+                        records.append(json.loads(payload))
+                    except ValueError:
+                        break
+                    end += len(line)
+        except FileNotFoundError:
+            pass
+        return records, end
+
+    def read_records(self) -> list[dict]:
+        """
+        Читает записи журнала. Чтение останавливается на первой оборванной
+        или поврежденной строке: это запись, которая не успела дописаться
+        до сбоя, и она не была применена к файлам таблиц.
+        """
+        return self._scan()[0]
+
+    def has_torn_tail(self) -> bool:
+        """Есть ли после последней целой записи оборванные или битые байты."""
+        return self.size() > self._scan()[1]
+
+    def truncate_tail(self) -> bool:
+        """
+        Отрезает все после последней целой записи. Такой хвост - запись,
+        не дописанная до сбоя: commit не был подтвержден, и она не
+        применялась. Возвращает True, если что-то было отрезано.
+        """
+        end = self._scan()[1]
+        if self.size() <= end:
+            return False
+        self.close()
+        with open(self.path, "rb+") as f:
+            f.truncate(end)
+            if self.fsync_mode != "off":
+                os.fsync(f.fileno())
+        return True
+
+    def reset(self) -> None:
+        """Очищает журнал после контрольной точки."""
+        self.close()
+        with open(self.path, "wb") as f:
+            if self.fsync_mode != "off":
+                os.fsync(f.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
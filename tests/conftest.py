@@ -0,0 +1,27 @@
+import pytest
+
+from src.primitive_db import parallel
+from src.primitive_db.api import Database
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Каждый тест работает с базой в своем временном каталоге."""
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    parallel.shutdown()
+
+
+@pytest.fixture
+def db():
+    database = Database()
+    yield database
+    database.close()
+
+
+def abandon(database: Database) -> None:
+    """Имитирует падение процесса: файлы закрываются без сохранения сессии."""
+    session = database.session
+    session.wal.close()
+    session._data_lock.close()
+    session._write_lock.close()
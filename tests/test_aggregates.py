@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from src.primitive_db import aggregates, core
+from src.primitive_db.api import Database
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.engine import execute_command, split_command
+from src.primitive_db.exceptions import ValidationError
+
+ROWS = [
+    {"ID": 1, "city": "b", "age": 30},
+    {"ID": 2, "city": "a", "age": None},
+    {"ID": 3, "city": "b", "age": 10},
+    {"ID": 4, "city": "a", "age": 5},
+]
+COL_TYPES = {"ID": "int", "city": "str", "age": "int"}
+
+
+def test_group_by_in_one_pass():
+    items = [("column", "city"), ("agg", "count", None), ("agg", "count", "age"),
+             ("agg", "sum", "age"), ("agg", "avg", "age"), ("agg", "max", "age")]
+    result = list(aggregates.aggregate(iter(ROWS), items, ["city"]))
+    assert result == [
+        {"city": "b", "count(*)": 2, "count(age)": 2, "sum(age)": 40,
+         "avg(age)": 20, "max(age)": 30},
+        {"city": "a", "count(*)": 2, "count(age)": 1, "sum(age)": 5,
+         "avg(age)": 5, "max(age)": 5},
+    ]
+
+
+def test_empty_input_gives_one_row_without_group_by():
+    items = [("agg", "count", None), ("agg", "sum", "age"), ("agg", "avg", "age")]
+    assert list(aggregates.aggregate(iter([]), items, [])) == [
+        {"count(*)": 0, "sum(age)": None, "avg(age)": None}]
+    assert list(aggregates.aggregate(iter([]), items, ["city"])) == []
+
+
+@pytest.mark.parametrize("items, group_by", [
+    ([("column", "city")], []),
+    ([("agg", "avg", "city")], []),
+    ([("agg", "sum", None)], []),
+    ([("agg", "median", "age")], []),
+    ([("agg", "count", None)], ["missing"]),
+])
+def test_invalid_select_lists(items, group_by):
+    with pytest.raises(ValidationError):
+        aggregates.validate(items, group_by, COL_TYPES)
+
+
+def test_whole_table_aggregates_from_stats(db):
+    users = db.create_table("users", {"age": "int"})
+    users.insert_many([{"age": age} for age in (30, 10, 50)])
+    users.delete("age = 50")
+    db.close()
+
+    with Database() as other:
+        metadata = other.session.metadata
+        items = [("agg", "count", None), ("agg", "min", "age"),
+                 ("agg", "max", "age")]
+        assert core.aggregate_from_stats(metadata, "users", items, []) == {
+            "count(*)": 2, "min(age)": 10, "max(age)": 30}
+        assert core.aggregate_from_stats(
+            metadata, "users", [("agg", "sum", "age")], []) is None
+        assert other.session._tables == {}
+
+
+def test_group_by_command(db, capsys):
+    db.create_table("users", {"city": "str", "age": "int"}).insert_many(
+        [{"city": city, "age": age} for city, age in (("a", 1), ("b", 2), ("a", 3))])
+    capsys.readouterr()
+    execute_command(db.session, split_command(
+        "select city, count(*), avg(age) from users group by city format jsonl"),
+        QueryCache())
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"city": "a", "count(*)": 2, "avg(age)": 2},
+        {"city": "b", "count(*)": 1, "avg(age)": 2},
+    ]
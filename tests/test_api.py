@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from src.primitive_db.api import Database
+from src.primitive_db.exceptions import TableNotFoundError, ValidationError
+
+
+@pytest.fixture
+def users(db):
+    return db.create_table("users", {"name": "str", "age": "int"})
+
+
+def test_insert_returns_typed_row(users):
+    row = users.insert({"name": "Ann", "age": "30"})
+    assert row == {"ID": 1, "name": "Ann", "age": 30}
+    assert users.insert(name="Bob", age=25)["ID"] == 2
+    assert users.insert(["Eve", 40])["age"] == 40
+
+
+@pytest.mark.parametrize("row", [
+    {"age": 5},
+    {"name": "Bob"},
+    {"name": "Bob", "age": 5, "extra": 1},
+    {"ID": 7, "name": "Bob", "age": 5},
+    ["Bob"],
+    ["Bob", 5, True],
+])
+def test_insert_rejects_missing_unknown_and_wrong_length(users, row):
+    with pytest.raises(ValidationError):
+        users.insert(row)
+    assert users.count() == 0
+
+
+@pytest.mark.parametrize("value", [None, "abc", [1]])
+def test_insert_rejects_uncastable_values(users, value):
+    with pytest.raises(ValidationError):
+        users.insert({"name": "Bob", "age": value})
+
+
+def test_insert_many_is_all_or_nothing(users):
+    with pytest.raises(ValidationError):
+        users.insert_many([{"name": "Ann", "age": 1}, {"name": "Bob"}])
+    assert users.count() == 0
+    users.insert_many([{"name": "Ann", "age": 1}, ["Bob", 2]])
+    assert [row["name"] for row in users.select()] == ["Ann", "Bob"]
+
+
+def test_unknown_table(db):
+    with pytest.raises(TableNotFoundError):
+        db.table("nope")
+
+
+def _write_in_thread(name, row):
+    """Вставляет запись из другого подключения в отдельном потоке."""
+    def write():
+        with Database() as other:
+            other.table(name).insert(row)
+            other.commit()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    return writer
+
+
+@pytest.mark.parametrize("finish", ["exhaust", "close"])
+def test_iter_holds_snapshot_until_done(db, users, finish):
+    users.insert_many([{"name": "Ann", "age": 1}, {"name": "Bob", "age": 2}])
+    db.commit()
+
+    rows = users.iter()
+    first = next(rows)
+    writer = _write_in_thread("users", {"name": "Eve", "age": 3})
+    writer.join(0.3)
+    # Запись другого подключения ждет, пока итератор держит снимок
+    assert writer.is_alive()
+    if finish == "exhaust":
+        assert [first["name"], *(row["name"] for row in rows)] == ["Ann", "Bob"]
+    else:
+        rows.close()
+    writer.join(5)
+    assert not writer.is_alive()
+    assert [row["name"] for row in users.select()] == ["Ann", "Bob", "Eve"]
+
+
+def test_iter_reports_bad_where_immediately(users):
+    with pytest.raises(ValidationError):
+        users.iter("missing = 1")
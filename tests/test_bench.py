@@ -0,0 +1,39 @@
+import argparse
+import os
+
+import pytest
+
+from src.primitive_db import bench, storage
+
+
+def test_schema_and_sizes_are_validated():
+    assert bench.parse_schema("name:str, age:int") == ["name:str", "age:int"]
+    assert bench.parse_sizes("10,200") == [10, 200]
+    for parse, spec in ((bench.parse_schema, "name:float"),
+                        (bench.parse_sizes, "10,x"),
+                        (bench.parse_sizes, "0")):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse(spec)
+
+
+def test_summarize_percentiles():
+    summary = bench.summarize([0.001 * n for n in range(1, 101)], rows_per_call=2)
+    assert summary["calls"] == 100
+    assert summary["latency_ms"]["p50"] == pytest.approx(51)
+    assert summary["latency_ms"]["max"] == pytest.approx(100)
+    assert summary["rows_per_s"] == pytest.approx(200 / 5.05, rel=1e-3)
+
+
+@pytest.mark.parametrize("layout", ["rows", "columns"])
+@pytest.mark.parametrize("backend", sorted(storage.BACKENDS))
+def test_benchmarks_run_in_temporary_directory(layout, backend, workdir):
+    args = bench.parse_args(["--sizes", "30", "--samples", "5", "--repeat", "1",
+                             "--layout", layout, "--backend", backend])
+    report = bench.run_benchmarks(args)
+    assert os.getcwd() == str(workdir)
+    assert os.listdir(workdir) == []
+    (result,) = report["results"]
+    assert result["rows"] == 30
+    assert "load_table_data" in result["benchmarks"]
+    for stats in result["benchmarks"].values():
+        assert stats["calls"] >= 1
@@ -0,0 +1,62 @@
+import pytest
+
+from src.primitive_db import binary_format, utils
+from src.primitive_db.api import Database
+from src.primitive_db.storage import BinaryBackend
+
+SCHEMA = [
+    {"name": "ID", "type": "int"},
+    {"name": "name", "type": "str"},
+    {"name": "active", "type": "bool"},
+]
+
+
+def write(tmp_path, rows, schema=SCHEMA):
+    path = tmp_path / "t.bin"
+    path.write_bytes(b"".join(binary_format.pack(rows, schema)))
+    return str(path)
+
+
+def test_round_trip(tmp_path):
+    rows = [{"ID": 2, "name": "b", "active": False},
+            {"ID": 1, "name": "a", "active": True}]
+    names, types, columns, count = binary_format.read_columns(write(tmp_path, rows))
+    assert count == 2
+    assert binary_format.to_rows(names, types, columns) == sorted(
+        rows, key=lambda row: row["ID"])
+
+
+def test_empty_table_keeps_schema(tmp_path):
+    assert binary_format.read_schema(write(tmp_path, [])) == SCHEMA
+
+
+def test_column_order_and_types_come_from_schema(tmp_path):
+    rows = [{"active": True, "name": "a", "ID": 1}]
+    assert binary_format.read_schema(write(tmp_path, rows)) == SCHEMA
+
+
+def test_values_must_match_schema(tmp_path):
+    with pytest.raises(ValueError):
+        write(tmp_path, [{"ID": 1, "name": 5, "active": True}])
+
+
+def test_rewrite_without_schema_keeps_file_schema():
+    backend = BinaryBackend()
+    backend.rewrite("t", [], SCHEMA)
+    backend.rewrite("t", [{"ID": 1, "name": "a", "active": True}])
+    assert binary_format.read_schema(backend.get_path("t")) == SCHEMA
+
+
+def test_compact_writes_table_schema(monkeypatch):
+    monkeypatch.setattr(utils, "STORAGE_BACKEND", "binary")
+    with Database(layout="columns") as db:
+        table = db.create_table("users", {"name": "str", "age": "int"})
+        table.insert({"name": "Ann", "age": 30})
+        table.delete({"name": "Ann"})
+        db.commit()
+        db.session.compact("users")
+    path = BinaryBackend().get_path("users")
+    assert [col["name"] for col in binary_format.read_schema(path)] == [
+        "ID", "name", "age"]
+    with Database(layout="columns") as db:
+        assert db.table("users").count() == 0
@@ -0,0 +1,59 @@
+from src.primitive_db import decorators
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.engine import execute_command, split_command
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_entries=2)
+    cache(("t", "a"), lambda: [1])
+    cache(("t", "b"), lambda: [2])
+    assert cache.get(("t", "a")) == [1]
+    cache(("t", "c"), lambda: [3])
+    assert cache.get(("t", "b")) is None
+    assert cache.get(("t", "a")) == [1]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_row_budget_limits_cache_size():
+    cache = QueryCache(max_rows=5)
+    cache(("t", "a"), lambda: [1, 2, 3])
+    cache(("t", "b"), lambda: [4, 5, 6])
+    assert cache.stats()["rows"] == 3
+    cache(("t", "big"), lambda: list(range(6)))
+    assert cache.get(("t", "big")) is None
+    assert cache.get(("t", "b")) == [4, 5, 6]
+
+
+def test_invalidate_drops_only_that_table():
+    cache = QueryCache()
+    cache(("users", "a"), lambda: [1])
+    cache(("orders", "a"), lambda: [2])
+    cache.invalidate("users")
+    assert cache.get(("users", "a")) is None
+    assert cache.get(("orders", "a")) == [2]
+    assert cache.stats()["rows"] == 1
+
+
+def test_collect_caches_only_finished_streams():
+    cache = QueryCache(max_rows=3)
+    rows = cache.collect(("t", "part"), iter([1, 2, 3]))
+    next(rows)
+    rows.close()
+    assert cache.get(("t", "part")) is None
+    assert list(cache.collect(("t", "all"), iter([1, 2]))) == [1, 2]
+    assert cache.get(("t", "all")) == [1, 2]
+    assert list(cache.collect(("t", "big"), iter(range(4)))) == [0, 1, 2, 3]
+    assert cache.get(("t", "big")) is None
+
+
+def test_select_sees_rows_written_after_caching(db, capsys, monkeypatch):
+    monkeypatch.setitem(decorators._settings, "interactive", False)
+    db.create_table("users", {"name": "str"}).insert({"name": "ann"})
+    cache = QueryCache()
+    for line in ("select from users", "select from users",
+                 "insert into users values (bob)", "select from users"):
+        execute_command(db.session, split_command(line), cache)
+    out = capsys.readouterr().out.split("Запись с ID=2")[-1]
+    assert "ann" in out and "bob" in out
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,54 @@
+import pytest
+
+from src.primitive_db.api import Database
+from src.primitive_db.columnar import ColumnarTable
+
+SCHEMA = [{"name": "ID", "type": "int"}, {"name": "city", "type": "str"},
+          {"name": "active", "type": "bool"}]
+
+
+@pytest.fixture
+def table():
+    return ColumnarTable.from_rows(SCHEMA, [
+        {"ID": 3, "city": "b", "active": True},
+        {"ID": 1, "city": "a", "active": False},
+        {"ID": 2, "city": "a", "active": True},
+    ])
+
+
+def test_behaves_like_list_of_rows(table):
+    assert len(table) == 3
+    assert [row["ID"] for row in table] == [1, 2, 3]
+    assert [row["ID"] for row in reversed(table)] == [3, 2, 1]
+    assert table.get(2) == {"ID": 2, "city": "a", "active": True}
+    assert table.get(9) is None
+
+
+def test_find_positions_checks_all_conditions(table):
+    assert [table.row_at(pos)["ID"] for pos in table.find_positions(
+        {"city": "a", "active": True})] == [2]
+    assert table.find_positions({"city": "zzz"}) == []
+    assert table.find_positions({"missing": 1}) == []
+
+
+def test_ids_must_grow(table):
+    with pytest.raises(ValueError):
+        table.append({"ID": 2, "city": "c", "active": False})
+
+
+def test_update_and_vacuum(table):
+    assert table.update_rows([1], {"city": "c"}) == [
+        {"ID": 1, "city": "c", "active": False}]
+    table.remove_ids([1, 2])
+    assert table.physical_size() == 1
+    assert list(table) == [{"ID": 3, "city": "b", "active": True}]
+
+
+def test_database_with_columnar_layout():
+    with Database(layout="columns") as db:
+        users = db.create_table("users", {"name": "str", "age": "int"})
+        users.insert_many([{"name": "ann", "age": 30}, {"name": "bob", "age": 40}])
+        users.update({"age": 31}, "name = ann")
+        users.delete("name = bob")
+    with Database(layout="columns") as db:
+        assert db.table("users").select() == [{"ID": 1, "name": "ann", "age": 31}]
@@ -0,0 +1,55 @@
+import json
+
+from src.primitive_db import engine, utils
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.engine import execute_command, split_command
+
+
+def run(db, line: str) -> None:
+    execute_command(db.session, split_command(line), QueryCache())
+
+
+def test_csv_header_may_reorder_columns(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text("age,name\n30,ann\n40,bob\n41,eve\n", encoding="utf-8")
+    batches = list(utils.read_import_file(str(path), ["name", "age"], 2))
+    assert batches == [[["ann", "30"], ["bob", "40"]], [["eve", "41"]]]
+
+
+def test_csv_without_header_keeps_first_row(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text("ann,30\nbob,40\n", encoding="utf-8")
+    batches = list(utils.read_import_file(str(path), ["name", "age"], 10))
+    assert batches == [[["ann", "30"], ["bob", "40"]]]
+
+
+def test_multi_row_insert_command(db, capsys):
+    users = db.create_table("users", {"name": "str", "age": "int"})
+    run(db, "insert into users values (ann, 30), (bob, 40)")
+    assert users.select() == [{"ID": 1, "name": "ann", "age": 30},
+                              {"ID": 2, "name": "bob", "age": 40}]
+    capsys.readouterr()
+
+
+def test_bad_row_rejects_whole_insert(db, capsys):
+    users = db.create_table("users", {"name": "str", "age": "int"})
+    run(db, "insert into users values (ann, 30), (bob, old)")
+    assert "Строка 2" in capsys.readouterr().out
+    assert users.count() == 0
+
+
+def test_import_jsonl_in_batches(db, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(engine, "IMPORT_BATCH_SIZE", 2)
+    commits = []
+    commit = db.session.commit
+    monkeypatch.setattr(db.session, "commit",
+                        lambda: commits.append(1) or commit())
+    users = db.create_table("users", {"name": "str", "age": "int"})
+    path = tmp_path / "users.jsonl"
+    path.write_text("\n".join(json.dumps({"ID": 7, "name": f"u{n}", "age": n})
+                              for n in range(5)), encoding="utf-8")
+    run(db, f"import users {path}")
+    assert [row["ID"] for row in users.select()] == [1, 2, 3, 4, 5]
+    assert users.get(5) == {"ID": 5, "name": "u4", "age": 4}
+    assert len(commits) >= 3
+    capsys.readouterr()
@@ -0,0 +1,69 @@
+import bisect
+
+from src.primitive_db import indexes as idx
+from src.primitive_db.indexes import HashIndex, SortedIndex
+
+
+def _rows(count: int) -> list[dict]:
+    return [{"ID": number, "age": number % 7} for number in range(1, count + 1)]
+
+
+def _keys(index: SortedIndex) -> list[tuple]:
+    return [(row["age"], row["ID"]) for row in index.ordered()]
+
+
+def test_sorted_add_many_matches_single_inserts():
+    rows = _rows(50)
+    batched, single = SortedIndex("age", "int"), SortedIndex("age", "int")
+    batched.add_many(rows[:20])
+    batched.add_many(rows[20:])
+    for row in rows:
+        single.add(row)
+    assert _keys(batched) == _keys(single) == sorted(_keys(single))
+
+
+def test_sorted_add_many_does_not_insort_batches(monkeypatch):
+    calls = []
+    monkeypatch.setattr(bisect, "insort", lambda *args: calls.append(args))
+    index = SortedIndex("age", "int")
+    index.add_many(_rows(10))
+    assert calls == []
+    assert len(index.range()) == 10
+
+
+def test_sorted_remove_many_keeps_other_rows():
+    rows = _rows(30)
+    index = SortedIndex("age", "int")
+    index.bulk_load(rows)
+    index.remove_many(rows[::3] + [{"ID": 99, "age": 1}])
+    left = [row for number, row in enumerate(rows) if number % 3]
+    assert _keys(index) == sorted((row["age"], row["ID"]) for row in left)
+    assert index.lookup(0) == [row for row in left if row["age"] == 0]
+
+
+def test_remove_rows_and_add_rows_rebuild_all_indexes():
+    rows = _rows(20)
+    indexes = {"age": SortedIndex("age", "int"), "ID": HashIndex("ID", "int")}
+    for index in indexes.values():
+        index.bulk_load(rows)
+    changed = rows[5:15]
+    idx.remove_rows(indexes, changed)
+    for row in changed:
+        row["age"] = 100
+    idx.add_rows(indexes, changed)
+    assert indexes["age"].lookup(100) == changed
+    assert len(indexes["age"].range()) == 20
+
+
+def test_update_of_many_rows_keeps_sorted_index(db):
+    table = db.create_table("users", {"age": "int"})
+    db.create_index("users", "age", "sorted")
+    table.insert_many([{"age": number % 5} for number in range(40)])
+    table.update({"age": 50}, "age = 3")
+    table.delete("age = 1")
+    assert len(table.select()) == 32
+    ages = [row["age"] for row in table.select("age >= 4")]
+    assert sorted(ages) == [4] * 8 + [50] * 8
+    index = db.session.indexes("users")["age"]
+    assert [row["age"] for row in index.ordered()] == sorted(
+        row["age"] for row in table.select())
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.engine import execute_command, split_command
+
+
+@pytest.fixture
+def shop(db):
+    users = db.create_table("users", {"name": "str", "city": "str"})
+    users.insert_many([{"name": "ann", "city": "a"}, {"name": "bob", "city": "b"},
+                       {"name": "eve", "city": "a"}])
+    orders = db.create_table("orders", {"user_id": "int", "total": "int"})
+    orders.insert_many([{"user_id": 1, "total": 10}, {"user_id": 1, "total": 30},
+                        {"user_id": 3, "total": 5}, {"user_id": 9, "total": 7}])
+    return db
+
+
+def query(db, capsys, line: str) -> list:
+    capsys.readouterr()
+    execute_command(db.session, split_command(line + " format jsonl"), QueryCache())
+    out = capsys.readouterr().out.splitlines()
+    return [json.loads(line) for line in out if line.startswith("{")] or out
+
+
+def pairs(rows) -> list:
+    return sorted((row["users.name"], row["orders.total"]) for row in rows)
+
+
+def test_join_matches_nested_loop(shop, capsys):
+    rows = query(shop, capsys,
+                 "select from users join orders on users.ID = orders.user_id")
+    assert pairs(rows) == [("ann", 10), ("ann", 30), ("eve", 5)]
+    assert set(rows[0]) == {"users.ID", "users.name", "users.city",
+                            "orders.ID", "orders.user_id", "orders.total"}
+
+
+def test_where_split_between_sides_and_residual(shop, capsys):
+    rows = query(shop, capsys,
+                 "select from users join orders on users.ID = orders.user_id "
+                 "where city = a and total > 5 and (name = eve or total > 20)")
+    assert pairs(rows) == [("ann", 30)]
+
+
+def test_index_join_gives_same_rows(shop, capsys):
+    shop.create_index("orders", "user_id")
+    rows = query(shop, capsys,
+                 "select from users join orders on users.ID = orders.user_id")
+    assert pairs(rows) == [("ann", 10), ("ann", 30), ("eve", 5)]
+
+
+def test_join_with_group_by(shop, capsys):
+    rows = query(shop, capsys,
+                 "select name, sum(total) from users join orders "
+                 "on users.ID = orders.user_id group by name order by name")
+    assert rows == [{"users.name": "ann", "sum(orders.total)": 40},
+                    {"users.name": "eve", "sum(orders.total)": 5}]
+
+
+@pytest.mark.parametrize("line, error", [
+    ("select from users join orders on users.ID = orders.user_id where ID = 1",
+     "есть в обеих таблицах"),
+    ("select from users join orders on users.name = orders.user_id",
+     "одного типа"),
+    ("select from users join users on users.ID = users.ID",
+     "В условии соединения"),
+])
+def test_join_errors(shop, capsys, line, error):
+    assert any(error in out for out in query(shop, capsys, line))
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from src.primitive_db import metrics
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.engine import execute_command, split_command
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    clock = iter([0.0, 1.0, 2.0, 5.0, 10.0, 12.0])
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: next(clock))
+    return metrics.Metrics()
+
+
+def run_command(registry):
+    with registry.command() as current:
+        current["name"] = "select"
+        with registry.phase("execute"):
+            with registry.phase("load"):
+                pass
+
+
+def test_nested_phases_count_own_time(registry):
+    run_command(registry)
+    snapshot = registry.snapshot()["select"]
+    assert snapshot["total"]["max_ms"] == 12000
+    assert snapshot["phases"]["execute"]["max_ms"] == 6000
+    assert snapshot["phases"]["load"]["max_ms"] == 3000
+
+
+def test_phase_outside_command_is_session_time(registry):
+    with registry.phase("save"):
+        pass
+    assert registry.snapshot()[metrics.NO_COMMAND]["phases"]["save"]["count"] == 1
+
+
+def test_trace_and_export(registry, tmp_path):
+    trace = tmp_path / "trace.jsonl"
+    registry.set_trace(str(trace))
+    run_command(registry)
+    (entry,) = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert entry["command"] == "select"
+    assert entry["phases_ms"] == {"execute": 6000, "load": 3000}
+
+    export = tmp_path / "metrics.jsonl"
+    assert registry.export(str(export)) == 3
+    phases = {json.loads(line)["phase"] for line in export.read_text().splitlines()}
+    assert phases == {"total", "execute", "load"}
+
+
+def test_histogram_percentiles_are_bucket_bounds():
+    hist = metrics.Histogram()
+    for micros in (3, 3, 3, 100):
+        hist.add(micros / 1_000_000)
+    assert hist.percentile(0.5) == 4 / 1_000_000
+    assert hist.percentile(0.99) == 100 / 1_000_000
+    assert hist.to_dict()["buckets_us"] == {"4": 3, "128": 1}
+
+
+def test_profile_command(db, capsys):
+    db.create_table("users", {"name": "str"})
+    execute_command(db.session, split_command("profile select from users"),
+                    QueryCache())
+    out = capsys.readouterr().out
+    assert "Записи не найдены." in out
+    assert "function calls" in out
@@ -0,0 +1,68 @@
+import json
+import random
+
+import pytest
+
+from src.primitive_db import ordering
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.engine import execute_command, split_command
+
+ROWS = [{"ID": n, "age": n * 7 % 5, "name": f"u{n * 3 % 4}"} for n in range(1, 21)]
+
+
+@pytest.mark.parametrize("order_by", [
+    [("age", False)],
+    [("age", True)],
+    [("age", True), ("name", False)],
+    [("name", False), ("age", True)],
+])
+@pytest.mark.parametrize("limit", [None, 1, 5, 30])
+def test_top_k_matches_full_sort(order_by, limit):
+    expected = list(ROWS)
+    for col, descending in reversed(order_by):
+        expected.sort(key=lambda row: row[col], reverse=descending)
+    # Равные записи - по возрастанию ID, как после устойчивой сортировки
+    result = ordering.sort_rows(iter(ROWS), order_by, limit)
+    assert result == expected[:limit]
+
+
+@pytest.fixture
+def users(db):
+    table = db.create_table("users", {"age": "int", "name": "str"})
+    rng = random.Random(1)
+    table.insert_many([{"age": rng.randrange(10), "name": f"u{n}"}
+                       for n in range(200)])
+    return table
+
+
+def ids(db, capsys, line: str) -> list:
+    capsys.readouterr()
+    execute_command(db.session, split_command(line + " format jsonl"), QueryCache())
+    out = capsys.readouterr().out.splitlines()
+    return [json.loads(line)["ID"] for line in out if line.startswith("{")] or out
+
+
+@pytest.mark.parametrize("query", [
+    "select from users order by age limit 7",
+    "select from users order by age desc limit 7 offset 3",
+    "select from users where age > 4 order by age desc limit 5",
+    "select from users order by ID desc limit 4",
+    "select from users where name = u7 order by age",
+])
+def test_sorted_index_gives_same_order(db, users, capsys, query):
+    expected = ids(db, capsys, query)
+    db.create_index("users", "age", "sorted")
+    assert ids(db, capsys, query) == expected
+
+
+def test_order_by_results(db, users, capsys):
+    rows = users.select()
+    expected = sorted(rows, key=lambda row: (-row["age"], row["ID"]))
+    assert ids(db, capsys, "select from users order by age desc limit 10") == [
+        row["ID"] for row in expected[:10]]
+    assert ids(db, capsys, "select from users order by ID desc limit 2") == [200, 199]
+
+
+def test_order_by_unknown_column(db, users, capsys):
+    assert "Столбец city не существует." in ids(
+        db, capsys, "select from users order by city")[0]
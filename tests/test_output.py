@@ -0,0 +1,48 @@
+import json
+
+from src.primitive_db import decorators, engine
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.engine import execute_command, print_rows, split_command
+
+
+def select(db, capsys, line: str) -> list[str]:
+    capsys.readouterr()
+    execute_command(db.session, split_command(line), QueryCache())
+    return capsys.readouterr().out.splitlines()
+
+
+def test_limit_offset_jsonl(db, capsys):
+    db.create_table("users", {"name": "str"}).insert_many(
+        [{"name": f"u{n}"} for n in range(10)])
+    lines = select(db, capsys, "select from users limit 3 offset 2 format jsonl")
+    assert [json.loads(line) for line in lines] == [
+        {"ID": 3, "name": "u2"}, {"ID": 4, "name": "u3"}, {"ID": 5, "name": "u4"}]
+
+
+def test_tsv_output(db, capsys):
+    db.create_table("users", {"name": "str"}).insert({"name": "ann"})
+    lines = select(db, capsys, "select from users format tsv")
+    assert lines == ["ID\tname", "1\tann"]
+
+
+def test_unknown_format_is_rejected(db, capsys):
+    db.create_table("users", {"name": "str"})
+    lines = select(db, capsys, "select from users format xml")
+    assert lines[0].startswith("Неизвестный формат вывода: xml")
+
+
+def test_table_pages_are_read_on_demand(monkeypatch, capsys):
+    monkeypatch.setattr(engine, "PAGE_SIZE", 2)
+    monkeypatch.setitem(decorators._settings, "interactive", True)
+    monkeypatch.setattr(engine.prompt, "string", lambda text: "n")
+    taken = []
+
+    def rows():
+        for number in range(10):
+            taken.append(number)
+            yield {"ID": number}
+
+    assert print_rows(rows(), ["ID"], page=True) == 2
+    # Вторая страница прочитана, чтобы спросить о ней, дальше - нет
+    assert taken == [0, 1, 2, 3]
+    assert capsys.readouterr().out.count("| ID |") == 1
@@ -0,0 +1,47 @@
+import pytest
+
+from src.primitive_db import parallel, planner
+
+
+@pytest.fixture
+def parallel_scan(monkeypatch):
+    """Включает параллельный перебор для маленьких таблиц, считает сканы."""
+    monkeypatch.setattr(parallel, "PARALLEL_SCAN_ROWS", 1)
+    monkeypatch.setattr(parallel, "PARALLEL_WORKERS", 2)
+    monkeypatch.setattr(planner, "PLAN_PARALLEL_STARTUP_COST", 0)
+    scans = []
+    scan = parallel.scan
+
+    def counted(*args):
+        scans.append(args[0])
+        return scan(*args)
+
+    monkeypatch.setattr(parallel, "scan", counted)
+    return scans
+
+
+@pytest.fixture
+def people(db, parallel_scan):
+    table = db.create_table("people", {"name": "str", "age": "int"})
+    table.insert_many([{"name": f"n{number % 7}", "age": number}
+                       for number in range(200)])
+    return table
+
+
+def ages(rows):
+    return [row["age"] for row in rows]
+
+
+def test_parallel_scan_matches_rows(people, parallel_scan):
+    assert ages(people.select("age >= 150 and name = n3")) == [
+        age for age in range(150, 200) if age % 7 == 3]
+    assert parallel_scan
+
+
+def test_snapshot_is_invalidated_by_writes(people):
+    assert len(people.select("age < 10")) == 10
+    people.update({"age": 1000}, "age < 5")
+    assert ages(people.select("age < 10")) == list(range(5, 10))
+    people.delete("age = 7")
+    people.insert({"name": "x", "age": 3})
+    assert ages(people.select("age < 10")) == [5, 6, 8, 9, 3]
@@ -0,0 +1,68 @@
+import shlex
+
+import pytest
+
+from src.primitive_db import decorators, parser
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.engine import execute_command, split_command
+from src.primitive_db.exceptions import QuerySyntaxError
+
+
+def where(line):
+    return parser.parse_where_clause(parser.split_args(line))
+
+
+@pytest.mark.parametrize("line", [
+    'select from t where name = "a,b"',
+    "a\\ b 'c d'e \"x \\\"y\\\"\" ''",
+    'update t set note = "x=y" where ID = 1',
+])
+def test_split_args_matches_shlex(line):
+    assert parser.split_args(line) == shlex.split(line)
+
+
+def test_split_args_unbalanced_quotes():
+    with pytest.raises(ValueError):
+        parser.split_args('select from t where name = "a')
+
+
+@pytest.mark.parametrize("line, node", [
+    ('where name = "a,b"', ("cmp", "name", "=", "a,b")),
+    ('where note="x=y"', ("cmp", "note", "=", "x=y")),
+    ("where note = '(<>)'", ("cmp", "note", "=", "(<>)")),
+    ('where name = "and"', ("cmp", "name", "=", "and")),
+    ('where name in ("a,b", c)', ("in", "name", ["a,b", "c"])),
+])
+def test_quoted_literals_stay_whole(line, node):
+    assert where(line) == node
+
+
+def test_unquoted_operators_still_split():
+    assert where("where age>=5 and name in (a,b)") == ("and", [
+        ("cmp", "age", ">=", "5"),
+        ("in", "name", ["a", "b"]),
+    ])
+
+
+def test_quoted_keyword_is_not_a_clause():
+    with pytest.raises(QuerySyntaxError):
+        where('where name = a "limit" 3')
+
+
+def test_insert_values_keep_quoted_commas():
+    args = parser.split_args('insert into t values ("a,b", 1), (New York, 2)')
+    assert parser.parse_insert_rows(args) == [["a,b", "1"], ["New York", "2"]]
+
+
+def test_commands_with_quoted_literals(db, capsys, monkeypatch):
+    monkeypatch.setitem(decorators._settings, "interactive", False)
+    notes = db.create_table("notes", {"name": "str", "note": "str"})
+    cache = QueryCache()
+    for line in ('insert into notes values ("a,b", "x=y")',
+                 'update notes set note = "k,v" where name = "a,b"'):
+        execute_command(db.session, split_command(line), cache)
+    assert notes.select() == [{"ID": 1, "name": "a,b", "note": "k,v"}]
+    execute_command(db.session,
+                    split_command('delete from notes where note = "k,v"'), cache)
+    assert notes.count() == 0
+    capsys.readouterr()
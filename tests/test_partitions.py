@@ -0,0 +1,126 @@
+import os
+
+import pytest
+
+from src.primitive_db import partitions
+from src.primitive_db.api import Database
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.constants import DATA_DIR
+from src.primitive_db.core import _cast_type
+from src.primitive_db.engine import execute_command, split_command
+from src.primitive_db.exceptions import ValidationError
+from src.primitive_db.parser import parse_where_expression
+
+HASH = {"method": "hash", "column": "city", "count": 4}
+RANGE = {"method": "range", "column": "ID", "size": 10, "parts": [0, 1, 2, 3]}
+TYPES = {"ID": "int", "city": "str"}
+
+
+def prune(scheme, where):
+    return partitions.prune(scheme, parse_where_expression(where), TYPES,
+                            _cast_type)
+
+
+@pytest.mark.parametrize("scheme, where, expected", [
+    (HASH, "city = a", [partitions.number_of(HASH, "a")]),
+    (HASH, "city in (a, a)", [partitions.number_of(HASH, "a")]),
+    (HASH, "ID = 3", None),
+    (HASH, "city = a or ID = 3", None),
+    (RANGE, "ID = 15", [1]),
+    (RANGE, "ID < 10", [0]),
+    (RANGE, "ID >= 20", [2, 3]),
+    (RANGE, "ID between 5 and 25", [0, 1, 2]),
+    (RANGE, "ID > 29 and city = a", [3]),
+    (RANGE, "ID = 1 or ID = 35", [0, 3]),
+    (RANGE, "not ID = 1", None),
+])
+def test_prune(scheme, where, expected):
+    assert prune(scheme, where) == expected
+
+
+def partition_files():
+    return sorted(name for name in os.listdir(DATA_DIR) if ".p" in name)
+
+
+@pytest.fixture
+def users(db):
+    table = db.create_table("users", {"city": "str", "age": "int"},
+                            partition="hash(city) into 4")
+    table.insert_many([{"city": city, "age": age}
+                       for age, city in enumerate("abcdefgh" * 3)])
+    db.close()
+    return table
+
+
+def test_rows_are_stored_per_partition(users):
+    assert partition_files() == [f"users.p{n}.jsonl" for n in range(4)]
+
+
+def test_where_on_key_loads_only_its_partition(users, capsys):
+    with Database() as db:
+        rows = db.table("users").select("city = c")
+        assert [row["age"] for row in rows] == [2, 10, 18]
+        assert list(db.session.table("users")._parts) == [
+            partitions.number_of(HASH, "c")]
+
+        execute_command(db.session,
+                        split_command("explain select from users where city = c"),
+                        QueryCache())
+        assert "секций: 1 из 4" in capsys.readouterr().out
+
+
+def test_range_partitions_appear_on_insert(db):
+    table = db.create_table("log", {"msg": "str"},
+                            partition="range(ID) size 10")
+    table.insert_many([{"msg": str(n)} for n in range(25)])
+    assert db.session.metadata["log"]["partition"]["parts"] == [0, 1, 2]
+    assert [row["ID"] for row in table.select("ID >= 19 and ID <= 21")] == [
+        19, 20, 21]
+
+
+def test_partition_key_cannot_change(users):
+    with Database() as db:
+        with pytest.raises(ValidationError):
+            db.table("users").update({"city": "z"}, "age = 1")
+
+
+def test_partitioned_table_rejects_indexes(users):
+    with Database() as db:
+        with pytest.raises(ValidationError):
+            db.create_index("users", "age")
+
+
+def test_drop_removes_partition_files(users):
+    with Database() as db:
+        db.drop_table("users")
+    assert partition_files() == []
+
+
+def loaded(db, name):
+    return sorted(db.session.table(name)._parts)
+
+
+def test_delete_of_max_id_loads_only_its_partition(users):
+    with Database() as db:
+        table = db.table("users")
+        table.delete("city = h and ID = 24")
+        assert loaded(db, "users") == [partitions.number_of(HASH, "h")]
+        stats = db.session.metadata["users"]["stats"]
+        assert (stats["rows"], stats["max"]["ID"]) == (23, 23)
+    with Database() as db:
+        assert db.table("users").select("ID >= 23") == [
+            {"ID": 23, "city": "g", "age": 22}]
+
+
+def test_update_of_max_loads_only_its_partition(db):
+    table = db.create_table("log", {"age": "int"}, partition="range(ID) size 10")
+    table.insert_many([{"age": n} for n in range(25)])
+    db.close()
+    with Database() as other:
+        other.table("log").update({"age": 0}, "ID = 25")
+        assert loaded(other, "log") == [2]
+        stats = other.session.metadata["log"]["stats"]
+        assert (stats["min"]["age"], stats["max"]["age"]) == (0, 23)
+        other.table("log").delete("ID = 24")
+        assert loaded(other, "log") == [2]
+        assert other.session.metadata["log"]["stats"]["max"]["age"] == 22
@@ -0,0 +1,58 @@
+import pytest
+
+from src.primitive_db.api import Database
+from src.primitive_db.exceptions import QuerySyntaxError, ValidationError
+
+NAMES = ["Ann", "Bob", "Eve", "Al", "a%b", "Anna"]
+CASES = [
+    ("age > 9", lambda row: row["age"] > 9),
+    ("age != 10 and active = true", lambda row: row["age"] != 10 and row["active"]),
+    ("age < 3 or age >= 40", lambda row: row["age"] < 3 or row["age"] >= 40),
+    ("not age between 5 and 30", lambda row: not 5 <= row["age"] <= 30),
+    ("not (age = 2 or name = Bob) and age <> 9",
+     lambda row: not (row["age"] == 2 or row["name"] == "Bob") and row["age"] != 9),
+    ('name like "A%"', lambda row: row["name"].startswith("A")),
+    ('name like "A_"', lambda row: row["name"] == "Al"),
+    ('name like "a%b"', lambda row: row["name"].startswith("a")
+     and row["name"].endswith("b")),
+    ('name in (Eve, "Al") or age in (40, 41)',
+     lambda row: row["name"] in ("Eve", "Al") or row["age"] in (40, 41)),
+]
+
+
+@pytest.fixture(params=["rows", "columns"])
+def users(request):
+    db = Database(layout=request.param)
+    table = db.create_table("users", {"name": "str", "age": "int",
+                                      "active": "bool"})
+    table.insert_many([{"name": NAMES[n % len(NAMES)], "age": n * 3 % 47,
+                        "active": n % 3 == 0} for n in range(60)])
+    yield db, table
+    db.close()
+
+
+@pytest.mark.parametrize("where, check", CASES)
+@pytest.mark.parametrize("index", [None, "hash", "sorted"])
+def test_where_matches_python(users, where, check, index):
+    db, table = users
+    if index is not None:
+        db.create_index("users", "age", index)
+        db.create_index("users", "name", index)
+    expected = [row for row in table.select() if check(row)]
+    assert expected
+    assert table.select(where) == expected
+
+
+def test_values_are_compared_as_column_type(users):
+    _, table = users
+    # "10" < "9" как строки, но 10 > 9 как числа
+    assert all(row["age"] > 9 for row in table.select("age > 9"))
+    with pytest.raises(ValidationError):
+        table.select("age > old")
+
+
+@pytest.mark.parametrize("where", ["age >", "age = 1 and", "(age = 1", "age ~ 1"])
+def test_malformed_where(users, where):
+    _, table = users
+    with pytest.raises((QuerySyntaxError, ValidationError)):
+        table.select(where)
@@ -0,0 +1,51 @@
+import pytest
+
+from src.primitive_db import decorators, main
+from src.primitive_db.api import Database
+from src.primitive_db.engine import run_script
+
+
+def test_script_skips_comments_and_stops_at_exit(capsys):
+    summary = run_script([
+        "# схема",
+        "create_table users name:str;",
+        "",
+        "-- данные",
+        "insert into users values (ann);",
+        "insert into users values (bob)",
+        "select from users format tsv",
+        "exit",
+        "insert into users values (eve)",
+    ])
+    assert {name: stats["count"] for name, stats in summary.items()} == {
+        "create_table": 1, "insert": 2, "select": 1}
+    captured = capsys.readouterr()
+    assert captured.out.splitlines()[-3:] == ["ID\tname", "1\tann", "2\tbob"]
+    assert "Выполнено команд: 4" in captured.err
+    with Database() as db:
+        assert db.table("users").count() == 2
+
+
+def test_exec_file_without_prompts(tmp_path, monkeypatch, capsys):
+    monkeypatch.setitem(decorators._settings, "interactive", True)
+    script = tmp_path / "script.sql"
+    script.write_text("create_table users name:str\n"
+                      "insert into users values (ann)\n"
+                      "delete from users where name = ann\n", encoding="utf-8")
+    monkeypatch.setattr("sys.argv", ["project", "--yes", "--exec", str(script)])
+    main.main()
+    capsys.readouterr()
+    with Database() as db:
+        assert db.table("users").count() == 0
+
+
+def test_missing_exec_file_exits(monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["project", "--exec", "missing.sql"])
+    with pytest.raises(SystemExit) as exc:
+        main.main()
+    assert exc.value.code == 1
+    assert "missing.sql" in capsys.readouterr().out
+
+
+def test_flush_interval_option():
+    assert main.parse_args(["--flush-interval", "2.5"]).flush_interval == 2.5
@@ -0,0 +1,37 @@
+import pytest
+
+from src.primitive_db import core
+from src.primitive_db.api import Database
+from src.primitive_db.exceptions import ValidationError
+
+
+def test_ids_of_deleted_rows_are_not_reused(db):
+    table = db.create_table("users", {"name": "str"})
+    table.insert_many([{"name": "a"}, {"name": "b"}])
+    table.delete("ID = 2")
+    assert table.insert({"name": "c"})["ID"] == 3
+
+
+def test_sequence_survives_reopen(db):
+    table = db.create_table("users", {"name": "str"})
+    table.insert({"name": "a"})
+    table.delete("ID = 1")
+    db.close()
+    with Database() as other:
+        assert other.table("users").insert({"name": "b"})["ID"] == 2
+
+
+def test_failed_insert_does_not_advance_sequence(db):
+    table = db.create_table("users", {"age": "int"})
+    with pytest.raises(ValidationError):
+        table.insert({"age": "old"})
+    with pytest.raises(ValidationError):
+        table.insert_many([{"age": 1}, {"age": "old"}])
+    assert table.insert({"age": 1})["ID"] == 1
+
+
+def test_legacy_table_seeds_sequence_from_max_id():
+    metadata = {"users": {"columns": [{"name": "ID", "type": "int"}]}}
+    rows = [{"ID": 4}, {"ID": 9}, {"ID": 2}]
+    assert core.next_id(metadata, "users", rows) == 10
+    assert metadata["users"]["sequence"] == 9
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.primitive_db.api import Database
+from src.primitive_db.client import ConnectionPool
+from src.primitive_db.server import ReadWriteLock, Server
+from src.primitive_db.session import Session
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def server():
+    server = Server(Session(), commit_delay=0.05)
+    yield server
+    server.close()
+
+
+def run(server, *lines):
+    """Выполняет первую команду, затем остальные одновременно - как serve()."""
+    async def main():
+        server._lock = ReadWriteLock()
+        await server.execute(lines[0])
+        return await asyncio.gather(*(server.execute(line) for line in lines[1:]))
+
+    stdout, sys.stdout = sys.stdout, server.output
+    try:
+        return asyncio.run(main())
+    finally:
+        sys.stdout = stdout
+
+
+def test_concurrent_writes_share_one_commit(server, monkeypatch):
+    commits = []
+    commit = server.session.commit
+    monkeypatch.setattr(server.session, "commit",
+                        lambda: commits.append(1) or commit())
+    outputs = run(server, "create_table users name:str",
+                  *(f"insert into users values (u{n})" for n in range(10)))
+    assert all("успешно" in output for output in outputs)
+    # Одна фиксация для create_table и одна на все десять вставок
+    assert len(commits) == 2
+    assert not server.session.dirty
+    with Database() as db:
+        assert db.table("users").count() == 10
+
+
+def test_transactions_are_rejected(server):
+    (output,) = run(server, "create_table users name:str", "begin")
+    assert output == "Команда begin недоступна в режиме сервера.\n"
+
+
+def test_clients_over_unix_socket(workdir):
+    sock = workdir / "db.sock"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.primitive_db.main", "serve", "--unix", str(sock)],
+        env={**os.environ, "PYTHONPATH": str(ROOT)}, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not sock.exists():
+            assert time.monotonic() < deadline and process.poll() is None
+            time.sleep(0.05)
+
+        with ConnectionPool(unix_path=str(sock), size=3, timeout=10) as pool:
+            pool.execute("create_table users name:str")
+            errors = []
+
+            def client(number):
+                try:
+                    for step in range(5):
+                        pool.execute(f"insert into users values (c{number}_{step})")
+                        pool.execute("select from users format tsv")
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=client, args=(n,)) for n in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert errors == []
+            out = pool.execute("select count(*) from users format tsv")
+            assert out.splitlines() == ["count(*)", "20"]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
+    assert not sock.exists()
+    with Database() as db:
+        assert db.table("users").count() == 20
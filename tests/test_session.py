@@ -0,0 +1,38 @@
+from src.primitive_db import utils
+from src.primitive_db.api import Database
+
+
+def test_table_loaded_once_per_session(db, monkeypatch):
+    db.create_table("users", {"name": "str"}).insert({"name": "a"})
+    db.close()
+
+    loads = []
+    load = utils.load_table_data
+    monkeypatch.setattr(utils, "load_table_data",
+                        lambda name: loads.append(name) or load(name))
+    with Database() as other:
+        users = other.table("users")
+        users.select()
+        users.insert({"name": "b"})
+        assert users.count() == 2
+    assert loads == ["users"]
+
+
+def test_changes_wait_for_commit_with_flush_interval():
+    db = Database(flush_interval=3600)
+    users = db.create_table("users", {"name": "str"})
+    db.commit()
+    users.insert({"name": "a"})
+    with Database() as other:
+        assert other.table("users").count() == 0
+        db.commit()
+        assert other.table("users").count() == 1
+    db.close()
+
+
+def test_zero_flush_interval_saves_every_command(db):
+    users = db.create_table("users", {"name": "str"})
+    users.insert({"name": "a"})
+    assert not db.session.dirty
+    with Database() as other:
+        assert other.table("users").select() == [{"ID": 1, "name": "a"}]
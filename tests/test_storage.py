@@ -0,0 +1,44 @@
+import json
+
+from src.primitive_db.storage import BinaryBackend, JsonLinesBackend
+
+
+def write_torn(backend, name):
+    path = backend.get_path(name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"ID": 1, "x": 1}) + "\n" + '{"ID": 2, "x"')
+    return path
+
+
+def test_read_skips_torn_tail_without_touching_file():
+    backend = JsonLinesBackend()
+    path = write_torn(backend, "t")
+    with open(path, "rb") as f:
+        before = f.read()
+    assert backend.load("t") == [{"ID": 1, "x": 1}]
+    with open(path, "rb") as f:
+        assert f.read() == before
+
+
+def test_append_cuts_torn_tail_first():
+    backend = JsonLinesBackend()
+    write_torn(backend, "t")
+    backend.append("t", [{"ID": 3, "x": 3}])
+    assert backend.load("t") == [{"ID": 1, "x": 1}, {"ID": 3, "x": 3}]
+
+
+def test_binary_delta_log_skips_torn_tail():
+    backend = BinaryBackend()
+    backend.rewrite("t", [], [{"name": "ID", "type": "int"},
+                              {"name": "x", "type": "int"}])
+    backend.append("t", [{"ID": 1, "x": 1}])
+    with open(backend._delta.get_path("t"), "a", encoding="utf-8") as f:
+        f.write('{"ID": 2')
+    assert backend.load("t") == [{"ID": 1, "x": 1}]
+    backend.append("t", [{"ID": 2, "x": 2}])
+    assert backend.load("t") == [{"ID": 1, "x": 1}, {"ID": 2, "x": 2}]
+
+
+def test_delta_log_accepts_schema_like_other_backends():
+    schema = [{"name": "ID", "type": "int"}]
+    assert BinaryBackend()._delta.migrate_legacy("t", schema) is False
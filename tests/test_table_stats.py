@@ -0,0 +1,51 @@
+from src.primitive_db import table_stats
+from src.primitive_db.constants import ANALYZE_MIN_CHANGES
+
+SCHEMA = [{"name": "ID", "type": "int"}, {"name": "city", "type": "str"}]
+
+
+def test_new_table_stats_are_stale_after_first_rows(db):
+    table = db.create_table("users", {"city": "str"})
+    stats = db.session.metadata["users"]["stats"]
+    assert table_stats.distinct_known(stats)
+
+    table.insert_many([{"city": city} for city in ("a", "b", "a")])
+    stats = db.session.metadata["users"]["stats"]
+    assert stats["distinct"] == {"ID": 3, "city": 2}
+    assert stats["analyzed_rows"] == 3
+
+
+def test_small_table_reanalyzed_as_it_grows(db):
+    table = db.create_table("users", {"city": "str"})
+    for number in range(40):
+        table.insert({"city": f"c{number % 10}"})
+    stats = db.session.metadata["users"]["stats"]
+    # Рост меньше чем в 2 раза с прошлого пересчета
+    assert stats["rows"] == 40
+    assert 20 <= stats["analyzed_rows"] <= 40
+    assert stats["distinct"]["city"] == 10
+
+
+def test_empty_table_stats_unknown_for_filled_table():
+    stats = table_stats.compute(SCHEMA, [])
+    stats["rows"] = 10
+    assert not table_stats.distinct_known(stats)
+    assert table_stats.needs_analyze(stats)
+
+
+def test_stats_without_analyzed_rows_use_id_count():
+    stats = table_stats.compute(SCHEMA, [{"ID": 1, "city": "a"}])
+    del stats["analyzed_rows"]
+    assert table_stats.distinct_known(stats)
+    assert not table_stats.needs_analyze(stats)
+    stats["rows"] = 3
+    assert table_stats.needs_analyze(stats)
+
+
+def test_changes_threshold():
+    rows = [{"ID": n, "city": "a"} for n in range(1, 11)]
+    stats = table_stats.compute(SCHEMA, rows)
+    stats["changes"] = ANALYZE_MIN_CHANGES
+    assert not table_stats.needs_analyze(stats)
+    stats["changes"] = ANALYZE_MIN_CHANGES + 3
+    assert table_stats.needs_analyze(stats)
@@ -0,0 +1,111 @@
+import pytest
+
+from src.primitive_db.api import Database
+from src.primitive_db.engine import run_script
+from src.primitive_db.exceptions import TransactionError, ValidationError
+
+
+@pytest.fixture
+def accounts(db):
+    table = db.create_table("accounts", {"owner": "str", "balance": "int"})
+    table.insert_many([{"owner": "ann", "balance": 100},
+                       {"owner": "bob", "balance": 50}])
+    db.commit()
+    return table
+
+
+def balances(table):
+    return {row["owner"]: row["balance"] for row in table.select()}
+
+
+def test_rollback_discards_changes(db, accounts):
+    db.begin()
+    accounts.update({"balance": 0}, "owner = ann")
+    accounts.delete("owner = bob")
+    accounts.insert({"owner": "eve", "balance": 1})
+    db.rollback()
+    assert balances(accounts) == {"ann": 100, "bob": 50}
+
+
+def test_changes_before_begin_survive_rollback(db, accounts):
+    accounts.insert({"owner": "eve", "balance": 1})
+    db.begin()
+    accounts.delete("owner = eve")
+    db.rollback()
+    assert balances(accounts)["eve"] == 1
+
+
+def test_transaction_block_rolls_back_on_error(db, accounts):
+    with pytest.raises(ValidationError):
+        with db.transaction():
+            accounts.update({"balance": 0}, "owner = ann")
+            accounts.insert({"owner": "eve"})
+    assert balances(accounts) == {"ann": 100, "bob": 50}
+
+
+def test_transaction_block_commits(db, accounts):
+    with db.transaction():
+        accounts.update({"balance": 150}, "owner = ann")
+        accounts.update({"balance": 0}, "owner = bob")
+    db.close()
+    with Database() as other:
+        assert balances(other.table("accounts")) == {"ann": 150, "bob": 0}
+
+
+def test_rollback_of_created_table(db, accounts):
+    db.begin()
+    db.create_table("tmp", {"x": "int"})
+    db.drop_table("accounts")
+    db.rollback()
+    assert db.tables() == ["accounts"]
+    assert accounts.count() == 2
+
+
+def test_transaction_misuse(db, accounts):
+    with pytest.raises(TransactionError):
+        db.rollback()
+    db.begin()
+    with pytest.raises(TransactionError):
+        db.begin()
+    with pytest.raises(TransactionError):
+        db.session.compact("accounts")
+    db.rollback()
+
+
+def test_transaction_is_one_wal_record(db, accounts, monkeypatch):
+    records = []
+    append = db.session.wal.append
+    monkeypatch.setattr(db.session.wal, "append",
+                        lambda record: records.append(record) or append(record))
+    with db.transaction():
+        accounts.update({"balance": 0}, "owner = ann")
+        accounts.insert({"owner": "eve", "balance": 1})
+        accounts.delete("owner = bob")
+        assert records == []
+    assert len(records) == 1
+
+
+def test_unfinished_transaction_rolled_back_on_close(db, accounts):
+    db.begin()
+    accounts.update({"balance": 0}, "owner = ann")
+    db.close()
+    with Database() as other:
+        assert balances(other.table("accounts")) == {"ann": 100, "bob": 50}
+
+
+def test_script_begin_and_rollback(capsys):
+    run_script([
+        "create_table accounts owner:str balance:int",
+        "insert into accounts values (ann, 100)",
+        "begin",
+        "insert into accounts values (bob, 50)",
+        "rollback",
+        "begin",
+        "insert into accounts values (eve, 1)",
+        "commit",
+    ])
+    out = capsys.readouterr().out
+    assert "Транзакция отменена." in out
+    assert "Транзакция зафиксирована." in out
+    with Database() as other:
+        assert balances(other.table("accounts")) == {"ann": 100, "eve": 1}
@@ -0,0 +1,73 @@
+import pytest
+
+from src.primitive_db.api import Database
+from src.primitive_db.constants import WAL_FILE
+from src.primitive_db.wal import WriteAheadLog
+
+from .conftest import abandon
+
+TORN_RECORD = b'deadbeef {"version": 99, "tab'
+
+
+def test_read_stops_at_torn_record():
+    wal = WriteAheadLog()
+    wal.append({"version": 1})
+    wal.close()
+    with open(WAL_FILE, "ab") as f:
+        f.write(TORN_RECORD)
+
+    assert wal.read_records() == [{"version": 1}]
+    assert wal.has_torn_tail()
+
+
+def test_append_after_torn_record_is_readable():
+    with open(WAL_FILE, "wb") as f:
+        f.write(TORN_RECORD)
+
+    wal = WriteAheadLog()
+    wal.append({"version": 1})
+    wal.close()
+
+    assert wal.read_records() == [{"version": 1}]
+    assert not wal.has_torn_tail()
+
+
+def test_commit_after_torn_record_survives_crash(monkeypatch):
+    db = Database()
+    db.create_table("t", {"name": "str"}).insert({"name": "a"})
+    db.close()
+    with open(WAL_FILE, "ab") as f:
+        f.write(TORN_RECORD)
+
+    db = Database()
+    table = db.table("t")
+
+    def crash(record):
+        raise RuntimeError("сбой посреди применения commit")
+
+    monkeypatch.setattr(db.session, "_apply", crash)
+    with pytest.raises(RuntimeError):
+        table.insert({"name": "b"})
+    abandon(db)
+
+    db = Database()
+    try:
+        assert [row["name"] for row in db.table("t").select()] == ["a", "b"]
+        assert not WriteAheadLog().has_torn_tail()
+    finally:
+        db.close()
+
+
+def test_recover_truncates_torn_tail_without_pending_records():
+    db = Database()
+    db.create_table("t", {"name": "str"})
+    db.close()
+    with open(WAL_FILE, "ab") as f:
+        f.write(TORN_RECORD)
+
+    db = Database()
+    try:
+        assert db.tables() == ["t"]
+        assert not WriteAheadLog().has_torn_tail()
+    finally:
+        db.close()